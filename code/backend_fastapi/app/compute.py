@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Any, Callable, Dict
+
+from .config import (
+    COMPUTE_QUEUE_LIMIT,
+    COMPUTE_TIMEOUT_SECONDS,
+    COMPUTE_WORKERS,
+    MODEL_PRELOAD_ON_STARTUP,
+    PROFILE_DIR,
+    PROFILE_SLOW_REQUEST_MS,
+)
+from .data_store import load_features
+from .profiling import profiled, sample_if_slow
+from .result_store import result_store
+
+if TYPE_CHECKING:
+    from .strategy_engine import StrategyEngine
+
+
+class NoFeaturesError(RuntimeError):
+    """Raised inside a worker when the feature store is empty."""
+
+
+class InvalidRequestError(ValueError):
+    """Raised inside a worker when a request describes an impossible race
+    state (e.g. a live lap past the finish); the API answers 422."""
+
+
+class ComputeOverloaded(RuntimeError):
+    """Raised when the compute queue is full and a request must be rejected."""
+
+
+class ComputeUnavailable(ComputeOverloaded):
+    """Raised while the pool is not started yet or is being replaced after a
+    worker died; the API answers 503 exactly as for a full queue."""
+
+
+# Worker-side state: each pool process keeps one warm engine (features frame,
+# model and pace-curve caches) until the feature store or models change. The
+# engine, model registry and torch are imported in the workers only, so the
+# API process that imports this module stays light.
+_engine: StrategyEngine | None = None
+_engine_version: str | None = None
+
+
+def _worker_init(torch_threads: int) -> None:
+    import torch
+
+    from .model_registry import model_registry
+
+    torch.set_num_threads(torch_threads)
+    engine = _get_engine(required=False)
+    if engine is not None and MODEL_PRELOAD_ON_STARTUP:
+        # Active season first: its drivers are the ones requests will ask for.
+        features = engine.features
+        model_registry.preload(features.loc[features["year"] == features["year"].max(), "driver_id"].unique())
+
+
+def _get_engine(required: bool = True) -> StrategyEngine | None:
+    from .model_registry import model_registry
+    from .strategy_engine import StrategyEngine
+
+    global _engine, _engine_version
+    version = result_store.version()
+    if _engine is not None and version != _engine_version:
+        load_features.cache_clear()
+        model_registry.clear()
+        _engine = None
+    if _engine is None:
+        df = load_features()
+        if df.empty:
+            load_features.cache_clear()
+            if required:
+                raise NoFeaturesError("No features available. Run ingestion + preprocessing.")
+            return None
+        _engine = StrategyEngine(df)
+        _engine_version = version
+    return _engine
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _instrumented(task: Callable[[Dict[str, Any]], Dict]) -> Callable[[Dict[str, Any]], Dict]:
+    """Run a task under a stage profile.
+
+    The profile travels back as `_profile`, which the API folds into
+    `/api/metrics` and drops before caching; `debug_profile` requests also
+    keep it in the response as `profile`. `_registry` (this worker's resident
+    models) is dropped the same way and served by `/api/models`.
+    """
+
+    @functools.wraps(task)
+    def wrapper(params: Dict[str, Any]) -> Dict:
+        from .model_registry import model_registry
+
+        with profiled() as profile, sample_if_slow(PROFILE_SLOW_REQUEST_MS, PROFILE_DIR, task.__name__):
+            result = task(params)
+        timings = profile.as_dict()
+        if params.get("debug_profile"):
+            result["profile"] = timings
+        result["_profile"] = timings
+        result["_registry"] = model_registry.report()
+        return result
+
+    return wrapper
+
+
+@_instrumented
+def strategy_task(params: Dict[str, Any]) -> Dict:
+    engine = _get_engine()
+    payload = engine.generate_strategies(
+        year=params["year"],
+        circuit_id=params["circuit_id"],
+        driver_id=params["driver_id"],
+        risk_bias=params["risk_bias"],
+        n_strategies=params["n_strategies"],
+        debug_profile=params["debug_profile"],
+        refined=params.get("refined"),
+    )
+    return {
+        "year": params["year"],
+        "circuit_id": params["circuit_id"],
+        "driver_id": params["driver_id"],
+        **payload,
+    }
+
+
+@_instrumented
+def analytical_task(params: Dict[str, Any]) -> Dict:
+    """Analytical-only strategy response plus the candidates left to refine."""
+    engine = _get_engine()
+    response = strategy_task.__wrapped__({**params, "refined": {}})
+    response["refining"] = engine.refinement_targets(
+        year=params["year"],
+        circuit_id=params["circuit_id"],
+        driver_id=params["driver_id"],
+        risk_bias=params["risk_bias"],
+    )
+    return response
+
+
+@_instrumented
+def refine_task(params: Dict[str, Any]) -> Dict:
+    engine = _get_engine()
+    mean, var = engine.refine_strategy(
+        year=params["year"],
+        circuit_id=params["circuit_id"],
+        driver_id=params["driver_id"],
+        candidate_index=params["candidate_index"],
+    )
+    return {
+        "candidate_index": params["candidate_index"],
+        "strategy_id": params["strategy_id"],
+        "expected_time": mean,
+        "variance": var,
+        "risk_score": mean + params["risk_bias"] * var,
+    }
+
+
+@_instrumented
+def pareto_task(params: Dict[str, Any]) -> Dict:
+    engine = _get_engine()
+    payload = engine.generate_pareto(
+        year=params["year"],
+        circuit_id=params["circuit_id"],
+        driver_id=params["driver_id"],
+        debug_profile=params["debug_profile"],
+    )
+    return {
+        "year": params["year"],
+        "circuit_id": params["circuit_id"],
+        "driver_id": params["driver_id"],
+        **payload,
+    }
+
+
+@_instrumented
+def live_task(params: Dict[str, Any]) -> Dict:
+    engine = _get_engine()
+    try:
+        payload = engine.generate_live(
+            year=params["year"],
+            circuit_id=params["circuit_id"],
+            driver_id=params["driver_id"],
+            current_lap=params["current_lap"],
+            compound=params["compound"],
+            tyre_age=params["tyre_age"],
+            used_compounds=params["used_compounds"],
+            gap_ahead=params["gap_ahead"],
+            gap_behind=params["gap_behind"],
+            risk_bias=params["risk_bias"],
+            n_strategies=params["n_strategies"],
+        )
+    except ValueError as exc:
+        # Re-raised as a class the API process can unpickle without the engine.
+        raise InvalidRequestError(str(exc)) from None
+    return {
+        "year": params["year"],
+        "circuit_id": params["circuit_id"],
+        "driver_id": params["driver_id"],
+        **payload,
+    }
+
+
+@_instrumented
+def compare_task(params: Dict[str, Any]) -> Dict:
+    engine = _get_engine()
+    driver_payload, teammate_payload = engine.generate_comparison(
+        year=params["year"],
+        circuit_id=params["circuit_id"],
+        driver_id=params["driver_id"],
+        teammate_id=params["teammate_id"],
+        risk_bias=params["risk_bias"],
+        n_strategies=params["n_strategies"],
+        debug_profile=params["debug_profile"],
+    )
+    return {
+        "year": params["year"],
+        "circuit_id": params["circuit_id"],
+        "driver": {"driver_id": params["driver_id"], **driver_payload},
+        "teammate": {"driver_id": params["teammate_id"], **teammate_payload},
+    }
+
+
+@_instrumented
+def batch_task(params: Dict[str, Any]) -> Dict:
+    engine = _get_engine()
+    payloads = engine.generate_batch(
+        year=params["year"],
+        circuit_id=params["circuit_id"],
+        rows=params["drivers"],
+        debug_profile=params["debug_profile"],
+    )
+    return {
+        "year": params["year"],
+        "circuit_id": params["circuit_id"],
+        "results": [
+            {
+                "year": params["year"],
+                "circuit_id": params["circuit_id"],
+                "driver_id": row["driver_id"],
+                **payload,
+            }
+            for row, payload in zip(params["drivers"], payloads)
+        ],
+    }
+
+
+@_instrumented
+def sweep_task(params: Dict[str, Any]) -> Dict:
+    engine = _get_engine()
+    payload = engine.sweep(
+        year=params["year"],
+        circuit_id=params["circuit_id"],
+        driver_id=params["driver_id"],
+        pit_loss=params["pit_loss"],
+        sc_probability=params["sc_probability"],
+        track_temp=params["track_temp"],
+        air_temp=params["air_temp"],
+        risk_bias=params["risk_bias"],
+    )
+    return {
+        "year": params["year"],
+        "circuit_id": params["circuit_id"],
+        "driver_id": params["driver_id"],
+        **payload,
+    }
+
+
+class ComputeExecutor:
+    """Process pool for CPU-heavy strategy work with a bounded queue.
+
+    At most `queue_limit` tasks may be queued or running at once; further
+    submissions raise `ComputeOverloaded` so the API can answer 503 instead of
+    letting latency grow for every endpoint. The pool is started by the API
+    warm-up, never on the request path, and a pool broken by a dead worker
+    (OOM kill, crash) is replaced so only the requests it held fail.
+    """
+
+    def __init__(
+        self,
+        workers: int = COMPUTE_WORKERS,
+        queue_limit: int = COMPUTE_QUEUE_LIMIT,
+        timeout: float = COMPUTE_TIMEOUT_SECONDS,
+    ):
+        self.workers = max(1, workers)
+        self.queue_limit = max(1, queue_limit)
+        self.timeout = timeout
+        self.restarts = 0
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.queue_limit)
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        torch_threads = max(1, (os.cpu_count() or 1) // self.workers)
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_worker_init,
+            initargs=(torch_threads,),
+        )
+
+    def start(self, attempts: int = 3) -> None:
+        """Create the pool and block until every worker is up (call it off the
+        event loop). A worker dying while it warms up gets a fresh pool."""
+        for attempt in range(attempts):
+            with self._lock:
+                if self._pool is None:
+                    self._pool = self._new_pool()
+                pool = self._pool
+            try:
+                # Spawn every worker up front so the first requests hit warm engines.
+                for future in [pool.submit(_ping) for _ in range(self.workers)]:
+                    future.result()
+                return
+            except BrokenProcessPool:
+                self._replace(pool)
+                if attempt == attempts - 1:
+                    raise
+
+    def _replace(self, broken: ProcessPoolExecutor) -> None:
+        # Identity check: concurrent callers that saw the same broken pool
+        # replace it once, and a pool already shut down stays down.
+        with self._lock:
+            if self._pool is not broken:
+                return
+            self._pool = self._new_pool()
+            self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        pool = self._pool
+        if pool is None:
+            raise ComputeUnavailable("Strategy workers are not started yet.")
+        if not self._slots.acquire(blocking=False):
+            raise ComputeOverloaded("Strategy compute queue is full.")
+        try:
+            future = pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._replace(pool)
+            raise ComputeUnavailable("Strategy workers are restarting.")
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(functools.partial(self._settle, pool))
+        return future
+
+    def _settle(self, pool: ProcessPoolExecutor, future: Future) -> None:
+        self._slots.release()
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._replace(pool)
+
+    async def wait(self, future: Future) -> Any:
+        # Shield the shared future: a timed-out caller must not cancel work
+        # other coalesced callers (or the cache) are still waiting on.
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=self.timeout)
+        except BrokenProcessPool:
+            raise ComputeUnavailable("Strategy workers are restarting.")
+
+
+executor = ComputeExecutor()
@@ -1,18 +1,23 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
-DATA_DIR = BASE_DIR / "data"
+# data/, models/ and cache/ root; the benchmark suite points it at a scratch tree.
+STORAGE_DIR = Path(os.environ.get("RACESCOPE_STORAGE_DIR", BASE_DIR))
+DATA_DIR = STORAGE_DIR / "data"
 RAW_DIR = DATA_DIR / "raw"
 FEATURE_DIR = DATA_DIR / "features"
-MODELS_DIR = BASE_DIR / "models"
-CACHE_DIR = BASE_DIR / "cache"
+REWATCH_DIR = DATA_DIR / "rewatch"
+MODELS_DIR = STORAGE_DIR / "models"
+CACHE_DIR = STORAGE_DIR / "cache"
 
 OPENF1_BASE_URL = "https://api.openf1.org/v1"
 OPENF1_MIN_INTERVAL = 0.8
 OPENF1_MAX_RETRIES = 4
 OPENF1_BACKOFF_BASE = 1.6
+REPLAY_MAX_SPEED = 100.0
 
 SESSION_NAMES = {
     "FP2": "Practice 2",
@@ -21,6 +26,7 @@ SESSION_NAMES = {
 }
 
 DEFAULT_CONTEXT_LAPS = 10
+COMPOUND_ORDER = ("SOFT", "MEDIUM", "HARD")
 DEFAULT_RISK_LAMBDA = 0.15
 DEFAULT_STRATEGY_COUNT = 5
 
@@ -31,3 +37,64 @@ CACHE_TTL_SECONDS = 24 * 3600
 RANDOM_SEED = 42
 MC_TOP_K = 5
 PACE_CURVE_CACHE_DIR = CACHE_DIR / "pace_curves"
+
+COMPUTE_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+COMPUTE_QUEUE_LIMIT = 16
+COMPUTE_TIMEOUT_SECONDS = 60.0
+
+RESULT_STORE_PATH = CACHE_DIR / "strategy_results.sqlite"
+# Sampling profiler hook: tasks slower than this (ms) leave collapsed stacks in
+# PROFILE_DIR; 0 keeps the sampler off.
+PROFILE_SLOW_REQUEST_MS = float(os.environ.get("RACESCOPE_PROFILE_SLOW_MS", "0"))
+PROFILE_DIR = CACHE_DIR / "profiles"
+ARTIFACT_VERSION_TTL_SECONDS = 10.0
+RESULT_PRELOAD_LIMIT = 5000
+# Pace models and driver profiles resident per worker process; least recently
+# used entries are evicted past the budget. Mapped weights are shared between
+# workers through the page cache.
+MODEL_MEMORY_BUDGET_MB = int(os.environ.get("RACESCOPE_MODEL_BUDGET_MB", "256"))
+MODEL_MMAP_WEIGHTS = os.environ.get("RACESCOPE_MODEL_MMAP", "0") == "1"
+MODEL_PRELOAD_ON_STARTUP = True
+# "per_driver" serves driver_<id>.joblib (global.joblib as fallback);
+# "shared" serves the multi-driver model in SHARED_MODEL_FILE when present.
+PACE_MODEL = os.environ.get("RACESCOPE_PACE_MODEL", "per_driver")
+SHARED_MODEL_FILE = "shared.joblib"
+# Exported variants (TorchScript, int8) are served instead of the eager net when
+# faster and within this mean lap-time delta (seconds) on the export sample.
+# RACESCOPE_MODEL_VARIANT pins one: "auto", "eager", "torchscript" or "int8".
+MODEL_VARIANT = os.environ.get("RACESCOPE_MODEL_VARIANT", "auto")
+MODEL_VARIANT_TOLERANCE_S = float(os.environ.get("RACESCOPE_MODEL_TOLERANCE_S", "0.05"))
+# LSTM training: minibatches of TRAIN_BATCH_SIZE at TRAIN_LR (other batch sizes
+# scale the rate linearly) for at most TRAIN_MAX_EPOCHS. The most recent
+# TRAIN_VAL_FRACTION of sessions is held out: training stops after
+# TRAIN_PATIENCE epochs without a lower validation loss, keeps the best weights
+# and fine-tunes them for TRAIN_FINETUNE_EPOCHS on the held-out sessions.
+# Intra-op threads are capped: small LSTM batches get slower with more
+# (RACESCOPE_TRAIN_THREADS overrides).
+TRAIN_MAX_EPOCHS = 10
+TRAIN_BATCH_SIZE = 256
+TRAIN_LR = 4e-3
+TRAIN_VAL_FRACTION = 0.2
+TRAIN_PATIENCE = 2
+TRAIN_FINETUNE_EPOCHS = 2
+TRAIN_THREADS = int(os.environ.get("RACESCOPE_TRAIN_THREADS", str(min(4, os.cpu_count() or 1))))
+WARM_ON_STARTUP = False
+# Browsers may reuse metadata this long before revalidating with If-None-Match.
+METADATA_CACHE_MAX_AGE_SECONDS = 300
+# Responses at least this large are gzipped for clients that accept it.
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 5
+
+CURVE_STORE_WIDTH = 96
+# Pace curves are inferred on this temperature grid and interpolated at query time.
+PACE_CURVE_TRACK_TEMPS = tuple(range(10, 65, 5))
+PACE_CURVE_AIR_TEMPS = tuple(range(5, 50, 5))
+# /api/strategy/sweep limits: values per axis and total grid points.
+SWEEP_MAX_STEPS = 25
+SWEEP_MAX_POINTS = 4096
+
+# Live mode: gaps only affect a stop made within this many laps.
+LIVE_GAP_HORIZON_LAPS = 3
+LIVE_REJOIN_TRAFFIC_LOSS = 1.5  # seconds when the stop drops the driver behind the car behind
+LIVE_DIRTY_AIR_GAP = 1.0  # seconds to the car ahead below which pace suffers
+LIVE_DIRTY_AIR_LOSS = 0.3  # seconds per lap in dirty air
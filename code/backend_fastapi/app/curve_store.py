@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Hashable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .config import CURVE_STORE_WIDTH, PACE_CURVE_CACHE_DIR
+from .profiling import count
+
+
+class CurveStore:
+    """Store of pace curves in one memory-mapped float32 file.
+
+    Every curve occupies fixed-width rows of the current
+    `curves-<generation>.f32`; the width (at least `width` laps) is recorded
+    per generation and grows when a longer curve arrives; a SQLite index maps a key such as (year,
+    circuit, driver, compound, temperature bucket) to (first row, row count,
+    curve length) and the model version the block was inferred with. Reads
+    return zero-copy views into the map. Writers from any process append under
+    an exclusive file lock, so concurrent workers can share the file.
+
+    `prune` drops blocks of other versions by copying the live ones into the
+    next generation's file; widening copies every row the same way. The rows of a generation never change, so a
+    process still mapping the previous file keeps reading valid data until it
+    next consults the index.
+    """
+
+    def __init__(self, root: Path = PACE_CURVE_CACHE_DIR, width: int = CURVE_STORE_WIDTH):
+        self.root = Path(root)
+        self.width = width
+        self.index_path = self.root / "curves.sqlite"
+        self.lock_path = self.root / "curves.lock"
+        # key -> (generation, row, n_rows, length)
+        self._index: Dict[str, Tuple[int, int, int, int]] = {}
+        self._maps: Dict[int, np.ndarray] = {}
+        self._widths: Dict[int, int] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.index_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS curves ("
+                "key TEXT PRIMARY KEY, row INTEGER NOT NULL, n_rows INTEGER NOT NULL, length INTEGER NOT NULL, "
+                "version TEXT NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._local.conn = conn
+        return conn
+
+    def _data_path(self, generation: int) -> Path:
+        return self.root / f"curves-{generation}.f32"
+
+    @contextlib.contextmanager
+    def _exclusive(self) -> Iterator[sqlite3.Connection]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield self._conn()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _layout(self, conn: sqlite3.Connection) -> Tuple[int, int]:
+        """Current (generation, row width) from the index meta table."""
+        meta = dict(conn.execute("SELECT name, value FROM meta").fetchall())
+        return meta.get("generation", 0), meta.get("width", self.width)
+
+    def _key(self, key: Tuple[Hashable, ...]) -> str:
+        return "|".join(str(part) for part in key)
+
+    def _lookup(self, skey: str) -> Optional[Tuple[int, int, int, int]]:
+        # One statement, so the row and the generation it belongs to are read
+        # from the same snapshot even while another process compacts.
+        found = self._conn().execute(
+            "SELECT COALESCE((SELECT value FROM meta WHERE name = 'generation'), 0), "
+            "COALESCE((SELECT value FROM meta WHERE name = 'width'), ?), row, n_rows, length "
+            "FROM curves WHERE key = ?",
+            (self.width, skey),
+        ).fetchone()
+        if found is None:
+            return None
+        generation, width, row, n_rows, length = found
+        with self._lock:
+            self._widths[generation] = width
+            if generation > self._generation:
+                # Compacted or widened elsewhere: cached entries and maps point at old files.
+                self._generation = generation
+                self._index = {k: v for k, v in self._index.items() if v[0] >= generation}
+                self._maps = {g: m for g, m in self._maps.items() if g >= generation}
+        return generation, row, n_rows, length
+
+    def _rows(self, generation: int, row: int, n_rows: int) -> np.ndarray | None:
+        with self._lock:
+            mapped = self._maps.get(generation)
+            if mapped is None or mapped.shape[0] < row + n_rows:
+                width = self._widths.get(generation, self.width)
+                path = self._data_path(generation)
+                size = path.stat().st_size if path.exists() else 0
+                n_total = size // (4 * width)
+                if n_total < row + n_rows:
+                    return None
+                mapped = self._maps[generation] = np.memmap(path, dtype=np.float32, mode="r", shape=(n_total, width))
+            return mapped[row : row + n_rows]
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[np.ndarray]:
+        """(n_rows, length) read-only view of a stored block, or None."""
+        skey = self._key(key)
+        entry = self._index.get(skey)
+        if entry is None:
+            entry = self._lookup(skey)
+            if entry is None:
+                return None
+            self._index[skey] = entry
+        generation, row, n_rows, length = entry
+        block = self._rows(generation, row, n_rows)
+        if block is None:
+            # Its file was compacted away before this process mapped it.
+            self._index.pop(skey, None)
+            return None
+        return block[:, :length]
+
+    def put(self, key: Tuple[Hashable, ...], curves: np.ndarray, version: str = "") -> np.ndarray:
+        """Store a (n_rows, length) block and return it as stored (float32).
+
+        A block another process stored first under the same key wins; this
+        one is not appended. A curve longer than the rows widens the store.
+        """
+        block = np.atleast_2d(np.asarray(curves, dtype=np.float32))
+        n_rows, length = block.shape
+        skey = self._key(key)
+        with self._exclusive() as conn:
+            if self._lookup(skey) is None:
+                generation, width = self._layout(conn)
+                if length > width:
+                    generation, width = self._widen(conn, length)
+                padded = np.zeros((n_rows, width), dtype=np.float32)
+                padded[:, :length] = block
+                with open(self._data_path(generation), "ab") as f:
+                    row = f.tell() // (4 * width)
+                    f.write(padded.tobytes())
+                with conn:
+                    conn.execute(
+                        "INSERT INTO curves (key, row, n_rows, length, version) VALUES (?, ?, ?, ?, ?)",
+                        (skey, row, n_rows, length, version),
+                    )
+        stored = self.get(key)
+        return block if stored is None else stored
+
+    def _widen(self, conn: sqlite3.Connection, length: int) -> Tuple[int, int]:
+        """Copy every row into the next generation's file at a width that
+        fits `length` laps (rounded up to 16); rows keep their numbers.
+        Called under the exclusive lock; returns the new (generation, width)."""
+        generation, width = self._layout(conn)
+        new_width = -(-length // 16) * 16
+        source = self._data_path(generation)
+        size = source.stat().st_size if source.exists() else 0
+        with open(self._data_path(generation + 1), "wb") as out:
+            if size:
+                rows = np.memmap(source, dtype=np.float32, mode="r", shape=(size // (4 * width), width))
+                for start in range(0, rows.shape[0], 4096):
+                    chunk = rows[start : start + 4096]
+                    wide = np.zeros((chunk.shape[0], new_width), dtype=np.float32)
+                    wide[:, :width] = chunk
+                    out.write(wide.tobytes())
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('generation', ?)", (generation + 1,))
+            conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('width', ?)", (new_width,))
+        source.unlink(missing_ok=True)
+        count("curve_store_widened", 1)
+        return generation + 1, new_width
+
+    def prune(self, version: str) -> int:
+        """Drop blocks stored for any version but `version`, compacting the
+        rest into a new generation file; returns how many blocks were dropped."""
+        with self._exclusive() as conn:
+            # Files of the previous, unversioned layout.
+            for legacy in (self.root / "curves.f32", *self.root.glob("index.sqlite*")):
+                legacy.unlink(missing_ok=True)
+            stale = conn.execute("SELECT COUNT(*) FROM curves WHERE version != ?", (version,)).fetchone()[0]
+            if stale == 0:
+                return 0
+            generation, width = self._layout(conn)
+            live = conn.execute("SELECT key, row, n_rows FROM curves WHERE version = ? ORDER BY row", (version,)).fetchall()
+            source = self._data_path(generation)
+            size = source.stat().st_size if source.exists() else 0
+            moved = []
+            with open(self._data_path(generation + 1), "wb") as out:
+                if live and size:
+                    rows = np.memmap(source, dtype=np.float32, mode="r", shape=(size // (4 * width), width))
+                    next_row = 0
+                    for key, row, n_rows in live:
+                        out.write(rows[row : row + n_rows].tobytes())
+                        moved.append((next_row, key))
+                        next_row += n_rows
+            with conn:
+                conn.execute("DELETE FROM curves WHERE version != ?", (version,))
+                if len(moved) < len(live):
+                    conn.execute("DELETE FROM curves WHERE version = ?", (version,))
+                conn.executemany("UPDATE curves SET row = ? WHERE key = ?", moved)
+                conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('generation', ?)", (generation + 1,))
+            # Processes that mapped it keep their pages until they drop the map.
+            source.unlink(missing_ok=True)
+        return stale
+
+
+def interpolate_grid(
+    grid: np.ndarray,
+    track_axis: np.ndarray,
+    air_axis: np.ndarray,
+    track_temps,
+    air_temps,
+) -> np.ndarray:
+    """Bilinear interpolation of (n_track, n_air, laps) curves.
+
+    `track_temps`/`air_temps` are scalars or equally shaped arrays of query
+    points; returns (n_points, laps). Queries outside the grid are clamped to
+    its edge rather than extrapolated.
+    """
+    track = np.clip(np.atleast_1d(np.asarray(track_temps, dtype=float)), track_axis[0], track_axis[-1])
+    air = np.clip(np.atleast_1d(np.asarray(air_temps, dtype=float)), air_axis[0], air_axis[-1])
+    i = np.clip(np.searchsorted(track_axis, track, side="right") - 1, 0, len(track_axis) - 2)
+    j = np.clip(np.searchsorted(air_axis, air, side="right") - 1, 0, len(air_axis) - 2)
+    wt = ((track - track_axis[i]) / (track_axis[i + 1] - track_axis[i]))[:, None]
+    wa = ((air - air_axis[j]) / (air_axis[j + 1] - air_axis[j]))[:, None]
+    return (
+        (1 - wt) * (1 - wa) * grid[i, j]
+        + wt * (1 - wa) * grid[i + 1, j]
+        + (1 - wt) * wa * grid[i, j + 1]
+        + wt * wa * grid[i + 1, j + 1]
+    )
+
+
+curve_store = CurveStore()
@@ -1,13 +1,20 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass, field
 from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, List, Tuple
 
 import pandas as pd
 
 from .config import FEATURE_DIR
 
+FEATURE_MANIFEST = FEATURE_DIR / "manifest.json"
+
 
 @lru_cache(maxsize=4)
 def load_features() -> pd.DataFrame:
@@ -40,3 +47,99 @@ def seasons_available() -> List[int]:
         except ValueError:
             continue
     return sorted(set(years))
+
+
+def fingerprint_files(paths: Iterable[Path]) -> str:
+    """Cheap content version for a set of artifacts (path, size and mtime)."""
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def feature_version() -> str:
+    paths = list(FEATURE_DIR.glob("year=*/features.parquet"))
+    paths.extend(FEATURE_DIR.glob("metadata/*.parquet"))
+    return fingerprint_files(paths)
+
+
+def write_feature_manifest() -> Dict:
+    """Record the feature store's version and seasons; written by preprocessing."""
+    manifest = {
+        "version": feature_version(),
+        "seasons": seasons_available(),
+        "written_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    FEATURE_MANIFEST.parent.mkdir(parents=True, exist_ok=True)
+    tmp = FEATURE_MANIFEST.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    tmp.replace(FEATURE_MANIFEST)
+    return manifest
+
+
+@dataclass
+class MetadataIndex:
+    """Every season's metadata, JSON-ready, tagged with the feature version."""
+
+    version: str
+    seasons: List[int]
+    by_season: Dict[int, Dict[str, List]] = field(default_factory=dict)
+
+    def season(self, year: int) -> Dict[str, List]:
+        return self.by_season.get(year, {"circuits": [], "drivers": [], "teams": []})
+
+
+def _build_metadata_index(version: str) -> MetadataIndex:
+    seasons = seasons_available()
+    index = MetadataIndex(version=version, seasons=seasons)
+    years = set(seasons)
+    for path in (FEATURE_DIR / "metadata").glob("*_*.parquet"):
+        try:
+            years.add(int(path.stem.rsplit("_", 1)[1]))
+        except ValueError:
+            continue
+    for year in sorted(years):
+        meta = metadata_for_year(year)
+        circuits, drivers, teams = meta["circuits"], meta["drivers"], meta["teams"]
+        index.by_season[year] = {
+            "circuits": circuits["circuit_id"].dropna().unique().tolist() if not circuits.empty else [],
+            "drivers": drivers.astype(object).where(drivers.notna(), None).to_dict(orient="records") if not drivers.empty else [],
+            "teams": teams["team_name"].dropna().unique().tolist() if not teams.empty else [],
+        }
+    return index
+
+
+_metadata_lock = threading.Lock()
+_metadata_state: Tuple[Tuple, MetadataIndex | None] = ((), None)
+
+
+def _manifest_token() -> Tuple:
+    try:
+        stat = FEATURE_MANIFEST.stat()
+    except OSError:
+        # Stores preprocessed before manifests existed: fall back to globbing.
+        return ("fingerprint", feature_version())
+    return ("manifest", stat.st_mtime_ns, stat.st_size)
+
+
+def metadata_index() -> MetadataIndex:
+    """In-memory metadata, rebuilt only when the feature manifest changes."""
+    global _metadata_state
+    token = _manifest_token()
+    cached_token, index = _metadata_state
+    if index is not None and token == cached_token:
+        return index
+    with _metadata_lock:
+        cached_token, index = _metadata_state
+        if index is None or token != cached_token:
+            if token[0] == "manifest":
+                version = json.loads(FEATURE_MANIFEST.read_text(encoding="utf-8")).get("version", "")
+            else:
+                version = token[1]
+            index = _build_metadata_index(version)
+            _metadata_state = (token, index)
+    return index
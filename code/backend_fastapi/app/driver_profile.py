@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Tuple
 
@@ -121,8 +120,8 @@ def train_driver_profiles(df: pd.DataFrame, min_laps: int = 120) -> Dict[int, Pa
     return trained
 
 
-@lru_cache(maxsize=64)
-def load_driver_profile(driver_id: int) -> DriverProfile:
+def read_driver_profile(driver_id: int) -> DriverProfile:
+    """Unpickle a driver's profile; serving reads go through the model registry."""
     profile_path = MODELS_DIR / f"driver_profile_{int(driver_id)}.joblib"
     if profile_path.exists():
         return joblib.load(profile_path)
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any, Callable, Dict
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pinned in requirements; stdlib json is only a safety net
+    orjson = None
+
+# Accept this media type to receive stint curves as base64 little-endian
+# float32 strings instead of JSON number arrays.
+COMPACT_MEDIA_TYPE = "application/vnd.racescope.compact+json"
+CURVE_FIELDS = ("lap_time_data", "tyre_life_data")
+# Duplicate of `tyre_life_data` kept for UI versions that predate it.
+LEGACY_STINT_FIELDS = ("degradation_data",)
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, allow_nan=False, default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with `dumps` (orjson, or stdlib json without it)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def map_stint_curves(payload: Any, fn: Callable[[Dict], Dict]) -> Any:
+    """Copy of `payload` with `fn` applied to every `stint_curves` entry.
+
+    Only containers on the way to stint curves are copied; the input (often a
+    cached response) is never mutated.
+    """
+    if isinstance(payload, dict):
+        return {
+            key: [fn(stint) for stint in value] if key == "stint_curves" else map_stint_curves(value, fn)
+            for key, value in payload.items()
+        }
+    if isinstance(payload, list) and payload and isinstance(payload[0], (dict, list)):
+        return [map_stint_curves(value, fn) for value in payload]
+    return payload
+
+
+def _drop_legacy(stint: Dict) -> Dict:
+    return {key: value for key, value in stint.items() if key not in LEGACY_STINT_FIELDS}
+
+
+def strip_legacy(payload: Any) -> Any:
+    return map_stint_curves(payload, _drop_legacy)
+
+
+def _compact_stint(stint: Dict) -> Dict:
+    compact = _drop_legacy(stint)
+    for key in CURVE_FIELDS:
+        if key in compact:
+            raw = np.asarray(compact[key], dtype="<f4").tobytes()
+            compact[key] = base64.b64encode(raw).decode("ascii")
+    return compact
+
+
+def encode_payload(payload: Dict, accept: str = "", legacy: bool = True) -> FastJSONResponse:
+    """Serialize a strategy-style response, negotiated on the Accept header.
+
+    `legacy=False` drops `degradation_data`; the compact media type drops it
+    too and packs the curves as float32.
+    """
+    if COMPACT_MEDIA_TYPE in accept:
+        return FastJSONResponse(map_stint_curves(payload, _compact_stint), media_type=COMPACT_MEDIA_TYPE)
+    if not legacy:
+        payload = strip_legacy(payload)
+    return FastJSONResponse(payload)
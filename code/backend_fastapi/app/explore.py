@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .config import FEATURE_DIR
+from .data_store import fingerprint_files
+
+# Cube dimensions; rows with driver_id == ALL_DRIVERS roll up every driver.
+CUBE_KEYS = ["year", "circuit_id", "session_type", "compound", "driver_id"]
+ALL_DRIVERS = -1
+STINT_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+PACE_COLUMNS = ["laps", "median_pace", "best_lap", "degradation_slope"]
+STINT_COLUMNS = ["stints"] + [f"stint_p{int(q * 100)}" for q in STINT_QUANTILES]
+
+
+def explore_path(year: int) -> Path:
+    return FEATURE_DIR / f"year={year}" / "explore.parquet"
+
+
+def _aggregate(laps: pd.DataFrame) -> pd.DataFrame:
+    groups = laps.groupby(CUBE_KEYS, observed=True)
+    sums = laps.assign(
+        xy=laps["stint_age"] * laps["lap_time"],
+        xx=laps["stint_age"] ** 2,
+    ).groupby(CUBE_KEYS, observed=True)[["stint_age", "lap_time", "xy", "xx"]].sum()
+    n = groups.size()
+    # Least-squares slope of lap time on tyre age, from grouped sums.
+    denom = n * sums["xx"] - sums["stint_age"] ** 2
+    slope = (n * sums["xy"] - sums["stint_age"] * sums["lap_time"]) / denom.where(denom > 0)
+
+    stint_lengths = laps.groupby(CUBE_KEYS + ["session_key", "stint_driver", "stint_number"], observed=True)["stint_age"].max()
+    stint_groups = stint_lengths.groupby(level=CUBE_KEYS, observed=True)
+    quantiles = stint_groups.quantile(list(STINT_QUANTILES)).unstack()
+    quantiles.columns = STINT_COLUMNS[1:]
+
+    cube = pd.DataFrame({
+        "laps": n,
+        "median_pace": groups["lap_time"].median(),
+        "best_lap": groups["lap_time"].min(),
+        "degradation_slope": slope,
+        "stints": stint_groups.size(),
+    }).join(quantiles)
+    return cube.reset_index()
+
+
+def build_explore_cube(features: pd.DataFrame) -> pd.DataFrame:
+    """Pace, degradation and stint-length aggregates per
+    (year, circuit, session type, compound, driver), plus all-driver rollups.
+    """
+    laps = features.dropna(subset=["lap_time", "stint_age", "compound", "driver_id"]).copy()
+    if laps.empty:
+        return pd.DataFrame(columns=CUBE_KEYS + PACE_COLUMNS + STINT_COLUMNS)
+    laps["compound"] = laps["compound"].astype(str).str.upper()
+    laps["driver_id"] = laps["driver_id"].astype(int)
+    laps["stint_driver"] = laps["driver_id"]
+    laps["stint_number"] = laps["stint_number"].fillna(1)
+
+    cube = pd.concat(
+        [_aggregate(laps), _aggregate(laps.assign(driver_id=ALL_DRIVERS))],
+        ignore_index=True,
+    )
+    cube = cube.astype({"year": "int16", "driver_id": "int16", "laps": "int32", "stints": "int32"})
+    float_cols = [c for c in PACE_COLUMNS + STINT_COLUMNS if c not in ("laps", "stints")]
+    cube[float_cols] = cube[float_cols].astype("float32")
+    for col in ("circuit_id", "session_type", "compound"):
+        cube[col] = cube[col].astype("category")
+    return cube.sort_values(CUBE_KEYS, ignore_index=True)
+
+
+def write_explore_cube(year: int, features: pd.DataFrame) -> Path:
+    path = explore_path(year)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    build_explore_cube(features).to_parquet(path, index=False)
+    return path
+
+
+def build_explore_for_year(year: int) -> Optional[Path]:
+    """Rebuild the cube of an already preprocessed season."""
+    features_path = FEATURE_DIR / f"year={year}" / "features.parquet"
+    if not features_path.exists():
+        return None
+    return write_explore_cube(year, pd.read_parquet(features_path))
+
+
+@lru_cache(maxsize=2)
+def _load_cube(version: str) -> pd.DataFrame:
+    frames = [pd.read_parquet(path) for path in sorted(FEATURE_DIR.glob("year=*/explore.parquet"))]
+    if not frames:
+        return pd.DataFrame(columns=CUBE_KEYS + PACE_COLUMNS + STINT_COLUMNS)
+    cube = pd.concat(frames, ignore_index=True)
+    for col in ("circuit_id", "session_type", "compound"):
+        cube[col] = cube[col].astype(str)
+    # Stored as float32; widen once so rounded values serialize cleanly.
+    float_cols = cube.select_dtypes("float32").columns
+    cube[float_cols] = cube[float_cols].astype("float64")
+    return cube
+
+
+def load_explore_cube() -> pd.DataFrame:
+    """All seasons' cubes, reloaded only when an explore file changes."""
+    return _load_cube(fingerprint_files(FEATURE_DIR.glob("year=*/explore.parquet")))
+
+
+def explore_rows(
+    columns: Sequence[str],
+    season: Optional[int] = None,
+    circuit_id: Optional[str] = None,
+    compound: Optional[str] = None,
+    session_type: Optional[str] = None,
+    driver_id: Optional[int] = ALL_DRIVERS,
+    drivers_only: bool = False,
+) -> List[Dict]:
+    cube = load_explore_cube()
+    mask = np.ones(len(cube), dtype=bool)
+    if season is not None:
+        mask &= cube["year"].to_numpy() == season
+    if circuit_id is not None:
+        mask &= cube["circuit_id"].to_numpy() == circuit_id
+    if compound is not None:
+        mask &= cube["compound"].to_numpy() == compound.upper()
+    if session_type is not None:
+        mask &= cube["session_type"].to_numpy() == session_type.upper()
+    if drivers_only:
+        mask &= cube["driver_id"].to_numpy() != ALL_DRIVERS
+    elif driver_id is not None:
+        mask &= cube["driver_id"].to_numpy() == driver_id
+
+    rows = cube.loc[mask, CUBE_KEYS + list(columns)]
+    rows = rows.round(4).astype(object).where(rows.notna(), None)
+    records = rows.to_dict("records")
+    for record in records:
+        if record["driver_id"] == ALL_DRIVERS:
+            record["driver_id"] = None
+    return records
@@ -1,20 +1,103 @@
 from __future__ import annotations
 
+import asyncio
+import threading
 import time
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Annotated, AsyncIterator, Callable, Dict, List, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 
-from .config import DEFAULT_RISK_LAMBDA, DEFAULT_STRATEGY_COUNT
-from .data_store import load_features, metadata_for_year, seasons_available
-from .strategy_engine import StrategyEngine
-
-app = FastAPI(title="Race Strategy MVP", version="0.2.0")
+from .config import (
+    COMPOUND_ORDER,
+    DEFAULT_RISK_LAMBDA,
+    DEFAULT_STRATEGY_COUNT,
+    GZIP_LEVEL,
+    GZIP_MIN_BYTES,
+    METADATA_CACHE_MAX_AGE_SECONDS,
+    RESULT_PRELOAD_LIMIT,
+    SWEEP_MAX_POINTS,
+    SWEEP_MAX_STEPS,
+    WARM_ON_STARTUP,
+)
+from .compute import (
+    ComputeOverloaded,
+    InvalidRequestError,
+    NoFeaturesError,
+    analytical_task,
+    batch_task,
+    compare_task,
+    executor,
+    live_task,
+    pareto_task,
+    refine_task,
+    strategy_task,
+    sweep_task,
+)
+from .curve_store import curve_store
+from .data_store import MetadataIndex, metadata_index
+from .encoding import FastJSONResponse, dumps, encode_payload, strip_legacy
+from .explore import ALL_DRIVERS, PACE_COLUMNS, STINT_COLUMNS, explore_rows
+from .profiling import metrics
+from .result_store import model_version, request_key, result_store
+from .rewatch import lap_payload, load_timeline, timeline_path, timeline_payload
+
+
+# Startup warm-up progress for /api/ready: stage name -> seconds it took.
+_readiness: Dict = {"ready": False, "stages": {}, "error": None}
+
+
+async def _warm_season_stage() -> None:
+    seasons = _get_seasons()
+    if seasons:
+        await _warm_season(seasons[-1])
+
+
+async def _warm_up() -> None:
+    """Metadata index, compute workers (engines and preloaded models), the
+    result cache and, with WARM_ON_STARTUP, the latest season's strategies,
+    in the background so the API accepts connections at once. Readiness flips
+    only after the last stage.
+    """
+    stages = [
+        ("metadata", lambda: asyncio.to_thread(metadata_index)),
+        ("workers", lambda: asyncio.to_thread(executor.start)),
+        ("results", lambda: asyncio.to_thread(_preload_results)),
+    ]
+    if WARM_ON_STARTUP:
+        stages.append(("warming", _warm_season_stage))
+    try:
+        for name, step in stages:
+            t0 = time.perf_counter()
+            await step()
+            _readiness["stages"][name] = round(time.perf_counter() - t0, 3)
+    except Exception as exc:
+        _readiness["error"] = f"{type(exc).__name__}: {exc}"
+        raise
+    _readiness["ready"] = True
+
+
+@asynccontextmanager
+async def _lifespan(_: FastAPI) -> AsyncIterator[None]:
+    warm_task = asyncio.create_task(_warm_up())
+    try:
+        yield
+    finally:
+        warm_task.cancel()
+        executor.shutdown()
+        result_store.flush()
+
+
+app = FastAPI(title="Race Strategy MVP", version="0.2.0", lifespan=_lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_BYTES, compresslevel=GZIP_LEVEL)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -37,14 +120,119 @@ def _cache_get(key: str) -> Optional[Dict]:
     item = _cache.get(key)
     if not item:
         return None
-    if time.time() - item["ts"] > 3600:
+    if time.time() - item["ts"] > 3600 or item["version"] != result_store.version():
         _cache.pop(key, None)
         return None
     return item["value"]
 
 
 def _cache_set(key: str, value: Dict) -> None:
-    _cache[key] = {"ts": time.time(), "value": value}
+    _cache[key] = {"ts": time.time(), "version": result_store.version(), "value": value}
+
+
+async def _cache_lookup(key: str) -> Optional[Dict]:
+    """`_cache`, then the durable result store off the event loop; store hits
+    are promoted to `_cache`."""
+    cached = _cache_get(key)
+    if cached is None:
+        cached = await asyncio.to_thread(result_store.get, key)
+        if cached is not None:
+            _cache_set(key, cached)
+    return cached
+
+
+# In-flight computations keyed like `_cache`, so identical concurrent requests
+# wait on a single worker task instead of each submitting their own.
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.RLock()
+
+
+def _request_key(kind: str, req: BaseModel) -> str:
+    return request_key(kind, req.model_dump())
+
+
+def _task_kind(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
+# Latest model-registry report per worker pid, for /api/models.
+_worker_registries: Dict[int, Dict] = {}
+
+
+def _record_profile(kind: str, result: Dict) -> None:
+    # Worker stage timings feed /api/metrics and never reach caches or clients.
+    profile = result.pop("_profile", None)
+    if profile is not None:
+        metrics.record_profile(kind, profile)
+    registry = result.pop("_registry", None)
+    if registry is not None:
+        _worker_registries[registry["pid"]] = registry
+
+
+def _single_flight(
+    key: str, submit: Callable[[], Future], cache: bool = True, on_computed: Optional[Callable[[Dict], None]] = None
+) -> Future:
+    kind = _task_kind(key)
+    with _inflight_lock:
+        cached = _cache_get(key) if cache else None
+        if cached:
+            metrics.inc("racescope_response_cache_total", task=kind, result="hit")
+            future: Future = Future()
+            future.set_result(cached)
+            return future
+        future = _inflight.get(key)
+        if future is None:
+            metrics.inc("racescope_response_cache_total", task=kind, result="computed")
+            future = submit()
+            _inflight[key] = future
+            future.add_done_callback(lambda done: _settle_inflight(key, done, cache, on_computed))
+        else:
+            metrics.inc("racescope_response_cache_total", task=kind, result="coalesced")
+    return future
+
+
+def _settle_inflight(
+    key: str, future: Future, cache: bool = True, on_computed: Optional[Callable[[Dict], None]] = None
+) -> None:
+    # Registered right after submit, so this runs before any awaiter sees the result.
+    # It runs on the pool's result thread: durable writes go to the store's writer.
+    if not future.cancelled() and future.exception() is None:
+        _record_profile(_task_kind(key), future.result())
+    with _inflight_lock:
+        _inflight.pop(key, None)
+        if cache and not future.cancelled() and future.exception() is None:
+            _cache_set(key, future.result())
+            result_store.put_later(key, future.result())
+    if on_computed is not None and not future.cancelled() and future.exception() is None:
+        on_computed(future.result())
+
+
+async def _run_compute(
+    key: str,
+    task: Callable[[Dict], Dict],
+    params: Dict,
+    cache: bool = True,
+    on_computed: Optional[Callable[[Dict], None]] = None,
+) -> Dict:
+    """Cached, coalesced `task(params)` on the compute pool; `on_computed` runs
+    with the result only when this call actually computed it."""
+    t0 = time.perf_counter()
+    try:
+        if cache:
+            # Promotes durable store hits to the cache _single_flight checks.
+            await _cache_lookup(key)
+        future = _single_flight(key, lambda: executor.submit(task, params), cache, on_computed)
+        result = await executor.wait(future)
+        metrics.observe("racescope_request_seconds", time.perf_counter() - t0, task=_task_kind(key))
+        return result
+    except ComputeOverloaded:
+        raise HTTPException(status_code=503, detail="Strategy workers are busy, retry shortly.", headers={"Retry-After": "2"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Strategy computation timed out.")
+    except NoFeaturesError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except InvalidRequestError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
 
 
 class StrategyRequest(BaseModel):
@@ -56,6 +244,30 @@ class StrategyRequest(BaseModel):
     debug_profile: bool = False
 
 
+class ParetoRequest(BaseModel):
+    year: int
+    circuit_id: str
+    driver_id: int
+    debug_profile: bool = False
+
+
+_COMPOUND_PATTERN = f"(?i)^({'|'.join(COMPOUND_ORDER)})$"
+
+
+class LiveStrategyRequest(BaseModel):
+    year: int
+    circuit_id: str
+    driver_id: int
+    current_lap: int = Field(..., ge=0, description="Last completed lap")
+    compound: str = Field(..., pattern=_COMPOUND_PATTERN)
+    tyre_age: int = Field(0, ge=0, description="Laps completed on the current set")
+    used_compounds: List[Annotated[str, Field(pattern=_COMPOUND_PATTERN)]] = Field(default_factory=list)
+    gap_ahead: Optional[float] = Field(None, ge=0)
+    gap_behind: Optional[float] = Field(None, ge=0)
+    risk_bias: float = DEFAULT_RISK_LAMBDA
+    n_strategies: int = DEFAULT_STRATEGY_COUNT
+
+
 class CompareRequest(BaseModel):
     year: int
     circuit_id: str
@@ -66,160 +278,409 @@ class CompareRequest(BaseModel):
     debug_profile: bool = False
 
 
+class BatchDriverRequest(BaseModel):
+    driver_id: int
+    risk_bias: float = DEFAULT_RISK_LAMBDA
+    n_strategies: int = DEFAULT_STRATEGY_COUNT
+
+
+class BatchStrategyRequest(BaseModel):
+    year: int
+    circuit_id: str
+    drivers: List[BatchDriverRequest] = Field(..., min_length=1, max_length=40)
+    debug_profile: bool = False
+
+
+class SweepAxis(BaseModel):
+    start: float
+    stop: float
+    steps: int = Field(1, ge=1, le=SWEEP_MAX_STEPS)
+
+    def values(self) -> List[float]:
+        if self.steps == 1:
+            return [self.start]
+        step = (self.stop - self.start) / (self.steps - 1)
+        return [self.start + i * step for i in range(self.steps)]
+
+
+class ProbabilityAxis(SweepAxis):
+    start: float = Field(..., ge=0.0, le=1.0)
+    stop: float = Field(..., ge=0.0, le=1.0)
+
+
+class SweepRequest(BaseModel):
+    year: int
+    circuit_id: str
+    driver_id: int
+    pit_loss: Optional[SweepAxis] = None
+    sc_probability: Optional[ProbabilityAxis] = None
+    track_temp: Optional[SweepAxis] = None
+    air_temp: Optional[SweepAxis] = None
+    risk_bias: Optional[SweepAxis] = None
+
+
+_SWEEP_AXES = ("pit_loss", "sc_probability", "track_temp", "air_temp", "risk_bias")
+
+
 # Shared handlers
 
 def _get_seasons() -> List[int]:
-    return seasons_available()
+    return metadata_index().seasons
 
 
 def _get_circuits(season: int) -> List[str]:
-    meta = metadata_for_year(season)
-    circuits = meta["circuits"]
-    return circuits["circuit_id"].dropna().unique().tolist() if not circuits.empty else []
+    return metadata_index().season(season)["circuits"]
 
 
 def _get_drivers(season: int) -> List[Dict]:
-    meta = metadata_for_year(season)
-    drivers = meta["drivers"]
-    return drivers.to_dict(orient="records") if not drivers.empty else []
-
-
-def _get_teams(season: int) -> List[str]:
-    meta = metadata_for_year(season)
-    teams = meta["teams"]
-    return teams["team_name"].dropna().unique().tolist() if not teams.empty else []
-
-
-def _post_strategy(req: StrategyRequest) -> Dict:
-    cache_key = f"strategy:{req.year}:{req.circuit_id}:{req.driver_id}:{req.risk_bias}:{req.n_strategies}"
-    cached = _cache_get(cache_key)
-    if cached:
-        return cached
-
-    df = load_features()
-    if df.empty:
-        raise HTTPException(status_code=400, detail="No features available. Run ingestion + preprocessing.")
-
-    engine = StrategyEngine(df)
-    payload = engine.generate_strategies(
-        year=req.year,
-        circuit_id=req.circuit_id,
-        driver_id=req.driver_id,
-        risk_bias=req.risk_bias,
-        n_strategies=req.n_strategies,
-        debug_profile=req.debug_profile,
+    return metadata_index().season(season)["drivers"]
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    tags = {tag.strip() for tag in header.split(",")}
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def _metadata_response(request: Request, scope: str, read: Callable[[MetadataIndex], object]) -> Response:
+    """Metadata as JSON tagged with the feature version; 304 when unchanged."""
+    index = metadata_index()
+    etag = f'"{index.version}-{scope}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={METADATA_CACHE_MAX_AGE_SECONDS}"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(read(index), headers=headers)
+
+
+async def _post_strategy(req: StrategyRequest) -> Dict:
+    return await _run_compute(_request_key("strategy", req), strategy_task, req.model_dump())
+
+
+async def _post_strategy_pareto(req: ParetoRequest) -> Dict:
+    # No risk_bias in the key: one cached front serves every risk level.
+    return await _run_compute(_request_key("pareto", req), pareto_task, req.model_dump())
+
+
+async def _post_live_strategy(req: LiveStrategyRequest) -> Dict:
+    # Every lap is a new state: coalesce duplicates but do not cache them.
+    return await _run_compute(_request_key("live", req), live_task, req.model_dump(), cache=False)
+
+
+def _stream_event(event: str, data: Dict, sse: bool) -> str:
+    if sse:
+        return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+    return dumps({"event": event, "data": data}).decode() + "\n"
+
+
+async def _stream_strategy(req: StrategyRequest, sse: bool, legacy: bool = True) -> StreamingResponse:
+    """Progressive /strategy: the analytical ranking first, then one `refined`
+    event per MC-refined top-K candidate as it completes, then the `final`
+    response (identical to /strategy, and cached as such).
+    """
+    key = _request_key("strategy", req)
+    params = req.model_dump()
+    cached = await _cache_lookup(key)
+    analytical = None
+    if not cached:
+        analytical = await _run_compute(_request_key("strategy-analytical", req), analytical_task, params)
+
+    async def events() -> AsyncIterator[str]:
+        if cached:
+            yield _stream_event("final", cached if legacy else strip_legacy(cached), sse)
+            return
+
+        partial = {k: v for k, v in analytical.items() if k != "refining"}
+        yield _stream_event("analytical", partial if legacy else strip_legacy(partial), sse)
+        refined: Dict[int, tuple] = {}
+        pending: List[asyncio.Future] = []
+        try:
+            for target in analytical["refining"]:
+                pending.append(
+                    asyncio.wrap_future(executor.submit(refine_task, {**params, **target, "risk_bias": req.risk_bias}))
+                )
+            for next_done in asyncio.as_completed(pending, timeout=executor.timeout):
+                update = await next_done
+                _record_profile("refine", update)
+                refined[update["candidate_index"]] = (update["expected_time"], update["variance"])
+                yield _stream_event("refined", update, sse)
+            final = await _run_compute(key, strategy_task, {**params, "refined": refined})
+        except (ComputeOverloaded, BrokenProcessPool):
+            # A refinement lost to a dead worker: the executor has already
+            # replaced the pool, so a retry succeeds.
+            yield _stream_event("error", {"status_code": 503, "detail": "Strategy workers are busy, retry shortly."}, sse)
+            return
+        except asyncio.TimeoutError:
+            yield _stream_event("error", {"status_code": 504, "detail": "Strategy refinement timed out."}, sse)
+            return
+        except HTTPException as exc:
+            yield _stream_event("error", {"status_code": exc.status_code, "detail": exc.detail}, sse)
+            return
+        finally:
+            # After a timeout, an error or a client disconnect, refinements
+            # still queued would hold pool slots for nobody; cancelling the
+            # asyncio wrapper cancels the pool future (running ones finish).
+            for future in pending:
+                future.cancel()
+        yield _stream_event("final", final if legacy else strip_legacy(final), sse)
+
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    # "identity" keeps GZipMiddleware from buffering events until the stream ends.
+    headers = {"Cache-Control": "no-cache", "Content-Encoding": "identity"}
+    return StreamingResponse(events(), media_type=media_type, headers=headers)
+
+
+async def _post_compare(req: CompareRequest) -> Dict:
+    return await _run_compute(_request_key("compare", req), compare_task, req.model_dump())
+
+
+def _batch_row_keys(req: BatchStrategyRequest) -> List[str]:
+    return [
+        _request_key(
+            "strategy",
+            StrategyRequest(
+                year=req.year,
+                circuit_id=req.circuit_id,
+                driver_id=row.driver_id,
+                risk_bias=row.risk_bias,
+                n_strategies=row.n_strategies,
+                debug_profile=req.debug_profile,
+            ),
+        )
+        for row in req.drivers
+    ]
+
+
+def _seed_batch_rows(req: BatchStrategyRequest, response: Dict) -> None:
+    # Every row is a regular /strategy response; seed those keys too so the
+    # per-driver endpoint is served from cache afterwards.
+    for key, result in zip(_batch_row_keys(req), response["results"]):
+        _cache_set(key, result)
+        result_store.put_later(key, result)
+
+
+async def _post_strategy_batch(req: BatchStrategyRequest) -> Dict:
+    # Rows are seeded only when the batch is computed: a cached batch had its
+    # rows seeded (and persisted) the first time round.
+    return await _run_compute(
+        _request_key("batch", req),
+        batch_task,
+        req.model_dump(),
+        on_computed=lambda response: _seed_batch_rows(req, response),
     )
 
-    response = {
+
+async def _post_strategy_sweep(req: SweepRequest) -> Dict:
+    axes = {name: getattr(req, name) for name in _SWEEP_AXES}
+    n_points = 1
+    for axis in axes.values():
+        n_points *= axis.steps if axis else 1
+    if n_points > SWEEP_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"Sweep grid has {n_points} points (max {SWEEP_MAX_POINTS}).")
+    params = {
         "year": req.year,
         "circuit_id": req.circuit_id,
         "driver_id": req.driver_id,
-        **payload,
+        **{name: axis.values() if axis else None for name, axis in axes.items()},
     }
-    _cache_set(cache_key, response)
-    return response
-
-
-def _post_compare(req: CompareRequest) -> Dict:
-    cache_key = f"compare:{req.year}:{req.circuit_id}:{req.driver_id}:{req.teammate_id}:{req.risk_bias}:{req.n_strategies}"
-    cached = _cache_get(cache_key)
-    if cached:
-        return cached
-
-    df = load_features()
-    if df.empty:
-        raise HTTPException(status_code=400, detail="No features available. Run ingestion + preprocessing.")
-
-    engine = StrategyEngine(df)
-    driver_payload = engine.generate_strategies(
-        year=req.year,
-        circuit_id=req.circuit_id,
-        driver_id=req.driver_id,
-        risk_bias=req.risk_bias,
-        n_strategies=req.n_strategies,
-        opponent_id=req.teammate_id,
-        debug_profile=req.debug_profile,
-    )
-    teammate_payload = engine.generate_strategies(
-        year=req.year,
-        circuit_id=req.circuit_id,
-        driver_id=req.teammate_id,
-        risk_bias=req.risk_bias,
-        n_strategies=req.n_strategies,
-        opponent_id=req.driver_id,
-        debug_profile=req.debug_profile,
-    )
+    return await _run_compute(_request_key("sweep", req), sweep_task, params)
 
-    response = {
-        "year": req.year,
-        "circuit_id": req.circuit_id,
-        "driver": {"driver_id": req.driver_id, **driver_payload},
-        "teammate": {"driver_id": req.teammate_id, **teammate_payload},
-    }
-    _cache_set(cache_key, response)
-    return response
+
+def _preload_results() -> None:
+    result_store.prune()
+    curve_store.prune(model_version())
+    for key, value in result_store.items(limit=RESULT_PRELOAD_LIMIT):
+        _cache_set(key, value)
+
+
+async def _warm_season(season: int) -> None:
+    """Default-parameter strategies for every circuit/driver of a season."""
+    drivers = [BatchDriverRequest(driver_id=d["driver_id"]) for d in _get_drivers(season)]
+    if not drivers:
+        return
+    for circuit_id in _get_circuits(season):
+        req = BatchStrategyRequest(year=season, circuit_id=circuit_id, drivers=drivers)
+        try:
+            await _post_strategy_batch(req)
+        except HTTPException:
+            continue
 
 
 # Legacy routes (temporary compatibility)
-@app.get("/metadata/seasons")
-def get_seasons_legacy() -> List[int]:
-    return _get_seasons()
+@app.get("/metadata/seasons", response_model=List[int])
+def get_seasons_legacy(request: Request) -> Response:
+    return _metadata_response(request, "seasons", lambda index: index.seasons)
 
 
-@app.get("/metadata/circuits")
-def get_circuits_legacy(season: int) -> List[str]:
-    return _get_circuits(season)
+@app.get("/metadata/circuits", response_model=List[str])
+def get_circuits_legacy(season: int, request: Request) -> Response:
+    return _metadata_response(request, f"{season}-circuits", lambda index: index.season(season)["circuits"])
 
 
-@app.get("/metadata/drivers")
-def get_drivers_legacy(season: int) -> List[Dict]:
-    return _get_drivers(season)
+@app.get("/metadata/drivers", response_model=List[Dict])
+def get_drivers_legacy(season: int, request: Request) -> Response:
+    return _metadata_response(request, f"{season}-drivers", lambda index: index.season(season)["drivers"])
 
 
-@app.get("/metadata/teams")
-def get_teams_legacy(season: int) -> List[str]:
-    return _get_teams(season)
+@app.get("/metadata/teams", response_model=List[str])
+def get_teams_legacy(season: int, request: Request) -> Response:
+    return _metadata_response(request, f"{season}-teams", lambda index: index.season(season)["teams"])
 
 
 @app.post("/strategy")
-def post_strategy_legacy(req: StrategyRequest) -> Dict:
-    return _post_strategy(req)
+async def post_strategy_legacy(req: StrategyRequest, request: Request, legacy: bool = True) -> Response:
+    return encode_payload(await _post_strategy(req), request.headers.get("accept", ""), legacy)
 
 
 @app.post("/compare")
-def post_compare_legacy(req: CompareRequest) -> Dict:
-    return _post_compare(req)
+async def post_compare_legacy(req: CompareRequest, request: Request, legacy: bool = True) -> Response:
+    return encode_payload(await _post_compare(req), request.headers.get("accept", ""), legacy)
 
 
 # Stable /api routes
-@app.get("/api/metadata/seasons")
-def get_seasons() -> List[int]:
-    return _get_seasons()
+@app.get("/api/metadata/seasons", response_model=List[int])
+def get_seasons(request: Request) -> Response:
+    return _metadata_response(request, "seasons", lambda index: index.seasons)
+
+
+@app.get("/api/metadata/circuits", response_model=List[str])
+def get_circuits(season: int, request: Request) -> Response:
+    return _metadata_response(request, f"{season}-circuits", lambda index: index.season(season)["circuits"])
 
 
-@app.get("/api/metadata/circuits")
-def get_circuits(season: int) -> List[str]:
-    return _get_circuits(season)
+@app.get("/api/metadata/drivers", response_model=List[Dict])
+def get_drivers(season: int, request: Request) -> Response:
+    return _metadata_response(request, f"{season}-drivers", lambda index: index.season(season)["drivers"])
 
 
-@app.get("/api/metadata/drivers")
-def get_drivers(season: int) -> List[Dict]:
-    return _get_drivers(season)
+@app.get("/api/metadata/teams", response_model=List[str])
+def get_teams(season: int, request: Request) -> Response:
+    return _metadata_response(request, f"{season}-teams", lambda index: index.season(season)["teams"])
 
 
-@app.get("/api/metadata/teams")
-def get_teams(season: int) -> List[str]:
-    return _get_teams(season)
+# Declared after the fixed metadata paths so they are not read as a season.
+@app.get("/api/metadata/{season}")
+def get_metadata_bundle(season: int, request: Request) -> Response:
+    if season not in metadata_index().by_season:
+        raise HTTPException(status_code=404, detail=f"No metadata for season {season}.")
+    return _metadata_response(request, str(season), lambda index: {"season": season, **index.season(season)})
 
 
 @app.post("/api/strategy")
-def post_strategy(req: StrategyRequest) -> Dict:
-    return _post_strategy(req)
+async def post_strategy(req: StrategyRequest, request: Request, legacy: bool = True) -> Response:
+    return encode_payload(await _post_strategy(req), request.headers.get("accept", ""), legacy)
 
 
 @app.post("/api/compare")
-def post_compare(req: CompareRequest) -> Dict:
-    return _post_compare(req)
+async def post_compare(req: CompareRequest, request: Request, legacy: bool = True) -> Response:
+    return encode_payload(await _post_compare(req), request.headers.get("accept", ""), legacy)
+
+
+@app.post("/api/strategy/stream")
+async def post_strategy_stream(req: StrategyRequest, request: Request, legacy: bool = True) -> StreamingResponse:
+    return await _stream_strategy(req, sse="text/event-stream" in request.headers.get("accept", ""), legacy=legacy)
+
+
+@app.post("/api/strategy/batch")
+async def post_strategy_batch(req: BatchStrategyRequest, request: Request, legacy: bool = True) -> Response:
+    return encode_payload(await _post_strategy_batch(req), request.headers.get("accept", ""), legacy)
+
+
+@app.post("/api/live/strategy")
+async def post_live_strategy(req: LiveStrategyRequest, request: Request, legacy: bool = True) -> Response:
+    return encode_payload(await _post_live_strategy(req), request.headers.get("accept", ""), legacy)
+
+
+@app.post("/api/strategy/pareto")
+async def post_strategy_pareto(req: ParetoRequest, request: Request, legacy: bool = True) -> Response:
+    return encode_payload(await _post_strategy_pareto(req), request.headers.get("accept", ""), legacy)
+
+
+@app.post("/api/strategy/sweep")
+async def post_strategy_sweep(req: SweepRequest) -> Response:
+    return FastJSONResponse(await _post_strategy_sweep(req))
+
+
+@app.get("/api/metrics", include_in_schema=False)
+def get_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/ready")
+def get_ready() -> Response:
+    """200 once warm-up has finished, 503 (with the stages done so far) before.
+    `worker_restarts` counts compute pools replaced after a worker died."""
+    payload = {**_readiness, "worker_restarts": executor.restarts}
+    return FastJSONResponse(payload, status_code=200 if _readiness["ready"] else 503)
+
+
+@app.get("/api/models")
+def get_models() -> Dict:
+    """Resident models per worker, as of each worker's latest computation."""
+    return {"workers": [_worker_registries[pid] for pid in sorted(_worker_registries)]}
+
+
+def _rewatch_timeline(season: int, circuit_id: str) -> Dict:
+    timeline = load_timeline(season, circuit_id, result_store.version())
+    if timeline is None:
+        if timeline_path(season, circuit_id).exists():
+            detail = "Rewatch timeline is stale (features or models changed). Run scripts.build_rewatch."
+        else:
+            detail = "Rewatch timeline not built. Run scripts.build_rewatch."
+        raise HTTPException(status_code=404, detail=detail)
+    return timeline
+
+
+@app.get("/api/rewatch/{season}/{circuit_id}")
+def get_rewatch_timeline(season: int, circuit_id: str) -> Dict:
+    timeline = _rewatch_timeline(season, circuit_id)
+    return {"year": season, "circuit_id": circuit_id, **timeline_payload(timeline)}
+
+
+@app.get("/api/rewatch/{season}/{circuit_id}/laps/{lap}")
+def get_rewatch_lap(season: int, circuit_id: str, lap: int) -> Dict:
+    timeline = _rewatch_timeline(season, circuit_id)
+    if not 0 <= lap < timeline["plan"].shape[0]:
+        raise HTTPException(status_code=404, detail=f"Lap {lap} outside the race.")
+    return {"year": season, "circuit_id": circuit_id, **lap_payload(timeline, lap)}
+
+
+@app.get("/api/explore/degradation")
+def get_explore_degradation(
+    season: int,
+    circuit_id: Optional[str] = None,
+    compound: Optional[str] = None,
+    session_type: str = "RACE",
+    driver_id: Optional[int] = None,
+) -> List[Dict]:
+    # Without driver_id, the all-driver rollup rows (driver_id null).
+    return explore_rows(
+        PACE_COLUMNS, season, circuit_id, compound, session_type, ALL_DRIVERS if driver_id is None else driver_id
+    )
+
+
+@app.get("/api/explore/stints")
+def get_explore_stints(
+    season: int,
+    circuit_id: Optional[str] = None,
+    compound: Optional[str] = None,
+    session_type: str = "RACE",
+    driver_id: Optional[int] = None,
+) -> List[Dict]:
+    return explore_rows(
+        STINT_COLUMNS, season, circuit_id, compound, session_type, ALL_DRIVERS if driver_id is None else driver_id
+    )
+
+
+@app.get("/api/explore/drivers")
+def get_explore_drivers(
+    season: int,
+    circuit_id: str,
+    compound: Optional[str] = None,
+    session_type: str = "RACE",
+) -> List[Dict]:
+    rows = explore_rows(PACE_COLUMNS, season, circuit_id, compound, session_type, drivers_only=True)
+    return sorted(rows, key=lambda row: (row["compound"], row["median_pace"] is None, row["median_pace"] or 0.0))
 
 
 # Serve frontend build from same origin when available
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import joblib
+import torch
+
+from .config import MODEL_MEMORY_BUDGET_MB, MODEL_MMAP_WEIGHTS, MODELS_DIR, PACE_MODEL, SHARED_MODEL_FILE
+from .driver_profile import DriverProfile, read_driver_profile
+from .model_variants import select_variant
+from .models_lstm import LSTMPaceModel, ModelBundle, compact_state
+from .profiling import cache_event
+
+WEIGHTS_DIR = MODELS_DIR / "weights"
+# Rough resident cost of a DriverProfile (a few dozen ProfileParams).
+_PROFILE_BYTES = 16 * 1024
+
+
+def model_path(driver_id: int) -> Path:
+    if PACE_MODEL == "shared":
+        shared = MODELS_DIR / SHARED_MODEL_FILE
+        if shared.exists():
+            return shared
+    path = MODELS_DIR / f"driver_{driver_id}.joblib"
+    if not path.exists():
+        path = MODELS_DIR / "global.joblib"
+    return path
+
+
+def _mapped_state(path: Path, state: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+    """float32 weights memory-mapped from a `.pt` sidecar of `path`.
+
+    The sidecar is (re)written when older than the joblib file; mapped pages
+    come from the page cache, so every worker process shares one copy.
+    """
+    sidecar = WEIGHTS_DIR / f"{path.stem}.pt"
+    if not sidecar.exists() or sidecar.stat().st_mtime_ns < path.stat().st_mtime_ns:
+        WEIGHTS_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = sidecar.with_suffix(f".{os.getpid()}.tmp")
+        torch.save(state, tmp)
+        tmp.replace(sidecar)
+    return torch.load(sidecar, mmap=True, weights_only=True)
+
+
+def load_eager_model(path: Path) -> Tuple[LSTMPaceModel, int, int]:
+    """The float32 model in a joblib file, its input dim and weight bytes."""
+    payload = joblib.load(path)
+    bundle: ModelBundle = payload["bundle"]
+    input_dim = payload["input_dim"]
+    state = compact_state(bundle.model_state)
+    if MODEL_MMAP_WEIGHTS:
+        state = _mapped_state(path, state)
+    model = LSTMPaceModel(context_len=payload["context_len"])
+    model.load(ModelBundle(state, bundle.encoders, bundle.stats), input_dim)
+    return model, input_dim, sum(t.numel() * t.element_size() for t in state.values())
+
+
+def _load_pace_model(path: Path) -> Tuple[Tuple[LSTMPaceModel, int], int]:
+    model, input_dim, size = load_eager_model(path)
+    variant = select_variant(path)
+    if variant is not None:
+        # Encoders and stats still come from the joblib; only the net changes.
+        model.variant, variant_path = variant
+        model.model = torch.jit.load(str(variant_path))
+        size = variant_path.stat().st_size
+    return (model, input_dim), size
+
+
+@dataclass
+class _Entry:
+    value: object
+    size: int
+    loaded_at: float
+    hits: int = 0
+
+
+class ModelRegistry:
+    """Pace models and driver profiles resident in this process.
+
+    Entries are kept in LRU order; loading one past `budget_bytes` evicts the
+    least recently used until it fits (the newest entry always stays, even if
+    it alone exceeds the budget).
+    """
+
+    def __init__(self, budget_bytes: int = MODEL_MEMORY_BUDGET_MB * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._resident_bytes = 0
+        self.evictions = 0
+        self.misses = 0
+
+    def _get(self, kind: str, name: str, loader: Callable[[], Tuple[object, int]]) -> object:
+        key = (kind, name)
+        with self._lock:
+            entry = self._entries.get(key)
+            cache_event(kind, entry is not None)
+            if entry is not None:
+                entry.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            # Loaded under the lock: concurrent misses (compare's thread pool)
+            # must not unpickle the same model twice.
+            self.misses += 1
+            value, size = loader()
+            self._entries[key] = _Entry(value, size, time.time())
+            self._resident_bytes += size
+            self._evict()
+            return value
+
+    def _evict(self) -> None:
+        while self._resident_bytes > self.budget_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self._resident_bytes -= entry.size
+            self.evictions += 1
+
+    def model(self, driver_id: int) -> Tuple[LSTMPaceModel, int]:
+        """The driver's pace model, or the global one when it has none."""
+        return self.model_at(model_path(driver_id))
+
+    def model_at(self, path: Path) -> Tuple[LSTMPaceModel, int]:
+        path = Path(path)
+        return self._get("model", path.name, lambda: _load_pace_model(path))
+
+    def profile(self, driver_id: int) -> DriverProfile:
+        return self._get("profile", str(int(driver_id)), lambda: (read_driver_profile(driver_id), _PROFILE_BYTES))
+
+    def preload(self, driver_ids: Iterable[int]) -> int:
+        """Load models and profiles for `driver_ids` while they fit the budget;
+        returns how many drivers were loaded."""
+        loaded = 0
+        for driver_id in dict.fromkeys(int(d) for d in driver_ids):
+            path = model_path(driver_id)
+            if not path.exists():
+                break
+            with self._lock:
+                cost = 0 if ("model", path.name) in self._entries else path.stat().st_size
+                if self._resident_bytes + cost + _PROFILE_BYTES > self.budget_bytes:
+                    break
+            self.model_at(path)
+            self.profile(driver_id)
+            loaded += 1
+        return loaded
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._resident_bytes = 0
+
+    def report(self) -> Dict:
+        with self._lock:
+            entries: List[Dict] = [
+                {
+                    "kind": kind,
+                    "name": name,
+                    "variant": entry.value[0].variant if kind == "model" else None,
+                    "bytes": entry.size,
+                    "hits": entry.hits,
+                    "loaded_at": entry.loaded_at,
+                }
+                for (kind, name), entry in reversed(self._entries.items())
+            ]
+            return {
+                "pid": os.getpid(),
+                "budget_bytes": self.budget_bytes,
+                "resident_bytes": self._resident_bytes,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "mmap_weights": MODEL_MMAP_WEIGHTS,
+                "entries": entries,
+            }
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import copy
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import torch
+from torch import nn
+
+from .config import MODEL_VARIANT, MODEL_VARIANT_TOLERANCE_S, MODELS_DIR
+from .models_lstm import LSTMPaceModel
+
+VARIANTS_DIR = MODELS_DIR / "variants"
+# Serving variants besides the eager float32 net, saved as traced TorchScript:
+# float32, and int8 dynamic quantization of the LSTM and linear layers.
+EXPORTED_VARIANTS = ("torchscript", "int8")
+# Stints sampled from the features to measure accuracy and speed.
+_SAMPLE_STINTS = 64
+_MIN_STINT_LAPS = 12
+_TIMING_REPEATS = 5
+# Timing batches are the sample repeated up to a pace-curve-grid sized batch.
+_TIMING_WINDOWS = 8192
+
+
+def _quantized(net: nn.Module) -> nn.Module:
+    return torch.ao.quantization.quantize_dynamic(copy.deepcopy(net), {nn.LSTM, nn.Linear}, dtype=torch.qint8)
+
+
+def _traced(net: nn.Module, model: LSTMPaceModel, input_dim: int) -> torch.jit.ScriptModule:
+    x = torch.zeros(4, model.context_len, input_dim)
+    drivers = torch.zeros(4, dtype=torch.int64)
+    with torch.no_grad():
+        return torch.jit.trace(net, (x, drivers))
+
+
+def build_variant(name: str, model: LSTMPaceModel, input_dim: int) -> torch.jit.ScriptModule:
+    net = model.model.eval()
+    if name == "torchscript":
+        return _traced(net, model, input_dim)
+    if name == "int8":
+        return _traced(_quantized(net), model, input_dim)
+    raise ValueError(f"Unknown model variant: {name}")
+
+
+def _sample_stints(features: pd.DataFrame, seed: int = 0) -> Tuple[pd.DataFrame, List[int]]:
+    """Real stints, back to back, long enough to yield prediction windows."""
+    groups = [
+        group.sort_values("lap_number")
+        for _, group in features.groupby(["session_key", "driver_id", "stint_number"])
+        if len(group) >= _MIN_STINT_LAPS
+    ]
+    if not groups:
+        return pd.DataFrame(), []
+    rng = np.random.default_rng(seed)
+    picked = [groups[i] for i in sorted(rng.choice(len(groups), min(_SAMPLE_STINTS, len(groups)), replace=False))]
+    return pd.concat(picked, ignore_index=True), [len(group) for group in picked]
+
+
+def _timing_batch(frame: pd.DataFrame, lengths: List[int], context_len: int) -> Tuple[pd.DataFrame, List[int]]:
+    windows = max(1, sum(max(n - context_len, 0) for n in lengths))
+    copies = max(1, -(-_TIMING_WINDOWS // windows))
+    return pd.concat([frame] * copies, ignore_index=True), lengths * copies
+
+
+def _best_ms(model: LSTMPaceModel, frame: pd.DataFrame, lengths: List[int]) -> float:
+    model.predict_concatenated(frame, lengths)
+    best = float("inf")
+    for _ in range(_TIMING_REPEATS):
+        t0 = time.perf_counter()
+        model.predict_concatenated(frame, lengths)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def _manifest_path(source: Path) -> Path:
+    return VARIANTS_DIR / f"{source.stem}.json"
+
+
+def export_variants(source: Path, model: LSTMPaceModel, input_dim: int, features: pd.DataFrame) -> Dict:
+    """Write the serving variants of one trained model plus a manifest with
+    each variant's lap-time delta (seconds, vs eager) and speed on `features`.
+    """
+    VARIANTS_DIR.mkdir(parents=True, exist_ok=True)
+    frame, lengths = _sample_stints(features)
+    manifest: Dict = {"source": source.name, "source_mtime_ns": source.stat().st_mtime_ns, "variants": {}}
+    if frame.empty:
+        return manifest
+
+    timing_frame, timing_lengths = _timing_batch(frame, lengths, model.context_len)
+    reference = np.concatenate(model.predict_concatenated(frame, lengths))
+    eager_ms = _best_ms(model, timing_frame, timing_lengths)
+    manifest["variants"]["eager"] = {"mean_abs_delta_s": 0.0, "max_abs_delta_s": 0.0, "ms": round(eager_ms, 3)}
+    for name in EXPORTED_VARIANTS:
+        net = build_variant(name, model, input_dim)
+        candidate = copy.copy(model)
+        candidate.model = net
+        delta = np.abs(np.concatenate(candidate.predict_concatenated(frame, lengths)) - reference)
+        ms = _best_ms(candidate, timing_frame, timing_lengths)
+        path = VARIANTS_DIR / f"{source.stem}.{name}.pt"
+        torch.jit.save(net, str(path))
+        manifest["variants"][name] = {
+            "path": path.name,
+            "mean_abs_delta_s": round(float(delta.mean()), 6),
+            "max_abs_delta_s": round(float(delta.max()), 6),
+            "ms": round(ms, 3),
+        }
+    _manifest_path(source).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def export_all(paths: Iterable[Path], features: pd.DataFrame, load: Callable[[Path], Tuple[LSTMPaceModel, int]]) -> Dict[str, Dict]:
+    """Export variants for every model in `paths`; per-driver models are
+    measured on that driver's laps, shared/global ones on everyone's."""
+    manifests = {}
+    for path in paths:
+        model, input_dim = load(path)
+        laps = features
+        if path.stem.startswith("driver_"):
+            laps = features[features["driver_id"] == int(path.stem.split("_", 1)[1])]
+        manifests[path.name] = export_variants(path, model, input_dim, laps)
+    return manifests
+
+
+def select_variant(source: Path) -> Optional[Tuple[str, Path]]:
+    """The fastest exported variant within MODEL_VARIANT_TOLERANCE_S, or None
+    to serve the eager net (no fresh manifest, or eager is fastest)."""
+    if MODEL_VARIANT == "eager":
+        return None
+    try:
+        manifest = json.loads(_manifest_path(source).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if manifest.get("source_mtime_ns") != source.stat().st_mtime_ns:
+        return None  # retrained since the export
+    variants = manifest.get("variants", {})
+    if MODEL_VARIANT != "auto":
+        chosen = MODEL_VARIANT if MODEL_VARIANT in variants else None
+    else:
+        eligible = {
+            name: info for name, info in variants.items() if info["mean_abs_delta_s"] <= MODEL_VARIANT_TOLERANCE_S
+        }
+        chosen = min(eligible, key=lambda name: eligible[name]["ms"]) if eligible else None
+    if chosen is None or chosen == "eager":
+        return None
+    return chosen, VARIANTS_DIR / variants[chosen]["path"]
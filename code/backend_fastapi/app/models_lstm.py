@@ -1,36 +1,76 @@
 from __future__ import annotations
 
+import contextlib
+import math
 from dataclasses import dataclass
-from typing import Dict, Tuple
+from typing import Dict, Iterator, List, Tuple
 
 import numpy as np
 import pandas as pd
 import torch
 from torch import nn
-from torch.utils.data import Dataset, DataLoader
 
-from .config import DEFAULT_CONTEXT_LAPS
-
-
-class SequenceDataset(Dataset):
-    def __init__(self, X: np.ndarray, y: np.ndarray):
-        self.X = X
-        self.y = y
-
-    def __len__(self) -> int:
-        return len(self.X)
-
-    def __getitem__(self, idx: int):
-        return self.X[idx], self.y[idx]
+from .config import (
+    DEFAULT_CONTEXT_LAPS,
+    TRAIN_BATCH_SIZE,
+    TRAIN_FINETUNE_EPOCHS,
+    TRAIN_LR,
+    TRAIN_MAX_EPOCHS,
+    TRAIN_PATIENCE,
+    TRAIN_THREADS,
+    TRAIN_VAL_FRACTION,
+)
+
+
+# Share of training windows whose driver is masked to the "unknown driver"
+# embedding, so drivers unseen in training get an average-driver pace.
+DRIVER_DROPOUT = 0.1
+# Validation loss must improve by this much to reset the patience counter.
+_MIN_VAL_IMPROVEMENT = 1e-4
+_VAL_BATCH = 16384
+
+
+@contextlib.contextmanager
+def torch_threads(n: int) -> Iterator[None]:
+    """Run with `n` intra-op threads, restoring the previous setting after."""
+    previous = torch.get_num_threads()
+    torch.set_num_threads(max(1, n))
+    try:
+        yield
+    finally:
+        torch.set_num_threads(previous)
+
+
+def session_split(sessions: np.ndarray, val_fraction: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Train/validation window indices split by session: the most recent
+    sessions (highest session_key) are held out, so validation measures pace
+    in sessions the net has not seen. No validation with fewer than two
+    sessions or a zero `val_fraction`.
+    """
+    keys = np.unique(sessions)
+    n_val = int(round(len(keys) * val_fraction))
+    if val_fraction <= 0 or len(keys) < 2:
+        return np.arange(len(sessions)), np.empty(0, dtype=np.int64)
+    is_val = np.isin(sessions, keys[-max(1, min(n_val, len(keys) - 1)) :])
+    return np.flatnonzero(~is_val), np.flatnonzero(is_val)
 
 
 class LSTMPaceNet(nn.Module):
-    def __init__(self, input_dim: int, hidden_dim: int = 64):
+    """LSTM over lap windows. With `n_drivers`, a learned driver embedding is
+    appended to every timestep so one net serves the whole grid (index 0 is
+    the unknown driver).
+    """
+
+    def __init__(self, input_dim: int, hidden_dim: int = 64, n_drivers: int = 0, driver_dim: int = 8):
         super().__init__()
-        self.lstm = nn.LSTM(input_dim, hidden_dim, batch_first=True)
+        self.driver_embedding = nn.Embedding(n_drivers + 1, driver_dim) if n_drivers else None
+        self.lstm = nn.LSTM(input_dim + (driver_dim if n_drivers else 0), hidden_dim, batch_first=True)
         self.fc = nn.Linear(hidden_dim, 1)
 
-    def forward(self, x):
+    def forward(self, x, drivers=None):
+        if self.driver_embedding is not None:
+            embedded = self.driver_embedding(drivers).unsqueeze(1).expand(-1, x.shape[1], -1)
+            x = torch.cat([x, embedded], dim=-1)
         out, _ = self.lstm(x)
         out = out[:, -1, :]
         return self.fc(out)
@@ -43,22 +83,39 @@ class ModelBundle:
     stats: Dict[str, float]
 
 
+def compact_state(state: Dict) -> Dict[str, torch.Tensor]:
+    """Detached, contiguous float32 copy of a state dict for serving."""
+    return {name: tensor.detach().to(torch.float32).contiguous() for name, tensor in state.items()}
+
+
 class LSTMPaceModel:
-    def __init__(self, context_len: int = DEFAULT_CONTEXT_LAPS):
+    def __init__(self, context_len: int = DEFAULT_CONTEXT_LAPS, shared: bool = False):
         self.context_len = context_len
+        self.shared = shared
+        # "eager", or the exported variant (see model_variants) being served.
+        self.variant = "eager"
         self.model: LSTMPaceNet | None = None
         self.encoders: Dict[str, Dict] = {}
         self.stats: Dict[str, float] = {}
 
     def _encode(self, series: pd.Series, encoder: Dict) -> np.ndarray:
-        return series.map(lambda x: encoder.get(x, 0)).fillna(0).astype(int).values
+        return series.map(encoder).fillna(0).astype(int).values
 
     def _build_encoders(self, df: pd.DataFrame) -> None:
         self.encoders["compound"] = {v: i + 1 for i, v in enumerate(sorted(df["compound"].dropna().unique()))}
         self.encoders["session_type"] = {v: i + 1 for i, v in enumerate(sorted(df["session_type"].dropna().unique()))}
         self.encoders["circuit_id"] = {v: i + 1 for i, v in enumerate(sorted(df["circuit_id"].dropna().unique()))}
+        if self.shared:
+            self.encoders["driver_id"] = {int(v): i + 1 for i, v in enumerate(sorted(df["driver_id"].dropna().unique()))}
+
+    def _driver_index(self, df: pd.DataFrame) -> np.ndarray:
+        if not self.shared or "driver_id" not in df:
+            return np.zeros(len(df), dtype=np.int64)
+        return self._encode(df["driver_id"], self.encoders["driver_id"]).astype(np.int64)
 
-    def _prepare_sequences(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    def _prepare_sequences(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Windows of `context_len` laps, the normalised lap that follows each,
+        and the window's driver index and session_key."""
         df = df.sort_values(["session_key", "driver_id", "lap_number"])
         self.stats["lap_mean"] = df["lap_time"].mean()
         self.stats["lap_std"] = df["lap_time"].std() or 1.0
@@ -79,62 +136,136 @@ class LSTMPaceModel:
             df["track_temp"].fillna(df["track_temp"].mean()).values,
             df["air_temp"].fillna(df["air_temp"].mean()).values,
             df["lap_norm"].values,
-        ])
-
-        X, y = [], []
-        for i in range(self.context_len, len(features)):
-            if df.iloc[i]["session_key"] != df.iloc[i - 1]["session_key"]:
-                continue
-            X.append(features[i - self.context_len : i])
-            y.append(df.iloc[i]["lap_norm"])
-
-        if not X:
-            return np.empty((0, self.context_len, features.shape[1])), np.empty((0, 1))
-
-        return np.array(X, dtype=np.float32), np.array(y, dtype=np.float32).reshape(-1, 1)
-
-    def train(self, df: pd.DataFrame, epochs: int = 8, batch_size: int = 128) -> ModelBundle:
-        X, y = self._prepare_sequences(df)
+        ]).astype(np.float32)
+
+        drivers = self._driver_index(df)
+        sessions = df["session_key"].values
+        lap_norm = df["lap_norm"].values.astype(np.float32)
+        # A shared model sees every driver: windows must not cross drivers either.
+        same_group = (sessions[1:] == sessions[:-1]) & (drivers[1:] == drivers[:-1])
+
+        # Target lap i uses laps i - context_len .. i - 1; only the lap right
+        # before it has to share its group.
+        targets = np.arange(self.context_len, len(features))
+        targets = targets[same_group[targets - 1]]
+        if len(targets) == 0:
+            return (
+                np.empty((0, self.context_len, features.shape[1]), dtype=np.float32),
+                np.empty((0, 1), dtype=np.float32),
+                np.empty(0, dtype=np.int64),
+                np.empty(0, dtype=sessions.dtype),
+            )
+
+        windows = np.lib.stride_tricks.sliding_window_view(features, self.context_len, axis=0)
+        return (
+            np.ascontiguousarray(windows[targets - self.context_len].transpose(0, 2, 1)),
+            lap_norm[targets].reshape(-1, 1),
+            drivers[targets],
+            sessions[targets],
+        )
+
+    def _fit_epoch(
+        self,
+        optimizer: torch.optim.Optimizer,
+        loss_fn: nn.Module,
+        tensors: Tuple[torch.Tensor, torch.Tensor, torch.Tensor],
+        indices: torch.Tensor,
+        batch_size: int,
+    ) -> None:
+        X_t, y_t, d_t = tensors
+        self.model.train()
+        order = indices[torch.randperm(len(indices))]
+        for start in range(0, len(order), batch_size):
+            idx = order[start : start + batch_size]
+            batch_d = d_t[idx]
+            if self.shared:
+                batch_d = batch_d.masked_fill(torch.rand(len(batch_d)) < DRIVER_DROPOUT, 0)
+            optimizer.zero_grad()
+            loss = loss_fn(self.model(X_t[idx], batch_d), y_t[idx])
+            loss.backward()
+            optimizer.step()
+
+    def train(
+        self,
+        df: pd.DataFrame,
+        epochs: int = TRAIN_MAX_EPOCHS,
+        batch_size: int = TRAIN_BATCH_SIZE,
+        val_fraction: float = TRAIN_VAL_FRACTION,
+        patience: int = TRAIN_PATIENCE,
+        finetune_epochs: int = TRAIN_FINETUNE_EPOCHS,
+        threads: int = TRAIN_THREADS,
+        lr: float | None = None,
+    ) -> ModelBundle:
+        """Fit on whole-tensor minibatches for at most `epochs`.
+
+        The most recent `val_fraction` of sessions are held out (see
+        `session_split`): training stops after `patience` epochs without a
+        lower validation loss and keeps the best weights, which are then
+        fine-tuned for `finetune_epochs` on the held-out sessions so the
+        shipped net still sees the newest races. Without a holdout (zero
+        fraction or a single session) every session trains for `epochs`.
+        """
+        X, y, drivers, sessions = self._prepare_sequences(df)
         if len(X) == 0:
             raise ValueError("No sequences to train on.")
 
-        input_dim = X.shape[-1]
-        self.model = LSTMPaceNet(input_dim)
-        optimizer = torch.optim.Adam(self.model.parameters(), lr=1e-3)
+        if lr is None:
+            lr = TRAIN_LR * batch_size / TRAIN_BATCH_SIZE
         loss_fn = nn.MSELoss()
-
-        dataset = SequenceDataset(torch.tensor(X), torch.tensor(y))
-        loader = DataLoader(dataset, batch_size=batch_size, shuffle=True)
-
-        self.model.train()
-        for _ in range(epochs):
-            for batch_x, batch_y in loader:
-                optimizer.zero_grad()
-                preds = self.model(batch_x)
-                loss = loss_fn(preds, batch_y)
-                loss.backward()
-                optimizer.step()
-
+        tensors = (torch.from_numpy(X), torch.from_numpy(y), torch.from_numpy(drivers))
+        X_t, y_t, d_t = tensors
+        train_idx, val_idx = (torch.from_numpy(idx) for idx in session_split(sessions, val_fraction))
+        self.model = LSTMPaceNet(X.shape[-1], n_drivers=len(self.encoders.get("driver_id", {})))
+        optimizer = torch.optim.Adam(self.model.parameters(), lr=lr)
+
+        with torch_threads(threads):
+            if not len(val_idx):
+                for _ in range(epochs):
+                    self._fit_epoch(optimizer, loss_fn, tensors, train_idx, batch_size)
+                self.stats["epochs"] = epochs
+                return ModelBundle(self.model.state_dict(), self.encoders, self.stats)
+
+            best_loss, best_epoch, best_state = math.inf, 0, None
+            for epoch in range(1, epochs + 1):
+                self._fit_epoch(optimizer, loss_fn, tensors, train_idx, batch_size)
+                self.model.eval()
+                with torch.no_grad():
+                    val_loss = sum(
+                        loss_fn(self.model(X_t[idx], d_t[idx]), y_t[idx]).item() * len(idx)
+                        for idx in val_idx.split(_VAL_BATCH)
+                    ) / len(val_idx)
+                if val_loss < best_loss - _MIN_VAL_IMPROVEMENT:
+                    best_loss, best_epoch = val_loss, epoch
+                    best_state = {k: v.clone() for k, v in self.model.state_dict().items()}
+                elif epoch - best_epoch >= patience:
+                    break
+            self.model.load_state_dict(best_state)
+            for _ in range(finetune_epochs):
+                self._fit_epoch(optimizer, loss_fn, tensors, val_idx, batch_size)
+
+        self.stats["val_loss"] = best_loss
+        self.stats["epochs"] = epoch
+        self.stats["best_epoch"] = best_epoch
         return ModelBundle(self.model.state_dict(), self.encoders, self.stats)
 
     def load(self, bundle: ModelBundle, input_dim: int) -> None:
-        self.model = LSTMPaceNet(input_dim)
-        self.model.load_state_dict(bundle.model_state)
+        self.shared = "driver_id" in bundle.encoders
+        self.model = LSTMPaceNet(input_dim, n_drivers=len(bundle.encoders.get("driver_id", {})))
+        # assign keeps the bundle's tensors (possibly memory-mapped) as the
+        # weights instead of copying them into freshly allocated ones.
+        self.model.load_state_dict(bundle.model_state, assign=True)
+        self.model.requires_grad_(False)
         self.encoders = bundle.encoders
         self.stats = bundle.stats
 
-    def predict_stint(self, stint_df: pd.DataFrame) -> np.ndarray:
-        if self.model is None:
-            raise ValueError("Model not loaded.")
-
-        df = stint_df.copy()
-        df["lap_norm"] = (df["lap_time"] - self.stats["lap_mean"]) / self.stats["lap_std"]
+    def _stint_features(self, df: pd.DataFrame) -> np.ndarray:
+        lap_norm = (df["lap_time"].values - self.stats["lap_mean"]) / self.stats["lap_std"]
 
         compounds = self._encode(df["compound"], self.encoders["compound"])
         session_types = self._encode(df["session_type"], self.encoders["session_type"])
         circuits = self._encode(df["circuit_id"], self.encoders["circuit_id"])
 
-        features = np.column_stack([
+        return np.column_stack([
             df["lap_number"].values,
             df["stint_age"].values,
             compounds,
@@ -142,21 +273,62 @@ class LSTMPaceModel:
             circuits,
             df["track_temp"].fillna(df["track_temp"].mean()).values,
             df["air_temp"].fillna(df["air_temp"].mean()).values,
-            df["lap_norm"].values,
-        ])
+            lap_norm,
+        ]).astype(np.float32)
 
-        X = []
-        for i in range(self.context_len, len(features)):
-            X.append(features[i - self.context_len : i])
+    def predict_stint(self, stint_df: pd.DataFrame) -> np.ndarray:
+        return self.predict_stints([stint_df])[0]
 
-        if not X:
-            return df["lap_time"].values
+    def predict_stints(self, stint_dfs: List[pd.DataFrame]) -> List[np.ndarray]:
+        """Predict several stints with a single batched forward pass."""
+        lengths = [len(df) for df in stint_dfs]
+        return self.predict_concatenated(pd.concat(stint_dfs, ignore_index=True), lengths)
 
-        self.model.eval()
-        with torch.no_grad():
-            preds = self.model(torch.tensor(np.array(X, dtype=np.float32)))
-        preds = preds.squeeze().numpy()
-        preds = np.atleast_1d(preds) * self.stats["lap_std"] + self.stats["lap_mean"]
+    def predict_concatenated(self, df: pd.DataFrame, lengths: List[int], max_batch: int = 16384) -> List[np.ndarray]:
+        """Predict stints stored back to back in `df` (`lengths` rows each).
 
-        warmup = df["lap_time"].values[: self.context_len]
-        return np.concatenate([warmup, preds])
+        Features are encoded once for the whole frame; windows never cross a
+        stint boundary and the forward pass runs in chunks of `max_batch`.
+        """
+        if self.model is None:
+            raise ValueError("Model not loaded.")
+
+        features = self._stint_features(df)
+        lap_times = df["lap_time"].values
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(int)
+        stint_drivers = self._driver_index(df)[starts] if len(df) else np.empty(0, dtype=np.int64)
+
+        windows = []
+        sizes = []
+        for start, length in zip(starts, lengths):
+            n_windows = length - self.context_len
+            sizes.append(max(n_windows, 0))
+            if n_windows > 0:
+                segment = features[start : start + length]
+                view = np.lib.stride_tricks.sliding_window_view(segment, self.context_len, axis=0)
+                windows.append(view[:n_windows].transpose(0, 2, 1))
+
+        preds = np.empty(0, dtype=np.float32)
+        if windows:
+            X = np.concatenate(windows)
+            # One driver per window, so stints of different drivers share a pass.
+            D = torch.from_numpy(np.repeat(stint_drivers, sizes))
+            self.model.eval()
+            with torch.no_grad():
+                preds = np.concatenate([
+                    self.model(torch.from_numpy(X[i : i + max_batch]), D[i : i + max_batch]).numpy().reshape(-1)
+                    for i in range(0, len(X), max_batch)
+                ])
+            preds = preds * self.stats["lap_std"] + self.stats["lap_mean"]
+
+        results = []
+        offset = 0
+        for start, length, size in zip(starts, lengths, sizes):
+            stint_laps = lap_times[start : start + length]
+            if size == 0:
+                results.append(stint_laps)
+                continue
+            warmup = stint_laps[: self.context_len]
+            results.append(np.concatenate([warmup, preds[offset : offset + size]]))
+            offset += size
+        return results
@@ -7,6 +7,8 @@ import numpy as np
 import pandas as pd
 
 from .config import RAW_DIR, FEATURE_DIR, SESSION_NAMES
+from .data_store import write_feature_manifest
+from .explore import write_explore_cube
 
 
 def _read_parquet(path: Path) -> pd.DataFrame:
@@ -159,6 +161,7 @@ def build_features_for_year(year: int) -> pd.DataFrame:
     out_path = FEATURE_DIR / f"year={year}" / "features.parquet"
     out_path.parent.mkdir(parents=True, exist_ok=True)
     df.to_parquet(out_path, index=False)
+    write_explore_cube(year, df)
 
     metadata_path = FEATURE_DIR / "metadata"
     metadata_path.mkdir(parents=True, exist_ok=True)
@@ -172,6 +175,7 @@ def build_features_for_year(year: int) -> pd.DataFrame:
     circuits_df = pd.DataFrame(sorted(metadata_circuits), columns=["circuit_id"])
     circuits_df.to_parquet(metadata_path / f"circuits_{year}.parquet", index=False)
 
+    write_feature_manifest()
     return df
 
 
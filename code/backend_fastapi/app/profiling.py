@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Histogram buckets (seconds) for stage and request latencies.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Profile:
+    """Spans, cache hit/miss events and item counts of one computation."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.spans: Dict[str, float] = {}
+        self.cache: Dict[str, Dict[str, int]] = {}
+        self.counts: Dict[str, int] = {}
+
+    def as_dict(self) -> Dict:
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "spans_ms": {name: round(ms, 3) for name, ms in self.spans.items()},
+            "cache": self.cache,
+            "counts": self.counts,
+        }
+
+
+_current: ContextVar[Optional[Profile]] = ContextVar("racescope_profile", default=None)
+
+
+@contextmanager
+def profiled() -> Iterator[Profile]:
+    """Collect spans for the enclosed work; nested calls share the outer profile."""
+    profile = _current.get()
+    if profile is not None:
+        yield profile
+        return
+    profile = Profile()
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a stage; a no-op outside `profiled()`. Repeated spans accumulate."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - t0) * 1000
+        with profile.lock:
+            profile.spans[name] = profile.spans.get(name, 0.0) + elapsed
+
+
+def cache_event(name: str, hit: bool) -> None:
+    profile = _current.get()
+    if profile is not None:
+        with profile.lock:
+            events = profile.cache.setdefault(name, {"hit": 0, "miss": 0})
+            events["hit" if hit else "miss"] += 1
+
+
+def count(name: str, n: int) -> None:
+    profile = _current.get()
+    if profile is not None:
+        with profile.lock:
+            profile.counts[name] = profile.counts.get(name, 0) + int(n)
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack every `interval` seconds.
+
+    Stacks are kept in collapsed form (`outer;inner;leaf count`), which
+    flamegraph.pl and speedscope read directly.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="racescope-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.samples.most_common())
+
+
+@contextmanager
+def sample_if_slow(threshold_ms: float, out_dir: Path, label: str) -> Iterator[None]:
+    """Run the sampling profiler around a block and keep its stacks only if
+    the block took longer than `threshold_ms` (0 disables the hook).
+    """
+    if threshold_ms <= 0:
+        yield
+        return
+    sampler = SamplingProfiler().start()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        if elapsed_ms >= threshold_ms and sampler.samples:
+            out_dir.mkdir(parents=True, exist_ok=True)
+            path = out_dir / f"{time.strftime('%Y%m%d-%H%M%S')}-{label}-{int(elapsed_ms)}ms.folded"
+            path.write_text(sampler.collapsed(), encoding="utf-8")
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.total += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+def _labels(pairs: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{k}="{str(v)}"' for k, v in pairs]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metrics:
+    """In-process histograms and counters rendered in Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[Tuple, _Histogram]] = {}
+        self._counters: Dict[str, Dict[Tuple, float]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, text: str) -> None:
+        self._help[name] = text
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = _Histogram(LATENCY_BUCKETS)
+            series[key].observe(value)
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def record_profile(self, task: str, profile: Dict) -> None:
+        """Fold a `Profile.as_dict()` from a worker into the histograms."""
+        self.observe("racescope_task_seconds", profile["total_ms"] / 1000, task=task)
+        for stage, ms in profile["spans_ms"].items():
+            self.observe("racescope_stage_seconds", ms / 1000, task=task, stage=stage)
+        for cache, events in profile["cache"].items():
+            for result, n in events.items():
+                if n:
+                    self.inc("racescope_cache_events_total", n, task=task, cache=cache, result=result)
+        for item, n in profile["counts"].items():
+            self.inc("racescope_items_total", n, task=task, item=item)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, hist in sorted(series.items()):
+                    # Bucket counts are already cumulative (see `_Histogram.observe`).
+                    for bound, n in zip(hist.buckets, hist.counts):
+                        le = 'le="%g"' % bound
+                        lines.append(f"{name}_bucket{_labels(key, le)} {n}")
+                    inf = 'le="+Inf"'
+                    lines.append(f"{name}_bucket{_labels(key, inf)} {hist.total}")
+                    lines.append(f"{name}_sum{_labels(key)} {hist.sum:.6f}")
+                    lines.append(f"{name}_count{_labels(key)} {hist.total}")
+            for name, series in sorted(self._counters.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_labels(key)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+metrics.describe("racescope_task_seconds", "Worker-side duration of a strategy computation.")
+metrics.describe("racescope_stage_seconds", "Duration of each StrategyEngine stage within a computation.")
+metrics.describe("racescope_request_seconds", "API-side duration of compute-backed requests, queueing included.")
+metrics.describe("racescope_cache_events_total", "Engine cache hits and misses (frames, setups, models, curves).")
+metrics.describe("racescope_items_total", "Items processed per stage (candidates, MC refinements, inferred grids).")
+metrics.describe("racescope_response_cache_total", "Response cache outcomes: hit, coalesced or computed.")
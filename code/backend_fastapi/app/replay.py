@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import bisect
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from fastapi import FastAPI, HTTPException, Request
+
+from .config import RAW_DIR, REPLAY_MAX_SPEED
+
+REPLAY_ENDPOINTS = ("sessions", "drivers", "stints", "laps", "weather")
+
+
+def _read_parquet(path: Path) -> pd.DataFrame:
+    if not path.exists():
+        return pd.DataFrame()
+    return pd.read_parquet(path)
+
+
+def _timestamps(series: pd.Series) -> pd.Series:
+    return pd.to_datetime(series, errors="coerce", utc=True, format="ISO8601")
+
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    if df.empty:
+        return []
+    clean = df.astype(object).where(df.notna(), None)
+    return clean.to_dict("records")
+
+
+def _matches(value: Any, wanted: Any) -> bool:
+    try:
+        return float(value) == float(wanted)
+    except (TypeError, ValueError):
+        return str(value) == str(wanted)
+
+
+def find_session(year: int, circuit_id: str, session_name: str = "Race", raw_dir: Path = RAW_DIR) -> int:
+    sessions = _read_parquet(raw_dir / f"year={year}" / "sessions.parquet")
+    if sessions.empty:
+        raise KeyError(f"No raw sessions for {year}. Run ingest_season first.")
+    names = sessions.get("circuit_short_name", sessions.get("location"))
+    match = sessions[(names == circuit_id) & (sessions["session_name"] == session_name)]
+    if match.empty:
+        raise KeyError(f"No {session_name} session for {circuit_id} in {year}.")
+    return int(match.iloc[0]["session_key"])
+
+
+class ReplaySession:
+    """One ingested session from `data/raw`, with a publish time per record.
+
+    A lap is published when it ends (`date_start + lap_duration`), a stint
+    when its first lap starts, weather samples at their `date`; the session
+    and driver rows are available from the start.
+    """
+
+    def __init__(self, year: int, session_key: int, raw_dir: Path = RAW_DIR):
+        year_dir = Path(raw_dir) / f"year={year}"
+        sessions = _read_parquet(year_dir / "sessions.parquet")
+        row = sessions[sessions["session_key"] == session_key] if not sessions.empty else sessions
+        if row.empty:
+            raise KeyError(f"Session {session_key} not found under {year_dir}.")
+        self.year = year
+        self.session_key = session_key
+
+        session_dir = year_dir / f"session_key={session_key}"
+        laps = _read_parquet(session_dir / "laps.parquet")
+        stints = _read_parquet(session_dir / "stints.parquet")
+        weather = _read_parquet(session_dir / "weather.parquet")
+        drivers = _read_parquet(session_dir / "drivers.parquet")
+
+        published: Dict[str, pd.Series] = {}
+        lap_start = _timestamps(laps.get("date_start", pd.Series(index=laps.index, dtype=object)))
+        if not laps.empty:
+            duration = pd.to_numeric(laps.get("lap_duration"), errors="coerce").fillna(0.0)
+            published["laps"] = lap_start + pd.to_timedelta(duration, unit="s")
+        if not weather.empty:
+            published["weather"] = _timestamps(weather.get("date"))
+
+        starts = [s.min() for s in (lap_start, published.get("weather")) if s is not None and s.notna().any()]
+        if "date_start" in row and pd.notna(_timestamps(row["date_start"]).iloc[0]):
+            starts.append(_timestamps(row["date_start"]).iloc[0])
+        self.start: pd.Timestamp = min(starts) if starts else pd.Timestamp(0, tz="UTC")
+
+        if not stints.empty:
+            first_lap = pd.DataFrame({
+                "driver_number": pd.to_numeric(laps.get("driver_number"), errors="coerce"),
+                "lap_start": pd.to_numeric(laps.get("lap_number"), errors="coerce"),
+                "published": lap_start,
+            }).dropna()
+            keyed = stints.assign(
+                driver_number=pd.to_numeric(stints["driver_number"], errors="coerce"),
+                lap_start=pd.to_numeric(stints["lap_start"], errors="coerce"),
+            ).merge(first_lap, on=["driver_number", "lap_start"], how="left")
+            published["stints"] = keyed["published"].fillna(self.start).set_axis(stints.index)
+
+        frames = {"sessions": row, "drivers": drivers, "stints": stints, "laps": laps, "weather": weather}
+        self._feeds: Dict[str, Tuple[List[int], List[Dict[str, Any]]]] = {}
+        for endpoint, df in frames.items():
+            at = published.get(endpoint, pd.Series(self.start, index=df.index)).fillna(self.start)
+            order = at.argsort(kind="stable").to_numpy()
+            stamps = at.iloc[order].map(lambda ts: ts.value).tolist()
+            self._feeds[endpoint] = (stamps, _records(df.iloc[order]))
+
+        self.end: pd.Timestamp = max(
+            (pd.Timestamp(stamps[-1], tz="UTC") for stamps, _ in self._feeds.values() if stamps),
+            default=self.start,
+        )
+
+    def records(self, endpoint: str, at: pd.Timestamp, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Records of `endpoint` published by `at`, filtered by equality on `params`."""
+        if endpoint not in self._feeds:
+            raise KeyError(endpoint)
+        stamps, records = self._feeds[endpoint]
+        visible = records[: bisect.bisect_right(stamps, at.value)]
+        if not params:
+            return list(visible)
+        return [r for r in visible if all(k in r and _matches(r[k], v) for k, v in params.items())]
+
+    def events(self) -> Iterator[Tuple[pd.Timestamp, str, Dict[str, Any]]]:
+        """Every record as (publish time, endpoint, record), in publish order."""
+        merged = [
+            (stamp, pos, endpoint, record)
+            for pos, endpoint in enumerate(REPLAY_ENDPOINTS)
+            for stamp, record in zip(*self._feeds[endpoint])
+        ]
+        merged.sort(key=lambda item: (item[0], item[1]))
+        for stamp, _, endpoint, record in merged:
+            yield pd.Timestamp(stamp, tz="UTC"), endpoint, record
+
+
+class ReplayClock:
+    """Session time advancing `speed` times faster than `time_fn`."""
+
+    def __init__(self, start: pd.Timestamp, speed: float = 1.0, time_fn: Callable[[], float] = time.monotonic):
+        if not 1.0 <= speed <= REPLAY_MAX_SPEED:
+            raise ValueError(f"Replay speed must be between 1 and {REPLAY_MAX_SPEED:g}.")
+        self.start = start
+        self.speed = speed
+        self._time_fn = time_fn
+        self._wall_start = time_fn()
+
+    def now(self) -> pd.Timestamp:
+        return self.start + pd.Timedelta(seconds=(self._time_fn() - self._wall_start) * self.speed)
+
+    def wall_delay(self, at: pd.Timestamp) -> float:
+        """Wall-clock seconds until session time `at`."""
+        return max(0.0, (at - self.now()).total_seconds() / self.speed)
+
+
+class ReplayFeed:
+    """In-process stand-in for `OpenF1Client` over a `ReplaySession`.
+
+    `get` has the client's signature and answers with what the live API
+    would have returned at the current replay time. Pass a fake `time_fn`
+    for fully deterministic runs.
+    """
+
+    def __init__(self, session: ReplaySession, speed: float = 1.0, time_fn: Callable[[], float] = time.monotonic):
+        self.session = session
+        self.clock = ReplayClock(session.start, speed, time_fn)
+
+    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None, use_cache: bool = True) -> List[Dict[str, Any]]:
+        return self.session.records(endpoint.strip("/"), self.clock.now(), params)
+
+    def events(
+        self,
+        realtime: bool = True,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> Iterator[Tuple[pd.Timestamp, str, Dict[str, Any]]]:
+        """Session records in publish order; paced by the clock when `realtime`."""
+        for at, endpoint, record in self.session.events():
+            if realtime:
+                delay = self.clock.wall_delay(at)
+                if delay > 0:
+                    sleep(delay)
+            yield at, endpoint, record
+
+    def status(self) -> Dict[str, Any]:
+        now = self.clock.now()
+        span = max((self.session.end - self.session.start).total_seconds(), 1e-9)
+        return {
+            "year": self.session.year,
+            "session_key": self.session.session_key,
+            "speed": self.clock.speed,
+            "session_time": now.isoformat(),
+            "progress": min(1.0, max(0.0, (now - self.session.start).total_seconds() / span)),
+            "finished": now >= self.session.end,
+        }
+
+
+def create_replay_app(feed: ReplayFeed) -> FastAPI:
+    """OpenF1-compatible HTTP API (`/v1/<endpoint>?field=value`) over a feed."""
+    app = FastAPI(title="OpenF1 replay")
+
+    @app.get("/replay/status")
+    def replay_status() -> Dict[str, Any]:
+        return feed.status()
+
+    @app.get("/v1/{endpoint}")
+    def replay_endpoint(endpoint: str, request: Request) -> List[Dict[str, Any]]:
+        if endpoint not in REPLAY_ENDPOINTS:
+            raise HTTPException(status_code=404, detail=f"Unknown endpoint {endpoint}.")
+        return feed.get(endpoint, dict(request.query_params))
+
+    return app
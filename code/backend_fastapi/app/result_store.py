@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .config import (
+    ARTIFACT_VERSION_TTL_SECONDS,
+    MODEL_VARIANT,
+    MODEL_VARIANT_TOLERANCE_S,
+    MODELS_DIR,
+    PACE_MODEL,
+    RESULT_STORE_PATH,
+)
+from .data_store import feature_version, fingerprint_files
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def request_key(kind: str, fields: Dict[str, Any]) -> str:
+    return f"{kind}:" + json.dumps(_normalize(fields), sort_keys=True, separators=(",", ":"))
+
+
+def model_version() -> str:
+    # Exported variants and the serving settings pick different nets for the
+    # same request.
+    paths = [*MODELS_DIR.glob("*.joblib"), *MODELS_DIR.glob("variants/*.json")]
+    return f"{fingerprint_files(paths)}-{PACE_MODEL}-{MODEL_VARIANT}-{MODEL_VARIANT_TOLERANCE_S:g}"
+
+
+class ResultStore:
+    """Durable strategy responses shared by every API process and restart.
+
+    Entries live in SQLite (WAL mode, so readers never block the writer) as
+    zlib-compressed JSON. The row id is a hash of the request key plus the
+    current feature and model versions: retraining or re-preprocessing changes
+    the version and old entries simply stop matching until `prune` drops them.
+    """
+
+    def __init__(self, path: Path = RESULT_STORE_PATH):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._version: Tuple[float, str] = (0.0, "")
+        self._version_lock = threading.Lock()
+        self._writer: ThreadPoolExecutor | None = None
+        self._writer_lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "digest TEXT PRIMARY KEY, request_key TEXT NOT NULL, version TEXT NOT NULL, "
+                "created REAL NOT NULL, payload BLOB NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_version ON results(version)")
+            self._local.conn = conn
+        return conn
+
+    def version(self) -> str:
+        checked_at, version = self._version
+        if time.time() - checked_at < ARTIFACT_VERSION_TTL_SECONDS:
+            return version
+        with self._version_lock:
+            version = f"{feature_version()}-{model_version()}"
+            self._version = (time.time(), version)
+        return version
+
+    def _digest(self, key: str, version: str) -> str:
+        return hashlib.sha256(f"{version}|{key}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        row = self._conn().execute(
+            "SELECT payload FROM results WHERE digest = ?", (self._digest(key, self.version()),)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            return json.loads(zlib.decompress(row[0]))
+        except (zlib.error, ValueError):
+            return None
+
+    def put(self, key: str, value: Dict) -> None:
+        version = self.version()
+        payload = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), 6)
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (digest, request_key, version, created, payload) VALUES (?, ?, ?, ?, ?)",
+                (self._digest(key, version), key, version, time.time(), payload),
+            )
+
+    def put_later(self, key: str, value: Dict) -> None:
+        """`put` on the store's single writer thread, for callers (the event
+        loop, pool callbacks) that must not wait on disk."""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="result-store")
+            self._writer.submit(self.put, key, value)
+
+    def flush(self) -> None:
+        """Wait for pending `put_later` writes."""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.shutdown(wait=True)
+
+    def items(self, limit: int | None = None) -> Iterator[Tuple[str, Dict]]:
+        rows = self._conn().execute(
+            "SELECT request_key, payload FROM results WHERE version = ? ORDER BY created DESC LIMIT ?",
+            (self.version(), -1 if limit is None else limit),
+        )
+        for key, payload in rows:
+            try:
+                yield key, json.loads(zlib.decompress(payload))
+            except (zlib.error, ValueError):
+                continue
+
+    def prune(self) -> int:
+        conn = self._conn()
+        with conn:
+            return conn.execute("DELETE FROM results WHERE version != ?", (self.version(),)).rowcount
+
+
+result_store = ResultStore()
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import COMPOUND_ORDER, REWATCH_DIR
+from .data_store import feature_version
+from .result_store import model_version
+
+if TYPE_CHECKING:  # the API serves timelines without importing the engine (and torch)
+    from .strategy_engine import StrategyEngine
+
+# Per-(lap, driver) columns of a timeline. Row `lap` is the state after `lap`
+# completed laps (row 0 = grid); -1 / NaN mark laps without a usable state.
+TIMELINE_COLUMNS = {
+    "compound": np.int8,
+    "tyre_age": np.int16,
+    "lap_time": np.float32,
+    "plan": np.int16,
+    "next_stop_lap": np.int16,
+    "next_compound": np.int8,
+    "n_stops": np.int8,
+    "pit_now": np.bool_,
+    "expected_time": np.float32,
+    "variance": np.float32,
+}
+
+
+def timeline_path(year: int, circuit_id: str) -> Path:
+    return REWATCH_DIR / f"year={year}" / f"{circuit_id}.npz"
+
+
+def _race_laps(engine: StrategyEngine, year: int, circuit_id: str) -> pd.DataFrame:
+    df = engine._circuit_frame(year, circuit_id)
+    race = df[df["session_type"] == "RACE"]
+    if race.empty:
+        return race
+    # One race per circuit and year; keep the session with the most laps.
+    session_key = race.groupby("session_key")["lap_number"].count().idxmax()
+    race = race[race["session_key"] == session_key]
+    return race.sort_values(["driver_id", "lap_number"]).drop_duplicates(["driver_id", "lap_number"], keep="last")
+
+
+def build_race_timeline(engine: StrategyEngine, year: int, circuit_id: str) -> Dict[str, np.ndarray] | None:
+    """Best remaining strategy at every lap for every driver of one race.
+
+    The actual tyre state at each lap comes from the race laps in the
+    feature store and is fed to `generate_live`; unique plans are kept once
+    in `plans` and referenced by index from the `plan` column.
+    """
+    race = _race_laps(engine, year, circuit_id)
+    if race.empty:
+        return None
+
+    setup = engine._race_setup(year, circuit_id)
+    total_laps = setup.context.total_laps
+    drivers = np.array(sorted(race["driver_id"].dropna().astype(int).unique()), dtype=np.int32)
+    columns = {
+        name: np.full((total_laps + 1, len(drivers)), -1 if np.issubdtype(dtype, np.integer) else 0, dtype=dtype)
+        for name, dtype in TIMELINE_COLUMNS.items()
+    }
+    for name in ("lap_time", "expected_time", "variance"):
+        columns[name][:] = np.nan
+
+    plans: List[Dict] = []
+    plan_index: Dict[Tuple, int] = {}
+    for col, driver_id in enumerate(drivers):
+        laps = race[race["driver_id"] == driver_id].set_index("lap_number")
+        compound = laps["compound"].astype("string").str.upper().ffill().bfill()
+        tyre_age = laps["stint_age"].ffill()
+        used: set = set()
+        for lap in range(total_laps + 1):
+            if lap == 0:
+                first = compound.iloc[0] if len(compound) else None
+                state = (first, 0)
+            elif lap in laps.index:
+                state = (compound.get(lap), tyre_age.get(lap))
+                columns["lap_time"][lap, col] = laps.at[lap, "lap_time"]
+            else:
+                continue
+            current, age = state
+            if pd.isna(current) or current not in COMPOUND_ORDER or pd.isna(age):
+                continue
+            used.add(current)
+            columns["compound"][lap, col] = COMPOUND_ORDER.index(current)
+            columns["tyre_age"][lap, col] = int(age)
+
+            live = engine.generate_live(
+                year,
+                circuit_id,
+                int(driver_id),
+                current_lap=lap,
+                compound=current,
+                tyre_age=int(age),
+                used_compounds=sorted(used),
+                n_strategies=1,
+            )
+            if not live["strategies"]:
+                continue
+            best = live["strategies"][0]
+            key = (tuple(best["compounds"]), tuple(best["stop_laps"]))
+            if key not in plan_index:
+                plan_index[key] = len(plans)
+                plans.append({"compounds": best["compounds"], "stints": best["stints"], "stop_laps": best["stop_laps"]})
+            columns["plan"][lap, col] = plan_index[key]
+            columns["n_stops"][lap, col] = len(best["stop_laps"])
+            columns["pit_now"][lap, col] = best["pit_now"]
+            columns["expected_time"][lap, col] = best["expected_time"]
+            columns["variance"][lap, col] = best["variance"]
+            if best["stop_laps"]:
+                columns["next_stop_lap"][lap, col] = best["stop_laps"][0]
+                columns["next_compound"][lap, col] = COMPOUND_ORDER.index(best["compounds"][1])
+
+    return {
+        **columns,
+        "drivers": drivers,
+        "plans": np.array(json.dumps(plans)),
+        "version": np.array(f"{feature_version()}-{model_version()}"),
+    }
+
+
+def build_rewatch(years: List[int], engine: StrategyEngine) -> Dict[str, int]:
+    built = 0
+    skipped = 0
+    for year in years:
+        circuits = engine.features.loc[engine.features["year"] == year, "circuit_id"].dropna().unique()
+        for circuit_id in sorted(circuits):
+            timeline = build_race_timeline(engine, year, circuit_id)
+            if timeline is None:
+                skipped += 1
+                continue
+            path = timeline_path(year, circuit_id)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            np.savez_compressed(path, **timeline)
+            built += 1
+    return {"built": built, "skipped": skipped}
+
+
+@lru_cache(maxsize=32)
+def _load_timeline(path: str, mtime_ns: int) -> Dict[str, np.ndarray]:
+    with np.load(path) as data:
+        timeline = {name: data[name] for name in data.files}
+    timeline["plan_table"] = json.loads(str(timeline["plans"]))
+    return timeline
+
+
+def load_timeline(year: int, circuit_id: str, version: str | None = None) -> Dict[str, np.ndarray] | None:
+    """Timeline arrays of a race, or None if it has not been built or, given
+    the current `version` (see `ResultStore.version`), was built from other
+    features or models."""
+    path = timeline_path(year, circuit_id)
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    timeline = _load_timeline(str(path), mtime_ns)
+    if version is not None and str(timeline["version"]) != version:
+        return None
+    return timeline
+
+
+def timeline_payload(timeline: Dict[str, np.ndarray]) -> Dict:
+    """Whole timeline as JSON-ready columns ([lap][driver])."""
+    payload = {
+        "drivers": timeline["drivers"].tolist(),
+        "compounds": list(COMPOUND_ORDER),
+        "plans": timeline["plan_table"],
+        "version": str(timeline["version"]),
+    }
+    for name in TIMELINE_COLUMNS:
+        values = timeline[name]
+        if np.issubdtype(values.dtype, np.floating):
+            payload[name] = [[None if np.isnan(v) else round(float(v), 3) for v in row] for row in values]
+        else:
+            payload[name] = values.tolist()
+    return payload
+
+
+def lap_payload(timeline: Dict[str, np.ndarray], lap: int) -> Dict:
+    """One scrub position: every driver's state and best plan after `lap` laps."""
+    plans = timeline["plan_table"]
+    rows = []
+    for col, driver_id in enumerate(timeline["drivers"].tolist()):
+        plan = int(timeline["plan"][lap, col])
+        compound = int(timeline["compound"][lap, col])
+        lap_time = float(timeline["lap_time"][lap, col])
+        expected = float(timeline["expected_time"][lap, col])
+        variance = float(timeline["variance"][lap, col])
+        rows.append({
+            "driver_id": driver_id,
+            "compound": COMPOUND_ORDER[compound] if compound >= 0 else None,
+            "tyre_age": int(timeline["tyre_age"][lap, col]) if compound >= 0 else None,
+            "lap_time": None if np.isnan(lap_time) else lap_time,
+            "pit_now": bool(timeline["pit_now"][lap, col]),
+            "plan": plans[plan] if plan >= 0 else None,
+            "expected_time": None if np.isnan(expected) else expected,
+            "variance": None if np.isnan(variance) else variance,
+        })
+    return {"lap": lap, "drivers": rows}
@@ -4,26 +4,33 @@ import math
 import random
 import hashlib
 import json
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 from dataclasses import dataclass
-from pathlib import Path
 from typing import Dict, List, Tuple
 
-import joblib
-from functools import lru_cache
 import numpy as np
 import pandas as pd
 
 from .config import (
+    COMPOUND_ORDER,
     DEFAULT_RISK_LAMBDA,
     DEFAULT_STRATEGY_COUNT,
-    MODELS_DIR,
+    LIVE_DIRTY_AIR_GAP,
+    LIVE_DIRTY_AIR_LOSS,
+    LIVE_GAP_HORIZON_LAPS,
+    LIVE_REJOIN_TRAFFIC_LOSS,
     PIT_WINDOW_BIN,
     RANDOM_SEED,
     MC_TOP_K,
-    PACE_CURVE_CACHE_DIR,
+    PACE_CURVE_AIR_TEMPS,
+    PACE_CURVE_TRACK_TEMPS,
 )
-from .models_lstm import LSTMPaceModel, ModelBundle
-from .driver_profile import load_driver_profile, resolve_profile_params
+from .curve_store import curve_store, interpolate_grid
+from .driver_profile import resolve_profile_params
+from .model_registry import model_path, model_registry
+from .profiling import cache_event, count, span
+from .result_store import model_version
 
 
 @dataclass
@@ -45,16 +52,50 @@ class StrategyCandidate:
     stop_laps: List[int]
 
 
+_TRACK_AXIS = np.asarray(sorted(PACE_CURVE_TRACK_TEMPS), dtype=float)
+_AIR_AXIS = np.asarray(sorted(PACE_CURVE_AIR_TEMPS), dtype=float)
+_GRID_SIGNATURE = hashlib.sha1(json.dumps([_TRACK_AXIS.tolist(), _AIR_AXIS.tolist()]).encode()).hexdigest()[:10]
+
+
+@dataclass
+class RaceSetup:
+    """Circuit-level work shared by every driver of a (year, circuit).
+
+    `compound_idx` and `stint_lengths` encode the candidates as
+    (n_candidates, max_stints) arrays so they can be scored in one pass;
+    unused stints have length 0.
+    """
+
+    context: RaceContext
+    bounds: Dict[str, Tuple[int, int]]
+    candidates: List[StrategyCandidate]
+    compound_idx: np.ndarray
+    stint_lengths: np.ndarray
+    n_stops: np.ndarray
+
+
 class StrategyEngine:
     def __init__(self, features: pd.DataFrame):
         self.features = features
         random.seed(RANDOM_SEED)
         np.random.seed(RANDOM_SEED)
         self.valid_compounds = {"SOFT", "MEDIUM", "HARD"}
+        self._frames: Dict[Tuple[int, str], pd.DataFrame] = {}
+        self._setups: Dict[Tuple[int, str], RaceSetup] = {}
+        self._live_prefixes: Dict[Tuple, np.ndarray] = {}
+        self.model_version = model_version()
+
+    def _circuit_frame(self, year: int, circuit_id: str) -> pd.DataFrame:
+        key = (year, circuit_id)
+        cache_event("frame", key in self._frames)
+        if key not in self._frames:
+            with span("frame_filter"):
+                df = self.features
+                self._frames[key] = df[(df["year"] == year) & (df["circuit_id"] == circuit_id)]
+        return self._frames[key]
 
     def _context(self, year: int, circuit_id: str) -> RaceContext:
-        df = self.features
-        df = df[(df["year"] == year) & (df["circuit_id"] == circuit_id)]
+        df = self._circuit_frame(year, circuit_id)
         if df.empty:
             return RaceContext(year=year, total_laps=55, track_temp=30.0, air_temp=22.0, pit_loss=22.5, sc_probability=0.2)
 
@@ -73,8 +114,7 @@ class StrategyEngine:
         )
 
     def _compound_stats(self, driver_id: int, year: int, circuit_id: str) -> Dict[str, Dict[str, float]]:
-        df = self.features
-        df = df[(df["year"] == year) & (df["circuit_id"] == circuit_id)]
+        df = self._circuit_frame(year, circuit_id)
         driver_df = df[df["driver_id"] == driver_id]
         if driver_df.empty:
             driver_df = df
@@ -95,8 +135,7 @@ class StrategyEngine:
         return stats
 
     def _tyre_life_bounds(self, year: int, circuit_id: str) -> Dict[str, Tuple[int, int]]:
-        df = self.features
-        df = df[(df["year"] == year) & (df["circuit_id"] == circuit_id)]
+        df = self._circuit_frame(year, circuit_id)
         if df.empty:
             return {"SOFT": (12, 18), "MEDIUM": (18, 26), "HARD": (24, 34)}
 
@@ -118,20 +157,12 @@ class StrategyEngine:
             bounds = {"SOFT": (12, 18), "MEDIUM": (18, 26), "HARD": (24, 34)}
         return bounds
 
-    def _load_model(self, driver_id: int) -> Tuple[LSTMPaceModel, int]:
-        return _load_model_cached(driver_id)
-
-    def _predict_stint(self, model: LSTMPaceModel, driver_id: int, compound: str, stint_len: int, context: RaceContext, base: float, slope: float, circuit_id: str) -> np.ndarray:
-        return _predict_stint_cached(
-            driver_id,
-            compound,
-            stint_len,
-            context.track_temp,
-            context.air_temp,
-            base,
-            slope,
-            circuit_id,
-        )
+    def _predict_stint(self, driver_id: int, compound: str, stint_len: int, context: RaceContext, circuit_id: str) -> np.ndarray:
+        """One compound's curve through the same grid and interpolation as
+        `_precompute_pace_curves_batch`; laps past the race repeat the last."""
+        grids = self._pace_curve_grids(context.year, circuit_id, [driver_id], context.total_laps, [compound])
+        curve = interpolate_grid(grids[driver_id][compound], _TRACK_AXIS, _AIR_AXIS, context.track_temp, context.air_temp)[0]
+        return np.concatenate([curve, np.repeat(curve[-1:], max(stint_len - len(curve), 0))])[:stint_len]
 
     def _candidate_strategies(self, total_laps: int, bounds: Dict[str, Tuple[int, int]]) -> List[StrategyCandidate]:
         compounds = [c for c in bounds.keys() if c in self.valid_compounds] or ["SOFT", "MEDIUM", "HARD"]
@@ -196,105 +227,192 @@ class StrategyEngine:
     def _cluster_key(self, candidate: StrategyCandidate) -> Tuple[int, ...]:
         return tuple(int(stop / PIT_WINDOW_BIN) for stop in candidate.stop_laps)
 
-    def _pace_curve_path(self, year: int, circuit_id: str, driver_id: int, context: RaceContext) -> Path:
-        PACE_CURVE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
-        circuit_safe = str(circuit_id).replace(" ", "_")
-        key = f"{year}_{circuit_safe}_{driver_id}_{context.track_temp:.1f}_{context.air_temp:.1f}.parquet"
-        return PACE_CURVE_CACHE_DIR / key
+    def _pace_grid_key(self, year: int, circuit_id: str, driver_id: int, compound: str) -> Tuple:
+        return (year, circuit_id, driver_id, compound, f"grid-{_GRID_SIGNATURE}", self.model_version)
 
-    def _precompute_pace_curves(self, year: int, circuit_id: str, driver_id: int, context: RaceContext) -> Dict[str, np.ndarray]:
-        path = self._pace_curve_path(year, circuit_id, driver_id, context)
-        if path.exists():
-            return _load_pace_curves_cached(str(path))
-
-        profile = load_driver_profile(driver_id)
-        model, _ = self._load_model(driver_id)
-        total_laps = context.total_laps
-
-        curves = {}
-        for compound in self.valid_compounds:
-            params = resolve_profile_params(profile, circuit_id, compound)
-            laps = np.arange(1, total_laps + 1)
-            base_series = (
-                params.base
-                + params.slope * (laps - 1)
-                + params.track_coef * (context.track_temp - params.track_ref)
-                + params.air_coef * (context.air_temp - params.air_ref)
-            )
-            df = pd.DataFrame({
-                "lap_number": laps,
-                "stint_age": laps,
-                "compound": compound,
-                "session_type": "RACE",
-                "circuit_id": circuit_id,
-                "track_temp": context.track_temp,
-                "air_temp": context.air_temp,
-                "lap_time": base_series,
-            })
-            curves[compound] = model.predict_stint(df)
+    def _profile_grid_frame(self, profile, circuit_id: str, compound: str, total_laps: int) -> pd.DataFrame:
+        """Synthetic stints for every (track, air) grid point, back to back."""
+        params = resolve_profile_params(profile, circuit_id, compound)
+        track, air = np.meshgrid(_TRACK_AXIS, _AIR_AXIS, indexing="ij")
+        track = np.repeat(track.ravel(), total_laps)
+        air = np.repeat(air.ravel(), total_laps)
+        laps = np.tile(np.arange(1, total_laps + 1), _TRACK_AXIS.size * _AIR_AXIS.size)
+        base_series = (
+            params.base
+            + params.slope * (laps - 1)
+            + params.track_coef * (track - params.track_ref)
+            + params.air_coef * (air - params.air_ref)
+        )
+        return pd.DataFrame({
+            "driver_id": profile.driver_id,
+            "lap_number": laps,
+            "stint_age": laps,
+            "compound": compound,
+            "session_type": "RACE",
+            "circuit_id": circuit_id,
+            "track_temp": track,
+            "air_temp": air,
+            "lap_time": base_series,
+        })
 
-        rows = []
-        for compound, series in curves.items():
-            for lap_idx, lap_time in enumerate(series, start=1):
-                rows.append({"lap": lap_idx, "compound": compound, "lap_time": float(lap_time)})
-        pd.DataFrame(rows).to_parquet(path, index=False)
+    def _pace_curve_grids(
+        self,
+        year: int,
+        circuit_id: str,
+        driver_ids: List[int],
+        total_laps: int,
+        compounds: List[str] | None = None,
+    ) -> Dict[int, Dict[str, np.ndarray]]:
+        """(n_track, n_air, laps) pace curves per driver and compound (every
+        valid compound unless `compounds` is given).
 
-        return curves
+        Grids are inferred once per (year, circuit, driver, compound) and kept
+        in the curve store; misses that share a model file (every driver with
+        the shared model, or those falling back to `global.joblib`) run in one
+        batched forward pass.
+        """
+        compounds = sorted(self.valid_compounds) if compounds is None else compounds
+        shape = (_TRACK_AXIS.size, _AIR_AXIS.size, total_laps)
+        result: Dict[int, Dict[str, np.ndarray]] = {}
+        pending: Dict[str, List[int]] = {}
+        for driver_id in dict.fromkeys(driver_ids):
+            grids = {}
+            for compound in compounds:
+                block = curve_store.get(self._pace_grid_key(year, circuit_id, driver_id, compound))
+                if block is None or block.shape != (shape[0] * shape[1], total_laps):
+                    break
+                grids[compound] = block.reshape(shape)
+            cache_event("curve_grid", len(grids) == len(compounds))
+            if len(grids) == len(compounds):
+                result[driver_id] = grids
+            else:
+                pending.setdefault(str(model_path(driver_id)), []).append(driver_id)
 
-    def _analytical_eval(
+        n_points = shape[0] * shape[1]
+        for path, group in pending.items():
+            with span("model_load"):
+                model, _ = model_registry.model_at(path)
+            frames = []
+            for driver_id in group:
+                profile = model_registry.profile(driver_id)
+                frames.extend(self._profile_grid_frame(profile, circuit_id, compound, total_laps) for compound in compounds)
+            with span("pace_inference"):
+                series = model.predict_concatenated(
+                    pd.concat(frames, ignore_index=True),
+                    [total_laps] * (n_points * len(frames)),
+                )
+            count("inferred_grids", len(frames))
+            for pos, driver_id in enumerate(group):
+                result[driver_id] = {}
+                for c_pos, compound in enumerate(compounds):
+                    start = (pos * len(compounds) + c_pos) * n_points
+                    block = curve_store.put(
+                        self._pace_grid_key(year, circuit_id, driver_id, compound),
+                        np.stack(series[start : start + n_points]),
+                        version=self.model_version,
+                    )
+                    result[driver_id][compound] = block.reshape(shape)
+
+        return result
+
+    def _precompute_pace_curves(self, year: int, circuit_id: str, driver_id: int, context: RaceContext) -> Dict[str, np.ndarray]:
+        return self._precompute_pace_curves_batch(year, circuit_id, [driver_id], context)[driver_id]
+
+    def _precompute_pace_curves_batch(
         self,
-        candidate: StrategyCandidate,
-        curves: Dict[str, np.ndarray],
+        year: int,
+        circuit_id: str,
+        driver_ids: List[int],
         context: RaceContext,
-        traffic_mu: float,
-        traffic_sigma: float,
-    ) -> Tuple[float, float]:
-        total_laps = context.total_laps
-        total_mean = 0.0
-        total_var = 0.0
+    ) -> Dict[int, Dict[str, np.ndarray]]:
+        """Pace curves at the context temperatures, interpolated from the grids."""
+        with span("pace_curves"):
+            grids = self._pace_curve_grids(year, circuit_id, driver_ids, context.total_laps)
+        return {
+            driver_id: {
+                compound: interpolate_grid(grid, _TRACK_AXIS, _AIR_AXIS, context.track_temp, context.air_temp)[0]
+                for compound, grid in by_compound.items()
+            }
+            for driver_id, by_compound in grids.items()
+        }
 
-        for stint_len, compound in zip(candidate.stint_lengths, candidate.compounds):
-            series = curves.get(compound.upper())
-            if series is None or len(series) < stint_len:
-                series = curves.get("MEDIUM", np.full(stint_len, 90.0))
-            total_mean += float(np.sum(series[:stint_len]))
-            total_mean += traffic_mu * stint_len
-            total_var += (traffic_sigma ** 2) * stint_len
+    def _stop_moments(self, total_laps: int, pit_loss, sc_probability) -> Tuple:
+        """Mean/variance of one stop's time loss; arrays broadcast elementwise."""
+        sc_range = max(1, total_laps - 9)
+        p_window = min(1.0, 5 / sc_range)
+        p_sc = sc_probability * p_window
+        normal = pit_loss
+        reduced = np.maximum(12.0, pit_loss - 8.0)
+        mean = p_sc * reduced + (1 - p_sc) * normal
+        var = p_sc * reduced**2 + (1 - p_sc) * normal**2 - mean**2
+        return mean, var
 
-        if candidate.stop_laps:
-            sc_range = max(1, context.total_laps - 9)
-            for stop in candidate.stop_laps:
-                p_window = min(1.0, 5 / sc_range)
-                p_sc = context.sc_probability * p_window
-                normal = context.pit_loss
-                reduced = max(12.0, context.pit_loss - 8.0)
-                mean = p_sc * reduced + (1 - p_sc) * normal
-                var = p_sc * reduced**2 + (1 - p_sc) * normal**2 - mean**2
-                total_mean += mean
-                total_var += var
-        else:
-            total_mean += 0.0
-
-        sc_mean = context.sc_probability * 15.0
-        sc_var = context.sc_probability * (15.0**2) - sc_mean**2
-        total_mean += sc_mean
-        total_var += sc_var
-
-        return total_mean, total_var
+    def _curve_prefix_sums(self, curves: Dict[str, np.ndarray], total_laps: int) -> np.ndarray:
+        table = np.zeros((len(COMPOUND_ORDER), total_laps + 1))
+        fallback = curves.get("MEDIUM", np.full(total_laps, 90.0))
+        for idx, compound in enumerate(COMPOUND_ORDER):
+            series = curves.get(compound)
+            if series is None or len(series) < total_laps:
+                series = fallback
+            sums = np.cumsum(np.asarray(series[:total_laps], dtype=float))
+            table[idx, 1 : sums.size + 1] = sums
+            table[idx, sums.size + 1 :] = sums[-1] if sums.size else 0.0
+        return table
+
+    def _candidate_moments(
+        self,
+        total_laps: int,
+        race_laps: np.ndarray,
+        n_stops: np.ndarray,
+        stint_time: np.ndarray,
+        pit_loss,
+        sc_probability,
+        traffic_mu: float = 0.15,
+        traffic_sigma: float = 0.05,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Expected total time and variance from summed stint times.
+
+        `stint_time` is (..., n_candidates) and `race_laps`/`n_stops` are
+        per candidate; `pit_loss` and `sc_probability` are scalars or arrays
+        broadcasting against `stint_time`.
+        """
+        stop_mean, stop_var = self._stop_moments(total_laps, pit_loss, sc_probability)
+        sc_mean = sc_probability * 15.0
+        sc_var = sc_probability * (15.0**2) - sc_mean**2
+
+        means = stint_time + traffic_mu * race_laps + n_stops * stop_mean + sc_mean
+        variances = (traffic_sigma**2) * race_laps + n_stops * stop_var + sc_var
+        return means, variances
+
+    def _analytical_scores(self, setup: RaceSetup, curves: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Expected total time and variance of every candidate, as arrays."""
+        context = setup.context
+        with span("analytical"):
+            prefix = self._curve_prefix_sums(curves, context.total_laps)
+            stint_time = prefix[setup.compound_idx, setup.stint_lengths].sum(axis=1)
+            return self._candidate_moments(
+                context.total_laps,
+                setup.stint_lengths.sum(axis=1),
+                setup.n_stops,
+                stint_time,
+                context.pit_loss,
+                context.sc_probability,
+            )
 
     def _simulate_strategy(
         self,
-        model: LSTMPaceModel,
         driver_id: int,
         candidate: StrategyCandidate,
         context: RaceContext,
-        stats: Dict[str, Dict[str, float]],
         circuit_id: str,
         n_sim: int = 200,
+        rng: np.random.Generator | None = None,
+        curves: Dict[str, np.ndarray] | None = None,
     ) -> Tuple[float, float, List[float]]:
         n_sim = max(n_sim, 1)
-        sc_events = np.random.rand(n_sim) < context.sc_probability
-        sc_laps = np.random.randint(5, max(6, context.total_laps - 5), size=n_sim)
+        rng = rng if rng is not None else np.random.default_rng(RANDOM_SEED)
+        sc_events = rng.random(n_sim) < context.sc_probability
+        sc_laps = rng.integers(5, max(6, context.total_laps - 5), size=n_sim)
 
         pit_loss = np.full(n_sim, context.pit_loss, dtype=float)
         if candidate.stop_laps:
@@ -306,15 +424,14 @@ class StrategyEngine:
         traffic_mu = 0.15
         traffic_sigma = 0.05
 
-        curves = self._precompute_pace_curves(context.year, circuit_id, driver_id, context)
+        if curves is None:
+            curves = self._precompute_pace_curves(context.year, circuit_id, driver_id, context)
         for stint_len, compound in zip(candidate.stint_lengths, candidate.compounds):
             series = curves.get(compound.upper())
             if series is None or len(series) < stint_len:
-                base = stats.get(compound.upper(), {}).get("base", 90.0)
-                slope = stats.get(compound.upper(), {}).get("slope", 0.05)
-                series = self._predict_stint(model, driver_id, compound.upper(), stint_len, context, base, slope, circuit_id)
+                series = self._predict_stint(driver_id, compound.upper(), stint_len, context, circuit_id)
             base_sum = float(np.sum(series[:stint_len]))
-            noise = np.random.normal(
+            noise = rng.normal(
                 traffic_mu * stint_len,
                 traffic_sigma * math.sqrt(stint_len),
                 size=n_sim,
@@ -352,21 +469,219 @@ class StrategyEngine:
             life = np.clip(life, 0.0, 100.0)
 
             end_lap = current_lap + stint_len - 1
+            tyre_life = np.round(life, 4).tolist()
             stint_payload.append(
                 {
                     "compound": compound,
                     "start_lap": current_lap,
                     "end_lap": end_lap,
-                    "lap_time_data": [float(round(v, 4)) for v in raw.tolist()],
-                    "tyre_life_data": [float(round(v, 4)) for v in life.tolist()],
+                    "lap_time_data": np.round(raw, 4).tolist(),
+                    "tyre_life_data": tyre_life,
                     # Legacy field kept for compatibility with previous UI versions.
-                    "degradation_data": [float(round(v, 4)) for v in life.tolist()],
+                    # Same list object, so pickling to the API ships it once;
+                    # clients that pass legacy=false never receive it.
+                    "degradation_data": tyre_life,
                 }
             )
             current_lap = end_lap + 1
 
         return stint_payload
 
+    def _race_setup(self, year: int, circuit_id: str) -> RaceSetup:
+        key = (year, circuit_id)
+        cache_event("setup", key in self._setups)
+        if key in self._setups:
+            return self._setups[key]
+
+        with span("context"):
+            context = self._context(year, circuit_id)
+        with span("bounds"):
+            bounds = self._tyre_life_bounds(year, circuit_id)
+        with span("candidates"):
+            candidates = self._candidate_strategies(context.total_laps, bounds)
+        count("candidates", len(candidates))
+
+        max_stints = max((len(c.stint_lengths) for c in candidates), default=1)
+        compound_idx = np.zeros((len(candidates), max_stints), dtype=np.intp)
+        stint_lengths = np.zeros((len(candidates), max_stints), dtype=np.intp)
+        for row, candidate in enumerate(candidates):
+            for col, (compound, stint_len) in enumerate(zip(candidate.compounds, candidate.stint_lengths)):
+                compound_idx[row, col] = COMPOUND_ORDER.index(compound.upper())
+                stint_lengths[row, col] = stint_len
+        n_stops = np.array([len(c.stop_laps) for c in candidates], dtype=float)
+
+        setup = RaceSetup(context, bounds, candidates, compound_idx, stint_lengths, n_stops)
+        self._setups[key] = setup
+        return setup
+
+    def _rank(
+        self,
+        setup: RaceSetup,
+        scores: Tuple[np.ndarray, np.ndarray],
+        risk_bias: float,
+        opponent_best: float | None = None,
+    ) -> List[Tuple[float, float, float, int]]:
+        """(score, mean, var, candidate index) sorted by risk-adjusted score."""
+        with span("ranking"):
+            means, variances = scores
+            risk = means + risk_bias * variances
+            if opponent_best is not None:
+                risk = risk + np.maximum(means - opponent_best, 0.0) * 0.25
+            order = np.argsort(risk, kind="stable")
+            return [(float(risk[i]), float(means[i]), float(variances[i]), int(i)) for i in order]
+
+    def _best_score(self, scores: Tuple[np.ndarray, np.ndarray], risk_bias: float) -> float | None:
+        means, variances = scores
+        if means.size == 0:
+            return None
+        return float(np.min(means + risk_bias * variances))
+
+    def _strategy_id(self, year: int, circuit_id: str, driver_id: int, candidate: StrategyCandidate) -> str:
+        strategy_fingerprint = {
+            "year": year,
+            "circuit_id": circuit_id,
+            "driver_id": driver_id,
+            "type": candidate.strategy_type,
+            "compounds": candidate.compounds,
+            "stints": candidate.stint_lengths,
+            "stop_laps": candidate.stop_laps,
+            "pit_windows": candidate.pit_windows,
+        }
+        return hashlib.sha1(
+            json.dumps(strategy_fingerprint, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def _refine_candidates(
+        self,
+        setup: RaceSetup,
+        year: int,
+        circuit_id: str,
+        driver_id: int,
+        indices: List[int],
+        curves: Dict[str, np.ndarray],
+    ) -> Dict[int, Tuple[float, float]]:
+        refined = {}
+        count("mc_candidates", len(indices))
+        with span("monte_carlo"):
+            for idx in indices:
+                # Seeded per candidate so a refinement does not depend on which
+                # other candidates were simulated before it, or in which process.
+                mc_mean, mc_var, _ = self._simulate_strategy(
+                    driver_id,
+                    setup.candidates[idx],
+                    setup.context,
+                    circuit_id,
+                    n_sim=200,
+                    rng=np.random.default_rng([RANDOM_SEED, idx]),
+                    curves=curves,
+                )
+                refined[idx] = (mc_mean, mc_var)
+        return refined
+
+    def _finalize(
+        self,
+        setup: RaceSetup,
+        year: int,
+        circuit_id: str,
+        driver_id: int,
+        ranked: List[Tuple[float, float, float, int]],
+        curves: Dict[str, np.ndarray],
+        risk_bias: float,
+        n_strategies: int,
+        debug_profile: bool,
+        refined: Dict[int, Tuple[float, float]] | None = None,
+    ) -> Dict:
+        if refined is None:
+            topk = [idx for *_, idx in ranked[:MC_TOP_K]]
+            refined = self._refine_candidates(setup, year, circuit_id, driver_id, topk, curves)
+
+        with span("payload"):
+            final = []
+            seen = set()
+            for score, mean, var, idx in ranked:
+                candidate = setup.candidates[idx]
+                if idx in refined:
+                    mean, var = refined[idx]
+                    score = mean + risk_bias * var
+                key = self._cluster_key(candidate)
+                if key in seen:
+                    continue
+                seen.add(key)
+                final.append({
+                    **self._strategy_entry(setup, year, circuit_id, driver_id, idx, curves, mean, var),
+                    "risk_score": score,
+                })
+                if len(final) >= n_strategies:
+                    break
+
+            return self._response(setup, year, circuit_id, driver_id, "strategies", final, debug_profile)
+
+    def _strategy_entry(
+        self,
+        setup: RaceSetup,
+        year: int,
+        circuit_id: str,
+        driver_id: int,
+        idx: int,
+        curves: Dict[str, np.ndarray],
+        mean: float,
+        var: float,
+    ) -> Dict:
+        candidate = setup.candidates[idx]
+        return {
+            "strategy_id": self._strategy_id(year, circuit_id, driver_id, candidate),
+            "type": candidate.strategy_type,
+            "compounds": candidate.compounds,
+            "stints": candidate.stint_lengths,
+            "stint_curves": self._stint_curves(candidate, curves),
+            "pit_windows": candidate.pit_windows,
+            "stop_laps": candidate.stop_laps,
+            "expected_time": mean,
+            "variance": var,
+        }
+
+    def _response(
+        self,
+        setup: RaceSetup,
+        year: int,
+        circuit_id: str,
+        driver_id: int,
+        field: str,
+        entries: List[Dict],
+        debug_profile: bool,
+    ) -> Dict:
+        """Context + `field: entries` + degradation summary for one driver."""
+        context = setup.context
+        stats = self._compound_stats(driver_id, year, circuit_id)
+        degradation = {}
+        for compound, vals in stats.items():
+            base = vals["base"]
+            slope = vals["slope"]
+            degradation[compound] = {
+                "base": base,
+                "slope": slope,
+                "curve": [base + slope * i for i in range(1, min(30, context.total_laps) + 1)],
+            }
+
+        response = {
+            "context": {
+                "total_laps": context.total_laps,
+                "track_temp": context.track_temp,
+                "air_temp": context.air_temp,
+                "pit_loss": context.pit_loss,
+                "sc_probability": context.sc_probability,
+            },
+            field: entries,
+            "degradation": degradation,
+        }
+        if debug_profile:
+            profile = model_registry.profile(driver_id)
+            response["driver_profile"] = {
+                "driver_id": driver_id,
+                "defaults": {k: vars(v) for k, v in profile.driver_defaults.items()},
+            }
+        return response
+
     def generate_strategies(
         self,
         year: int,
@@ -376,173 +691,460 @@ class StrategyEngine:
         n_strategies: int = DEFAULT_STRATEGY_COUNT,
         opponent_id: int | None = None,
         debug_profile: bool = False,
+        refined: Dict[int, Tuple[float, float]] | None = None,
     ) -> Dict:
-        context = self._context(year, circuit_id)
-        stats = self._compound_stats(driver_id, year, circuit_id)
-        bounds = self._tyre_life_bounds(year, circuit_id)
-        model, _ = self._load_model(driver_id)
-        curves = self._precompute_pace_curves(year, circuit_id, driver_id, context)
+        """Rank strategies for one driver.
+
+        `refined` maps candidate index -> (MC mean, MC variance). When omitted
+        the top-K candidates are refined here; an empty mapping returns the
+        purely analytical ranking.
+        """
+        setup = self._race_setup(year, circuit_id)
+        curves = self._precompute_pace_curves(year, circuit_id, driver_id, setup.context)
 
-        candidates = self._candidate_strategies(context.total_laps, bounds)
         opponent_best = None
         if opponent_id is not None:
-            opp_curves = self._precompute_pace_curves(year, circuit_id, opponent_id, context)
-            opp_candidates = self._candidate_strategies(context.total_laps, bounds)
-            opp_scores = []
-            for opp_candidate in opp_candidates:
-                mean, var = self._analytical_eval(
-                    opp_candidate,
-                    opp_curves,
-                    context,
-                    traffic_mu=0.15,
-                    traffic_sigma=0.05,
-                )
-                opp_scores.append(mean + risk_bias * var)
-            if opp_scores:
-                opponent_best = float(min(opp_scores))
-        ranked = []
-
-        for candidate in candidates:
-            mean, var = self._analytical_eval(
-                candidate,
-                curves,
-                context,
-                traffic_mu=0.15,
-                traffic_sigma=0.05,
-            )
-            score = mean + risk_bias * var
-            if opponent_best is not None and mean > opponent_best:
-                score += (mean - opponent_best) * 0.25
-            ranked.append((score, mean, var, candidate))
+            opp_curves = self._precompute_pace_curves(year, circuit_id, opponent_id, setup.context)
+            opponent_best = self._best_score(self._analytical_scores(setup, opp_curves), risk_bias)
+
+        ranked = self._rank(setup, self._analytical_scores(setup, curves), risk_bias, opponent_best)
+        return self._finalize(
+            setup, year, circuit_id, driver_id, ranked, curves, risk_bias, n_strategies, debug_profile, refined
+        )
+
+    def _pareto_front(self, means: np.ndarray, variances: np.ndarray) -> List[int]:
+        """Indices not dominated in (mean, variance), by ascending mean."""
+        front = []
+        best_var = np.inf
+        for idx in np.lexsort((variances, means)):
+            if variances[idx] < best_var:
+                front.append(int(idx))
+                best_var = variances[idx]
+        return front
+
+    def _risk_ranges(
+        self,
+        front: List[int],
+        means: np.ndarray,
+        variances: np.ndarray,
+    ) -> Dict[int, Tuple[float, float | None]]:
+        """risk_bias interval on which each front member minimises
+        `mean + risk_bias * var` (the lower convex hull of the front); members
+        off the hull are never optimal and get no interval. None = unbounded.
+        """
+        ranges: Dict[int, Tuple[float, float | None]] = {}
+        pos, low = 0, 0.0
+        while pos < len(front):
+            current = front[pos]
+            nxt, cross = None, None
+            for j in range(pos + 1, len(front)):
+                other = front[j]
+                lam = float((means[other] - means[current]) / (variances[current] - variances[other]))
+                if cross is None or lam <= cross:
+                    nxt, cross = j, lam
+            if nxt is None:
+                ranges[current] = (low, None)
+                break
+            if cross > low:
+                ranges[current] = (low, cross)
+                low = cross
+            pos = nxt
+        return ranges
+
+    def generate_pareto(self, year: int, circuit_id: str, driver_id: int, debug_profile: bool = False) -> Dict:
+        """Mean/variance Pareto front of the candidates for one driver.
+
+        Front members are MC-refined and tagged with the `risk_bias` range on
+        which each one has the best `mean + risk_bias * var`, so clients can
+        move a risk slider without a new request.
+        """
+        setup = self._race_setup(year, circuit_id)
+        curves = self._precompute_pace_curves(year, circuit_id, driver_id, setup.context)
+        means, variances = (np.array(a, dtype=float) for a in self._analytical_scores(setup, curves))
+
+        # Seed MC with the first non-dominated layers (at least MC_TOP_K
+        # candidates), then keep refining until the front is all MC values.
+        seeds: List[int] = []
+        remaining = np.arange(len(means))
+        while len(seeds) < MC_TOP_K and remaining.size:
+            layer = remaining[self._pareto_front(means[remaining], variances[remaining])]
+            seeds.extend(int(idx) for idx in layer)
+            remaining = np.setdiff1d(remaining, layer)
 
-        ranked.sort(key=lambda x: x[0])
+        refined: Dict[int, Tuple[float, float]] = {}
+        pending = seeds
+        while pending:
+            refined.update(self._refine_candidates(setup, year, circuit_id, driver_id, pending, curves))
+            for idx in pending:
+                means[idx], variances[idx] = refined[idx]
+            front = self._pareto_front(means, variances)
+            pending = [idx for idx in front if idx not in refined]
 
-        final = []
         seen = set()
-        topk = ranked[:MC_TOP_K]
-        refined = {}
-        for score, mean, var, candidate in topk:
-            mc_mean, mc_var, _ = self._simulate_strategy(
-                model,
-                driver_id,
-                candidate,
-                context,
-                stats,
-                circuit_id,
-                n_sim=200,
+        unique = []
+        for idx in front:
+            key = self._cluster_key(setup.candidates[idx])
+            if key not in seen:
+                seen.add(key)
+                unique.append(idx)
+
+        ranges = self._risk_ranges(unique, means, variances)
+        entries = []
+        for idx in unique:
+            risk_range = ranges.get(idx)
+            entries.append({
+                **self._strategy_entry(setup, year, circuit_id, driver_id, idx, curves, float(means[idx]), float(variances[idx])),
+                "risk_bias_range": list(risk_range) if risk_range else None,
+            })
+        return self._response(setup, year, circuit_id, driver_id, "front", entries, debug_profile)
+
+    def refinement_targets(self, year: int, circuit_id: str, driver_id: int, risk_bias: float = DEFAULT_RISK_LAMBDA) -> List[Dict]:
+        """Top-K candidates that `generate_strategies` would refine with MC."""
+        setup = self._race_setup(year, circuit_id)
+        curves = self._precompute_pace_curves(year, circuit_id, driver_id, setup.context)
+        ranked = self._rank(setup, self._analytical_scores(setup, curves), risk_bias)
+        return [
+            {
+                "candidate_index": idx,
+                "strategy_id": self._strategy_id(year, circuit_id, driver_id, setup.candidates[idx]),
+            }
+            for *_, idx in ranked[:MC_TOP_K]
+        ]
+
+    def refine_strategy(self, year: int, circuit_id: str, driver_id: int, candidate_index: int) -> Tuple[float, float]:
+        setup = self._race_setup(year, circuit_id)
+        curves = self._precompute_pace_curves(year, circuit_id, driver_id, setup.context)
+        refined = self._refine_candidates(setup, year, circuit_id, driver_id, [candidate_index], curves)
+        return refined[candidate_index]
+
+    def generate_comparison(
+        self,
+        year: int,
+        circuit_id: str,
+        driver_id: int,
+        teammate_id: int,
+        risk_bias: float = DEFAULT_RISK_LAMBDA,
+        n_strategies: int = DEFAULT_STRATEGY_COUNT,
+        debug_profile: bool = False,
+    ) -> Tuple[Dict, Dict]:
+        """Compare mode: equivalent to two `generate_strategies` calls with each
+        driver as the other's opponent, but the race setup, pace curves and
+        analytical ranking of each driver are computed once and shared, and the
+        two drivers' independent stages run concurrently.
+        """
+        setup = self._race_setup(year, circuit_id)
+        curves = self._precompute_pace_curves_batch(year, circuit_id, [driver_id, teammate_id], setup.context)
+        scores = {did: self._analytical_scores(setup, curves[did]) for did in curves}
+
+        def finalize(did: int, opponent_id: int) -> Dict:
+            ranked = self._rank(setup, scores[did], risk_bias, self._best_score(scores[opponent_id], risk_bias))
+            return self._finalize(setup, year, circuit_id, did, ranked, curves[did], risk_bias, n_strategies, debug_profile)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            # Each thread runs in a copy of this context so its spans land in the same profile.
+            driver_future = pool.submit(copy_context().run, finalize, driver_id, teammate_id)
+            teammate_future = pool.submit(copy_context().run, finalize, teammate_id, driver_id)
+            return driver_future.result(), teammate_future.result()
+
+    def generate_batch(
+        self,
+        year: int,
+        circuit_id: str,
+        rows: List[Dict],
+        debug_profile: bool = False,
+    ) -> List[Dict]:
+        """One `generate_strategies` result per row (`driver_id`, `risk_bias`,
+        `n_strategies`) for a single race, sharing the race setup and batching
+        pace-curve inference across drivers.
+        """
+        setup = self._race_setup(year, circuit_id)
+        driver_ids = [int(row["driver_id"]) for row in rows]
+        curves = self._precompute_pace_curves_batch(year, circuit_id, driver_ids, setup.context)
+        scores = {did: self._analytical_scores(setup, curves[did]) for did in curves}
+
+        results = []
+        for row, did in zip(rows, driver_ids):
+            risk_bias = float(row.get("risk_bias", DEFAULT_RISK_LAMBDA))
+            ranked = self._rank(setup, scores[did], risk_bias)
+            results.append(
+                self._finalize(
+                    setup,
+                    year,
+                    circuit_id,
+                    did,
+                    ranked,
+                    curves[did],
+                    risk_bias,
+                    int(row.get("n_strategies", DEFAULT_STRATEGY_COUNT)),
+                    debug_profile,
+                )
             )
-            refined[id(candidate)] = (mc_mean, mc_var)
+        return results
 
-        for score, mean, var, candidate in ranked:
-            if id(candidate) in refined:
-                mean, var = refined[id(candidate)]
-                score = mean + risk_bias * var
-            key = self._cluster_key(candidate)
-            if key in seen:
-                continue
-            seen.add(key)
-            strategy_fingerprint = {
-                "year": year,
-                "circuit_id": circuit_id,
-                "driver_id": driver_id,
+    def sweep(
+        self,
+        year: int,
+        circuit_id: str,
+        driver_id: int,
+        pit_loss: List[float] | None = None,
+        sc_probability: List[float] | None = None,
+        track_temp: List[float] | None = None,
+        air_temp: List[float] | None = None,
+        risk_bias: List[float] | None = None,
+    ) -> Dict:
+        """Best analytical strategy at every point of a what-if parameter grid.
+
+        Axes left as None use the race context (and the default risk bias).
+        The grid is scored against every candidate in one broadcast over
+        (pit_loss, sc_probability, track_temp, air_temp, risk_bias, candidate);
+        temperatures come from the interpolated pace-curve grids, so no model
+        call is made per point.
+        """
+        setup = self._race_setup(year, circuit_id)
+        context = setup.context
+        axes = {
+            "pit_loss": pit_loss or [context.pit_loss],
+            "sc_probability": sc_probability or [context.sc_probability],
+            "track_temp": track_temp or [context.track_temp],
+            "air_temp": air_temp or [context.air_temp],
+            "risk_bias": risk_bias or [DEFAULT_RISK_LAMBDA],
+        }
+        pit, sc, track, air, risk = (np.asarray(v, dtype=float) for v in axes.values())
+
+        grids = self._pace_curve_grids(year, circuit_id, [driver_id], context.total_laps)[driver_id]
+        track_pts, air_pts = (g.ravel() for g in np.meshgrid(track, air, indexing="ij"))
+        prefix = np.zeros((track_pts.size, len(COMPOUND_ORDER), context.total_laps + 1))
+        for idx, compound in enumerate(COMPOUND_ORDER):
+            grid = grids.get(compound, grids.get("MEDIUM"))
+            if grid is None:
+                series = np.full((track_pts.size, context.total_laps), 90.0)
+            else:
+                series = interpolate_grid(grid, _TRACK_AXIS, _AIR_AXIS, track_pts, air_pts)
+            prefix[:, idx, 1:] = np.cumsum(series, axis=1)
+        stint_time = prefix[:, setup.compound_idx, setup.stint_lengths].sum(axis=-1)
+
+        # Axis order: pit_loss, sc_probability, track_temp, air_temp, risk_bias, candidate.
+        means, variances = self._candidate_moments(
+            context.total_laps,
+            setup.stint_lengths.sum(axis=1),
+            setup.n_stops,
+            stint_time.reshape(track.size, air.size, 1, -1)[None, None],
+            pit[:, None, None, None, None, None],
+            sc[None, :, None, None, None, None],
+        )
+        scores = means + risk[:, None] * variances
+        best = scores.argmin(axis=-1)[..., None]
+        best_mean = np.take_along_axis(np.broadcast_to(means, scores.shape), best, axis=-1)[..., 0]
+        best_var = np.take_along_axis(np.broadcast_to(variances, scores.shape), best, axis=-1)[..., 0]
+        best_score = np.take_along_axis(scores, best, axis=-1)[..., 0]
+
+        used, position = np.unique(best[..., 0], return_inverse=True)
+        strategies = []
+        for idx in used:
+            candidate = setup.candidates[idx]
+            strategies.append({
+                "strategy_id": self._strategy_id(year, circuit_id, driver_id, candidate),
                 "type": candidate.strategy_type,
                 "compounds": candidate.compounds,
                 "stints": candidate.stint_lengths,
                 "stop_laps": candidate.stop_laps,
-                "pit_windows": candidate.pit_windows,
-            }
-            strategy_id = hashlib.sha1(
-                json.dumps(strategy_fingerprint, sort_keys=True, separators=(",", ":")).encode("utf-8")
-            ).hexdigest()[:16]
-            final.append({
-                "strategy_id": strategy_id,
+            })
+
+        return {
+            "dims": list(axes),
+            "axes": {name: [float(v) for v in values] for name, values in axes.items()},
+            "strategies": strategies,
+            "best_strategy": position.reshape(best_score.shape).tolist(),
+            "expected_time": np.round(best_mean, 3).tolist(),
+            "variance": np.round(best_var, 3).tolist(),
+            "risk_score": np.round(best_score, 3).tolist(),
+        }
+
+    def _live_prefix(self, year: int, circuit_id: str, driver_id: int, context: RaceContext, length: int) -> np.ndarray:
+        """(compound, tyre age) prefix sums of the pace curves up to `length` laps.
+
+        Ages past the end of a curve repeat its last lap, so used sets carried
+        from earlier sessions can still be scored. `length` (tyre age + laps
+        left) stays constant while a driver keeps the same set, so successive
+        laps reuse one table.
+        """
+        key = (year, circuit_id, driver_id, length)
+        table = self._live_prefixes.get(key)
+        if table is None:
+            curves = self._precompute_pace_curves(year, circuit_id, driver_id, context)
+            fallback = curves.get("MEDIUM", np.full(context.total_laps, 90.0))
+            table = np.zeros((len(COMPOUND_ORDER), length + 1))
+            for idx, compound in enumerate(COMPOUND_ORDER):
+                series = np.asarray(curves.get(compound, fallback), dtype=float)[:length]
+                if series.size < length:
+                    series = np.concatenate([series, np.full(length - series.size, series[-1])])
+                table[idx, 1:] = np.cumsum(series)
+            self._live_prefixes[key] = table
+        return table
+
+    def _live_plans(
+        self,
+        bounds: Dict[str, Tuple[int, int]],
+        remaining: int,
+        current: int,
+        tyre_age: int,
+        used: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(compound_idx, stint_lengths) arrays of shape (n_plans, 3) for the
+        rest of the race.
+
+        Stint 0 stays on the current set for at least the lap in progress and
+        at most two fresh stints follow; unused stints have length 0. Fresh stints respect
+        the compound's tyre-life bound, the current set is not run past its
+        own, and at least two dry compounds must be used over the race.
+        """
+        max_life = np.array([bounds.get(c, (1, remaining))[1] for c in COMPOUND_ORDER])
+        cap0 = min(remaining, max(int(max_life[current]) - tyre_age, 1))
+        n_comp = len(COMPOUND_ORDER)
+
+        blocks = []
+        if remaining <= cap0:
+            blocks.append(np.array([[remaining, 0, 0, 0, 0]]))
+        if remaining >= 2:
+            s0, c1 = np.meshgrid(np.arange(1, min(cap0, remaining - 1) + 1), np.arange(n_comp), indexing="ij")
+            s0, c1 = s0.ravel(), c1.ravel()
+            blocks.append(np.column_stack([s0, remaining - s0, np.zeros_like(s0), c1, np.zeros_like(s0)]))
+        if remaining >= 3:
+            s0, l1, c1, c2 = (
+                g.ravel()
+                for g in np.meshgrid(
+                    np.arange(1, min(cap0, remaining - 2) + 1),
+                    np.arange(1, remaining),
+                    np.arange(n_comp),
+                    np.arange(n_comp),
+                    indexing="ij",
+                )
+            )
+            l2 = remaining - s0 - l1
+            keep = l2 >= 1
+            blocks.append(np.column_stack([s0, l1, l2, c1, c2])[keep])
+
+        plans = np.concatenate(blocks) if blocks else np.zeros((0, 5), dtype=int)
+        lengths = plans[:, :3]
+        compound_idx = np.column_stack([np.full(len(plans), current), plans[:, 3:]])
+
+        fresh_ok = ((lengths[:, 1:] == 0) | (lengths[:, 1:] <= max_life[compound_idx[:, 1:]])).all(axis=1)
+        run = used[None, :].repeat(len(plans), axis=0)
+        run[:, current] = True
+        for col in (1, 2):
+            active = lengths[:, col] > 0
+            run[active, compound_idx[active, col]] = True
+        keep = fresh_ok & (run.sum(axis=1) >= 2)
+        return compound_idx[keep], lengths[keep]
+
+    def generate_live(
+        self,
+        year: int,
+        circuit_id: str,
+        driver_id: int,
+        current_lap: int,
+        compound: str,
+        tyre_age: int,
+        used_compounds: List[str] | None = None,
+        gap_ahead: float | None = None,
+        gap_behind: float | None = None,
+        risk_bias: float = DEFAULT_RISK_LAMBDA,
+        n_strategies: int = DEFAULT_STRATEGY_COUNT,
+    ) -> Dict:
+        """Re-optimise the rest of the race from the current lap state.
+
+        `current_lap` is the last completed lap and `tyre_age` the laps done
+        on the current set; the earliest stop is at the end of the next lap
+        (`pit_now`). Only the remaining-race suffix is planned: every
+        plan is scored analytically in one pass from cached prefix sums, so a
+        per-lap update costs a few milliseconds. Times are for the remaining
+        laps only. Raises ValueError for a race that is already over, a set
+        older than the race or a compound outside `COMPOUND_ORDER`.
+        """
+        setup = self._race_setup(year, circuit_id)
+        context = setup.context
+        if current_lap >= context.total_laps:
+            raise ValueError(f"current_lap {current_lap} is not before the finish ({context.total_laps} laps).")
+        if tyre_age > context.total_laps:
+            raise ValueError(f"tyre_age {tyre_age} exceeds the race distance ({context.total_laps} laps).")
+        used_set = {u.upper() for u in used_compounds or []}
+        unknown = sorted((used_set | {compound.upper()}) - set(COMPOUND_ORDER))
+        if unknown:
+            raise ValueError(f"Unknown compounds {unknown}; expected {list(COMPOUND_ORDER)}.")
+        remaining = context.total_laps - current_lap
+        current = COMPOUND_ORDER.index(compound.upper())
+        used = np.array([c in used_set for c in COMPOUND_ORDER])
+
+        prefix = self._live_prefix(year, circuit_id, driver_id, context, max(context.total_laps, tyre_age + remaining))
+        compound_idx, lengths = self._live_plans(setup.bounds, remaining, current, tyre_age, used)
+        n_stops = (lengths[:, 1:] > 0).sum(axis=1)
+
+        stint_time = (
+            prefix[current, tyre_age + lengths[:, 0]]
+            - prefix[current, tyre_age]
+            + prefix[compound_idx[:, 1], lengths[:, 1]]
+            + prefix[compound_idx[:, 2], lengths[:, 2]]
+        )
+        means, variances = self._candidate_moments(
+            context.total_laps,
+            remaining,
+            n_stops,
+            stint_time,
+            context.pit_loss,
+            context.sc_probability * remaining / max(context.total_laps, 1),
+        )
+        stop_soon = (n_stops > 0) & (lengths[:, 0] <= LIVE_GAP_HORIZON_LAPS)
+        if gap_behind is not None and context.pit_loss > gap_behind:
+            means = means + np.where(stop_soon, LIVE_REJOIN_TRAFFIC_LOSS, 0.0)
+        if gap_ahead is not None and gap_ahead < LIVE_DIRTY_AIR_GAP:
+            means = means + LIVE_DIRTY_AIR_LOSS * np.minimum(lengths[:, 0], LIVE_GAP_HORIZON_LAPS)
+        scores = means + risk_bias * variances
+
+        strategies = []
+        seen = set()
+        for idx in np.argsort(scores, kind="stable"):
+            stints = [(COMPOUND_ORDER[c], int(n)) for c, n in zip(compound_idx[idx], lengths[idx]) if n > 0]
+            stop_laps = [int(current_lap + lap) for lap in np.cumsum(lengths[idx])[: n_stops[idx]]]
+            candidate = StrategyCandidate(
+                strategy_type=f"{n_stops[idx]}-stop",
+                compounds=[c for c, _ in stints],
+                stint_lengths=[n for _, n in stints],
+                pit_windows=[
+                    {"lap_min": max(current_lap, lap - 2), "lap_max": min(context.total_laps - 1, lap + 2)}
+                    for lap in stop_laps
+                ],
+                stop_laps=stop_laps,
+            )
+            key = (tuple(candidate.compounds), self._cluster_key(candidate))
+            if key in seen:
+                continue
+            seen.add(key)
+            strategies.append({
+                "strategy_id": self._strategy_id(year, circuit_id, driver_id, candidate),
                 "type": candidate.strategy_type,
                 "compounds": candidate.compounds,
                 "stints": candidate.stint_lengths,
-                "stint_curves": self._stint_curves(candidate, curves),
                 "pit_windows": candidate.pit_windows,
                 "stop_laps": candidate.stop_laps,
-                "expected_time": mean,
-                "variance": var,
-                "risk_score": score,
+                "pit_now": bool(n_stops[idx] and lengths[idx, 0] == 1),
+                "expected_time": float(means[idx]),
+                "variance": float(variances[idx]),
+                "risk_score": float(scores[idx]),
             })
-            if len(final) >= n_strategies:
+            if len(strategies) >= n_strategies:
                 break
 
-        degradation = {}
-        for compound, vals in stats.items():
-            base = vals["base"]
-            slope = vals["slope"]
-            degradation[compound] = {
-                "base": base,
-                "slope": slope,
-                "curve": [base + slope * i for i in range(1, min(30, context.total_laps) + 1)],
-            }
-
-        response = {
+        return {
             "context": {
                 "total_laps": context.total_laps,
                 "track_temp": context.track_temp,
                 "air_temp": context.air_temp,
                 "pit_loss": context.pit_loss,
                 "sc_probability": context.sc_probability,
+                "current_lap": current_lap,
+                "remaining_laps": remaining,
+                "compound": COMPOUND_ORDER[current],
+                "tyre_age": tyre_age,
             },
-            "strategies": final,
-            "degradation": degradation,
+            "strategies": strategies,
         }
-        if debug_profile:
-            profile = load_driver_profile(driver_id)
-            response["driver_profile"] = {
-                "driver_id": driver_id,
-                "defaults": {k: vars(v) for k, v in profile.driver_defaults.items()},
-            }
-        return response
-
-
-@lru_cache(maxsize=16)
-def _load_model_cached(driver_id: int) -> Tuple[LSTMPaceModel, int]:
-    path = MODELS_DIR / f"driver_{driver_id}.joblib"
-    if not path.exists():
-        path = MODELS_DIR / "global.joblib"
-    payload = joblib.load(path)
-    bundle: ModelBundle = payload["bundle"]
-    input_dim = payload["input_dim"]
-    model = LSTMPaceModel(context_len=payload["context_len"])
-    model.load(bundle, input_dim)
-    return model, input_dim
-
-
-@lru_cache(maxsize=32)
-def _load_pace_curves_cached(path_str: str) -> Dict[str, np.ndarray]:
-    df = pd.read_parquet(path_str)
-    curves = {}
-    for compound, cdf in df.groupby("compound"):
-        curves[str(compound).upper()] = cdf.sort_values("lap")["lap_time"].to_numpy()
-    return curves
-
-
-@lru_cache(maxsize=512)
-def _predict_stint_cached(
-    driver_id: int,
-    compound: str,
-    stint_len: int,
-    track_temp: float,
-    air_temp: float,
-    base: float,
-    slope: float,
-    circuit_id: str,
-) -> np.ndarray:
-    laps = np.arange(1, stint_len + 1)
-    base_series = base + slope * (laps - 1)
-    model, _ = _load_model_cached(driver_id)
-    df = pd.DataFrame({
-        "lap_number": laps,
-        "stint_age": laps,
-        "compound": compound,
-        "session_type": "RACE",
-        "circuit_id": circuit_id,
-        "track_temp": track_temp,
-        "air_temp": air_temp,
-        "lap_time": base_series,
-    })
-    return model.predict_stint(df)
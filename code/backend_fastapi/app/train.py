@@ -6,7 +6,9 @@ from typing import Dict
 import joblib
 import pandas as pd
 
-from .config import FEATURE_DIR, MODELS_DIR, DEFAULT_CONTEXT_LAPS
+from .config import FEATURE_DIR, MODELS_DIR, DEFAULT_CONTEXT_LAPS, SHARED_MODEL_FILE, TRAIN_BATCH_SIZE, TRAIN_MAX_EPOCHS, TRAIN_VAL_FRACTION
+from .model_registry import load_eager_model
+from .model_variants import export_all
 from .models_lstm import LSTMPaceModel, ModelBundle
 
 
@@ -19,7 +21,12 @@ def _load_features() -> pd.DataFrame:
     return pd.concat(dfs, ignore_index=True)
 
 
-def train_per_driver(min_laps: int = 200, epochs: int = 8) -> Dict[int, Path]:
+def train_per_driver(
+    min_laps: int = 200,
+    epochs: int = TRAIN_MAX_EPOCHS,
+    batch_size: int = TRAIN_BATCH_SIZE,
+    val_fraction: float = TRAIN_VAL_FRACTION,
+) -> Dict[int, Path]:
     df = _load_features()
     if df.empty:
         return {}
@@ -31,7 +38,7 @@ def train_per_driver(min_laps: int = 200, epochs: int = 8) -> Dict[int, Path]:
         if len(df_driver) < min_laps:
             continue
         model = LSTMPaceModel(context_len=DEFAULT_CONTEXT_LAPS)
-        bundle = model.train(df_driver, epochs=epochs)
+        bundle = model.train(df_driver, epochs=epochs, batch_size=batch_size, val_fraction=val_fraction)
         input_dim = 8
         payload = {
             "bundle": bundle,
@@ -43,8 +50,39 @@ def train_per_driver(min_laps: int = 200, epochs: int = 8) -> Dict[int, Path]:
         trained[int(driver_id)] = path
 
     global_model = LSTMPaceModel(context_len=DEFAULT_CONTEXT_LAPS)
-    bundle = global_model.train(df, epochs=epochs)
+    bundle = global_model.train(df, epochs=epochs, batch_size=batch_size, val_fraction=val_fraction)
     payload = {"bundle": bundle, "input_dim": 8, "context_len": DEFAULT_CONTEXT_LAPS}
     joblib.dump(payload, MODELS_DIR / "global.joblib")
 
     return trained
+
+
+def train_shared(
+    epochs: int = TRAIN_MAX_EPOCHS, batch_size: int = TRAIN_BATCH_SIZE, val_fraction: float = TRAIN_VAL_FRACTION
+) -> Path | None:
+    """One LSTM with a driver embedding, trained on every driver at once.
+
+    Served instead of the per-driver models when RACESCOPE_PACE_MODEL=shared.
+    """
+    df = _load_features()
+    if df.empty:
+        return None
+
+    MODELS_DIR.mkdir(parents=True, exist_ok=True)
+    model = LSTMPaceModel(context_len=DEFAULT_CONTEXT_LAPS, shared=True)
+    bundle = model.train(df, epochs=epochs, batch_size=batch_size, val_fraction=val_fraction)
+    payload = {"bundle": bundle, "input_dim": 8, "context_len": DEFAULT_CONTEXT_LAPS}
+    path = MODELS_DIR / SHARED_MODEL_FILE
+    joblib.dump(payload, path)
+    return path
+
+
+def export_model_variants() -> Dict[str, Dict]:
+    """TorchScript and int8 variants of every trained model, with accuracy
+    deltas and timings measured on the feature store (see model_variants)."""
+    df = _load_features()
+    paths = sorted(MODELS_DIR.glob("driver_[0-9]*.joblib"))
+    paths.extend(path for path in (MODELS_DIR / "global.joblib", MODELS_DIR / SHARED_MODEL_FILE) if path.exists())
+    if df.empty or not paths:
+        return {}
+    return export_all(paths, df, lambda path: load_eager_model(path)[:2])
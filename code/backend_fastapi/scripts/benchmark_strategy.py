@@ -1,14 +1,17 @@
 from __future__ import annotations
 
+import argparse
 import json
 import statistics
 import time
+from pathlib import Path
 from typing import Dict, List
 
 import requests
 
 BASE = "http://localhost:8000"
 PAYLOAD = {"year": 2023, "circuit_id": "Sakhir", "driver_id": 14}
+REPORT_PATH = Path(__file__).resolve().parents[1] / "benchmark_report.json"
 
 
 def call_strategy(n: int) -> Dict[str, List[float]]:
@@ -30,12 +33,20 @@ def summary(label: str, timings: List[float]) -> Dict[str, float]:
         "p50_ms": statistics.median(timings),
         "p90_ms": statistics.quantiles(timings, n=10)[8] if len(timings) >= 10 else max(timings),
         "p95_ms": statistics.quantiles(timings, n=20)[18] if len(timings) >= 20 else max(timings),
+        "p99_ms": statistics.quantiles(timings, n=100)[98] if len(timings) >= 100 else max(timings),
         "min_ms": min(timings),
         "max_ms": max(timings),
     }
 
 
 def main() -> None:
+    global BASE
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default=BASE)
+    parser.add_argument("--out", type=Path, default=REPORT_PATH)
+    args = parser.parse_args()
+    BASE = args.base_url.rstrip("/")
+
     # Cold run (clear caches by first call)
     cold = call_strategy(1)
     warm = call_strategy(10)
@@ -53,8 +64,7 @@ def main() -> None:
         },
     }
 
-    path = "/Users/alvarogonzaleztabernero/Library/CloudStorage/OneDrive-UniversidadPontificiaComillas/ICAI/5/TFG BA/code/backend_fastapi/benchmark_report.json"
-    with open(path, "w", encoding="utf-8") as f:
+    with open(args.out, "w", encoding="utf-8") as f:
         json.dump(report, f, indent=2)
 
 
@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from scripts.benchmark_strategy import summary
+
+SYNTHETIC_YEAR = 2023
+SYNTHETIC_CIRCUITS = {"Sakhir": (57, 33.0, 25.0), "Jeddah": (50, 29.0, 26.0), "Melbourne": (58, 24.0, 16.0)}
+SYNTHETIC_COMPOUNDS = {"SOFT": (91.6, 0.09), "MEDIUM": (92.2, 0.06), "HARD": (92.8, 0.04)}
+# Race plans cycled over drivers: (compound, share of race distance).
+SYNTHETIC_PLANS = (
+    (("MEDIUM", 0.45), ("HARD", 0.55)),
+    (("SOFT", 0.3), ("HARD", 0.7)),
+    (("SOFT", 0.25), ("MEDIUM", 0.4), ("HARD", 0.35)),
+    (("HARD", 0.55), ("MEDIUM", 0.45)),
+)
+REPORT_PATH = Path(__file__).resolve().parents[1] / "benchmark_suite_report.json"
+# Run in a fresh interpreter: time to import the API, peak RSS right after,
+# and time until the lifespan warm-up reports ready.
+_STARTUP_PROBE = """
+import asyncio, json, resource, sys, time
+t0 = time.perf_counter()
+from app.main import _readiness, app
+imported = time.perf_counter()
+try:  # ru_maxrss would report the (forking) suite's peak on Linux
+    with open("/proc/self/status") as status:
+        rss_mb = next(int(line.split()[1]) for line in status if line.startswith("VmHWM")) / 1024
+except OSError:
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+heavy = sorted(m for m in ("torch", "joblib", "sklearn") if m in sys.modules)
+
+async def ready():
+    async with app.router.lifespan_context(app):
+        while not _readiness["ready"]:
+            if _readiness["error"]:
+                raise SystemExit(_readiness["error"])
+            await asyncio.sleep(0.005)
+        return time.perf_counter()
+
+ready_at = asyncio.run(ready())
+print(json.dumps({"import_ms": (imported - t0) * 1000, "ready_ms": (ready_at - t0) * 1000,
+                  "rss_mb": rss_mb, "heavy_modules": heavy}))
+"""
+
+
+def write_synthetic_raw(raw_dir: Path, n_drivers: int = 6, seed: int = 42) -> None:
+    """Deterministic OpenF1-shaped raw parquet: FP2 long runs and a race per circuit."""
+    rng = np.random.default_rng(seed)
+    year_dir = raw_dir / f"year={SYNTHETIC_YEAR}"
+    drivers = [{"driver_number": 1 + d, "name_acronym": f"D{1 + d:02d}", "team_name": f"Team {d // 2}"} for d in range(n_drivers)]
+    sessions = []
+    t0 = pd.Timestamp(f"{SYNTHETIC_YEAR}-03-05T15:00:00+00:00")
+    for c_pos, (circuit, (total_laps, track_temp, air_temp)) in enumerate(SYNTHETIC_CIRCUITS.items()):
+        for s_pos, (session_name, n_laps) in enumerate((("Practice 2", 30), ("Race", total_laps))):
+            session_key = 9000 + 10 * c_pos + s_pos
+            start = t0 + pd.Timedelta(days=14 * c_pos + s_pos)
+            sessions.append({
+                "session_key": session_key,
+                "session_name": session_name,
+                "circuit_short_name": circuit,
+                "date_start": start.isoformat(),
+                "year": SYNTHETIC_YEAR,
+            })
+            laps, stints = [], []
+            for d_pos, driver in enumerate(drivers):
+                if session_name == "Race":
+                    plan = SYNTHETIC_PLANS[(d_pos + c_pos) % len(SYNTHETIC_PLANS)]
+                else:
+                    plan = (("SOFT", 0.45), ("MEDIUM", 0.55))
+                skill = 0.08 * d_pos
+                at = start
+                lap = 1
+                for stint_number, (compound, share) in enumerate(plan, 1):
+                    stint_len = n_laps - lap + 1 if stint_number == len(plan) else max(1, round(share * n_laps))
+                    stints.append({
+                        "session_key": session_key,
+                        "driver_number": driver["driver_number"],
+                        "stint_number": stint_number,
+                        "lap_start": lap,
+                        "lap_end": lap + stint_len - 1,
+                        "compound": compound,
+                        "tyre_age_at_start": 0,
+                    })
+                    base, slope = SYNTHETIC_COMPOUNDS[compound]
+                    for age in range(1, stint_len + 1):
+                        duration = (
+                            base + skill + slope * age + 0.04 * (track_temp - 30.0)
+                            - 0.03 * lap + rng.normal(0.0, 0.25)
+                        )
+                        laps.append({
+                            "session_key": session_key,
+                            "driver_number": driver["driver_number"],
+                            "lap_number": lap,
+                            "stint_number": stint_number,
+                            "date_start": at.isoformat(),
+                            "lap_duration": duration,
+                        })
+                        at += pd.Timedelta(seconds=duration)
+                        lap += 1
+            weather = [
+                {
+                    "session_key": session_key,
+                    "date": (start + pd.Timedelta(minutes=m)).isoformat(),
+                    "track_temperature": track_temp + rng.normal(0.0, 0.5),
+                    "air_temperature": air_temp + rng.normal(0.0, 0.3),
+                }
+                for m in range(0, 100, 2)
+            ]
+            session_dir = year_dir / f"session_key={session_key}"
+            session_dir.mkdir(parents=True, exist_ok=True)
+            pd.DataFrame(laps).to_parquet(session_dir / "laps.parquet", index=False)
+            pd.DataFrame(stints).to_parquet(session_dir / "stints.parquet", index=False)
+            pd.DataFrame(weather).to_parquet(session_dir / "weather.parquet", index=False)
+            pd.DataFrame([{**d, "session_key": session_key} for d in drivers]).to_parquet(
+                session_dir / "drivers.parquet", index=False
+            )
+    pd.DataFrame(sessions).to_parquet(year_dir / "sessions.parquet", index=False)
+
+
+def build_synthetic_store(n_drivers: int = 6, seed: int = 42, epochs: int = 1) -> None:
+    """Untimed synthetic raw data, features and models in `RACESCOPE_STORAGE_DIR`."""
+    import torch
+
+    from app.config import RAW_DIR
+    from app.data_store import load_features
+    from app.driver_profile import train_driver_profiles
+    from app.preprocess import build_features_for_year
+    from app.train import train_per_driver
+
+    write_synthetic_raw(RAW_DIR, n_drivers=n_drivers, seed=seed)
+    build_features_for_year(SYNTHETIC_YEAR)
+    load_features.cache_clear()
+    torch.manual_seed(seed)
+    train_per_driver(min_laps=100, epochs=epochs)
+    train_driver_profiles(load_features(), min_laps=60)
+
+
+def _timed(fn: Callable[[int], object], repeat: int) -> List[float]:
+    timings = []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn(i)
+        timings.append((time.perf_counter() - t0) * 1000)
+    return timings
+
+
+def probe_startup() -> Dict:
+    """Run `_STARTUP_PROBE` against the current `RACESCOPE_STORAGE_DIR`."""
+    out = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", _STARTUP_PROBE],
+        cwd=Path(__file__).resolve().parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run_suite(repeat: int = 20, epochs: int = 1, n_drivers: int = 6, seed: int = 42) -> Dict:
+    """Time every pipeline and engine stage against the storage tree in
+    `RACESCOPE_STORAGE_DIR`; app modules are imported here, after it is set.
+    """
+    import torch
+
+    from app.config import MC_TOP_K, RAW_DIR
+    from app.data_store import load_features
+    from app.encoding import encode_payload
+    from app.driver_profile import train_driver_profiles
+    from app.model_registry import model_registry
+    from app.model_variants import EXPORTED_VARIANTS, build_variant
+    from app.preprocess import build_features_for_year
+    from app.strategy_engine import StrategyEngine
+    from app.train import train_per_driver, train_shared
+
+    write_synthetic_raw(RAW_DIR, n_drivers=n_drivers, seed=seed)
+    timings: Dict[str, List[float]] = {}
+
+    timings["preprocess"] = _timed(lambda _: build_features_for_year(SYNTHETIC_YEAR), max(1, repeat // 5))
+    load_features.cache_clear()
+    features = load_features()
+    torch.manual_seed(seed)
+    timings["train_lstm"] = _timed(lambda _: train_per_driver(min_laps=100, epochs=epochs), 1)
+    timings["train_shared_lstm"] = _timed(lambda _: train_shared(epochs=epochs), 1)
+    timings["train_profiles"] = _timed(lambda _: train_driver_profiles(features, min_laps=60), 1)
+
+    engine = StrategyEngine(features)
+    circuits = list(SYNTHETIC_CIRCUITS)
+    drivers = sorted(int(d) for d in features["driver_id"].unique())
+
+    def pick(i: int):
+        return circuits[i % len(circuits)], drivers[i % len(drivers)]
+
+    def model_load(i: int):
+        model_registry.clear()
+        return model_registry.model(pick(i)[1])
+
+    timings["model_load"] = _timed(model_load, repeat)
+
+    def context(i: int):
+        engine._frames.clear()
+        return engine._context(SYNTHETIC_YEAR, pick(i)[0])
+
+    timings["context"] = _timed(context, repeat)
+    timings["bounds"] = _timed(lambda i: engine._tyre_life_bounds(SYNTHETIC_YEAR, pick(i)[0]), repeat)
+
+    def candidates(i: int):
+        circuit = pick(i)[0]
+        total_laps = engine._context(SYNTHETIC_YEAR, circuit).total_laps
+        return engine._candidate_strategies(total_laps, engine._tyre_life_bounds(SYNTHETIC_YEAR, circuit))
+
+    timings["candidates"] = _timed(candidates, repeat)
+
+    def pace_curve_inference(i: int, variant: str = "eager"):
+        # Model forward pass over one driver's temperature grid, bypassing the curve store.
+        circuit, driver_id = pick(i)
+        total_laps = SYNTHETIC_CIRCUITS[circuit][0]
+        model, input_dim = model_registry.model(driver_id)
+        if variant != "eager":
+            model = copy.copy(model)
+            model.model = build_variant(variant, model, input_dim)
+        profile = model_registry.profile(driver_id)
+        frames = [engine._profile_grid_frame(profile, circuit, c, total_laps) for c in sorted(engine.valid_compounds)]
+        frame = pd.concat(frames, ignore_index=True)
+        return model.predict_concatenated(frame, [total_laps] * (len(frame) // total_laps))
+
+    timings["pace_curve_inference"] = _timed(pace_curve_inference, max(1, repeat // 5))
+    for variant in EXPORTED_VARIANTS:
+        # Includes tracing/quantizing the net (a few ms), as a cold load would.
+        timings[f"pace_curve_inference_{variant}"] = _timed(
+            lambda i, variant=variant: pace_curve_inference(i, variant), max(1, repeat // 5)
+        )
+
+    setups = {c: engine._race_setup(SYNTHETIC_YEAR, c) for c in circuits}
+    curves = {
+        (c, d): engine._precompute_pace_curves(SYNTHETIC_YEAR, c, d, setups[c].context)
+        for c in circuits
+        for d in drivers
+    }
+    timings["pace_curve_lookup"] = _timed(
+        lambda i: engine._precompute_pace_curves(SYNTHETIC_YEAR, pick(i)[0], pick(i)[1], setups[pick(i)[0]].context),
+        repeat,
+    )
+
+    def analytical(i: int):
+        circuit, driver_id = pick(i)
+        scores = engine._analytical_scores(setups[circuit], curves[(circuit, driver_id)])
+        return engine._rank(setups[circuit], scores, 0.15)
+
+    timings["analytical_ranking"] = _timed(analytical, repeat)
+
+    def monte_carlo(i: int):
+        circuit, driver_id = pick(i)
+        topk = [idx for *_, idx in analytical(i)[:MC_TOP_K]]
+        return engine._refine_candidates(setups[circuit], SYNTHETIC_YEAR, circuit, driver_id, topk, curves[(circuit, driver_id)])
+
+    timings["monte_carlo"] = _timed(monte_carlo, repeat)
+    timings["generate_strategies"] = _timed(
+        lambda i: engine.generate_strategies(SYNTHETIC_YEAR, pick(i)[0], pick(i)[1]),
+        repeat,
+    )
+    payloads = [engine.generate_strategies(SYNTHETIC_YEAR, *pick(i)) for i in range(len(drivers))]
+    timings["encode_payload"] = _timed(lambda i: encode_payload(payloads[i % len(payloads)]).body, repeat)
+
+    probes = [probe_startup() for _ in range(max(1, repeat // 5))]
+    timings["api_import"] = [probe["import_ms"] for probe in probes]
+    timings["api_ready"] = [probe["ready_ms"] for probe in probes]
+
+    return {
+        "config": {
+            "year": SYNTHETIC_YEAR,
+            "circuits": circuits,
+            "drivers": len(drivers),
+            "laps": int(len(features)),
+            "repeat": repeat,
+            "epochs": epochs,
+            "seed": seed,
+        },
+        "stages": {stage: summary(stage, values) for stage, values in timings.items()},
+        "raw": {f"{stage}_ms": values for stage, values in timings.items()},
+        "startup": {
+            "rss_mb": round(max(probe["rss_mb"] for probe in probes), 1),
+            "heavy_modules": probes[-1]["heavy_modules"],
+        },
+    }
+
+
+def check_regressions(report: Dict, baseline: Dict, max_regression: float, min_delta_ms: float) -> List[str]:
+    """Stages whose p50 grew more than `max_regression` (and `min_delta_ms`) over the baseline."""
+    failures = []
+    for stage, current in report["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if previous is None:
+            continue
+        limit = previous["p50_ms"] * (1.0 + max_regression)
+        if current["p50_ms"] > limit and current["p50_ms"] - previous["p50_ms"] > min_delta_ms:
+            failures.append(
+                f"{stage}: p50 {current['p50_ms']:.2f} ms vs baseline {previous['p50_ms']:.2f} ms "
+                f"(+{(current['p50_ms'] / previous['p50_ms'] - 1.0) * 100:.0f}%)"
+            )
+    previous_rss = baseline.get("startup", {}).get("rss_mb")
+    current_rss = report.get("startup", {}).get("rss_mb")
+    if previous_rss and current_rss and current_rss > previous_rss * (1.0 + max_regression):
+        failures.append(f"startup: peak RSS {current_rss:.0f} MB vs baseline {previous_rss:.0f} MB")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline per-stage benchmark on synthetic data")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--drivers", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", type=Path, help="Keep the synthetic data/models/cache tree here")
+    parser.add_argument("--out", type=Path, default=REPORT_PATH)
+    parser.add_argument("--baseline", type=Path, help="Previous suite report to gate against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="Allowed p50 growth per stage")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Ignore regressions smaller than this")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="racescope-bench-") as scratch:
+        os.environ["RACESCOPE_STORAGE_DIR"] = str(args.workdir or scratch)
+        report = run_suite(repeat=args.repeat, epochs=args.epochs, n_drivers=args.drivers, seed=args.seed)
+
+    failures = []
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        failures = check_regressions(report, baseline, args.max_regression, args.min_delta_ms)
+        report["gates"] = {
+            "baseline": str(args.baseline),
+            "max_regression": args.max_regression,
+            "min_delta_ms": args.min_delta_ms,
+            "failures": failures,
+        }
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for stage, stats in report["stages"].items():
+        print(f"{stage:>32}  p50 {stats['p50_ms']:9.2f} ms  p95 {stats['p95_ms']:9.2f} ms")
+    startup = report["startup"]
+    print(f"{'api startup':>32}  rss {startup['rss_mb']:.0f} MB  heavy modules: {', '.join(startup['heavy_modules']) or 'none'}")
+    if failures:
+        print("Regressions:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.data_store import load_features
+from app.rewatch import build_rewatch
+from app.strategy_engine import StrategyEngine
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--year", type=int, help="Single season (default: every season)")
+    parser.add_argument("--start", type=int)
+    parser.add_argument("--end", type=int)
+    args = parser.parse_args()
+
+    df = load_features()
+    if df.empty:
+        raise SystemExit("No features available. Run preprocess first.")
+
+    if args.year:
+        years = [args.year]
+    elif args.start is not None and args.end is not None:
+        years = list(range(args.start, args.end + 1))
+    else:
+        years = sorted(int(y) for y in df["year"].dropna().unique())
+
+    t0 = time.perf_counter()
+    summary = build_rewatch(years, StrategyEngine(df))
+    print(f"[rewatch] {summary} in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
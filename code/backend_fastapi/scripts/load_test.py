@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from scripts.benchmark_strategy import summary
+
+REPORT_PATH = Path(__file__).resolve().parents[1] / "load_test_report.json"
+DEFAULT_MIX = "strategy=0.7,compare=0.2,metadata=0.1"
+CACHEABLE = ("strategy", "compare")
+# A request: (kind, method, path, JSON body).
+Request = Tuple[str, str, str, Optional[Dict]]
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip() not in CACHEABLE + ("metadata",):
+            raise SystemExit(f"Unknown request kind in --mix: {kind}")
+        mix[kind.strip()] = float(weight)
+    return mix
+
+
+def _proc_usage(pids: List[int]) -> Tuple[int, float]:
+    """(RSS bytes, user+system CPU seconds) summed over `pids`, from /proc."""
+    rss = 0
+    cpu = 0.0
+    ticks = os.sysconf("SC_CLK_TCK")
+    page = os.sysconf("SC_PAGE_SIZE")
+    for pid in pids:
+        try:
+            stat = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+            statm = Path(f"/proc/{pid}/statm").read_text().split()
+        except OSError:
+            continue
+        cpu += (int(stat[11]) + int(stat[12])) / ticks
+        rss += int(statm[1]) * page
+    return rss, cpu
+
+
+def _process_tree(pid: int) -> List[int]:
+    pids = [pid]
+    for task in Path(f"/proc/{pid}/task").glob("*/children"):
+        for child in task.read_text().split():
+            pids.extend(_process_tree(int(child)))
+    return pids
+
+
+def usage_snapshot(pid: int) -> Dict[str, float]:
+    """Memory and CPU of a server process tree (API process plus compute workers)."""
+    if Path(f"/proc/{pid}").exists():
+        rss, cpu = _proc_usage(_process_tree(pid))
+        return {"rss_mb": rss / 2**20, "cpu_s": cpu}
+    # No procfs: only this process, and only its peak RSS.
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {"rss_mb": usage.ru_maxrss / 1024, "cpu_s": usage.ru_utime + usage.ru_stime}
+
+
+class RequestMix:
+    """Request generator over one season with a controlled response-cache hit ratio.
+
+    Cacheable requests hit a fixed hot set (warmed before measuring) with
+    probability `hit_ratio`; the rest get a risk_bias never used before, so
+    they always miss the response cache. Those values come from a per-run
+    random stream rather than `seed`: a repeated seed would replay the previous
+    run's values, which the durable result store would then serve as hits.
+    """
+
+    def __init__(self, year: int, circuits: List[str], drivers: List[Dict], mix: Dict[str, float], hit_ratio: float, hot_size: int, seed: int):
+        self.rng = random.Random(seed)
+        self.year = year
+        self.circuits = circuits
+        self.driver_ids = [int(d["driver_id"]) for d in drivers]
+        teams: Dict[str, List[int]] = defaultdict(list)
+        for d in drivers:
+            teams[d.get("team_name") or ""].append(int(d["driver_id"]))
+        self.pairs = [tuple(ids[:2]) for ids in teams.values() if len(ids) >= 2]
+        if not self.pairs and len(self.driver_ids) >= 2:
+            self.pairs = [tuple(self.driver_ids[:2])]
+        self.mix = {k: w for k, w in mix.items() if w > 0 and (k != "compare" or self.pairs)}
+        self.hit_ratio = hit_ratio
+        self._used_risk: set = set()
+        self._fresh_rng = random.Random(uuid.uuid4().int)
+        self.hot = {kind: [self._fresh(kind, hot=True) for _ in range(hot_size)] for kind in CACHEABLE if kind in self.mix}
+
+    def _risk(self, hot: bool) -> float:
+        if hot:
+            return self.rng.choice((0.0, 0.15, 0.3))
+        while True:
+            risk = round(self._fresh_rng.uniform(0.0, 1.0), 6)
+            if risk not in self._used_risk:
+                self._used_risk.add(risk)
+                return risk
+
+    def _fresh(self, kind: str, hot: bool = False) -> Request:
+        circuit_id = self.rng.choice(self.circuits)
+        if kind == "strategy":
+            body = {"year": self.year, "circuit_id": circuit_id, "driver_id": self.rng.choice(self.driver_ids), "risk_bias": self._risk(hot)}
+            return kind, "POST", "/api/strategy", body
+        driver_id, teammate_id = self.rng.choice(self.pairs)
+        body = {"year": self.year, "circuit_id": circuit_id, "driver_id": driver_id, "teammate_id": teammate_id, "risk_bias": self._risk(hot)}
+        return kind, "POST", "/api/compare", body
+
+    def warmup(self) -> List[Request]:
+        return [req for reqs in self.hot.values() for req in reqs]
+
+    def draw(self, n: int) -> List[Request]:
+        kinds = list(self.mix)
+        weights = [self.mix[k] for k in kinds]
+        plan = []
+        for kind in self.rng.choices(kinds, weights=weights, k=n):
+            if kind == "metadata":
+                plan.append((kind, "GET", f"/api/metadata/drivers?season={self.year}", None))
+            elif self.rng.random() < self.hit_ratio:
+                plan.append(self.rng.choice(self.hot[kind]))
+            else:
+                plan.append(self._fresh(kind))
+        return plan
+
+
+async def run_requests(client: httpx.AsyncClient, plan: List[Request], concurrency: int) -> Tuple[Dict[str, List[float]], Counter]:
+    """Send `plan` with `concurrency` requests in flight; latencies (ms) per kind."""
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in plan:
+        queue.put_nowait(item)
+    timings: Dict[str, List[float]] = defaultdict(list)
+    errors: Counter = Counter()
+
+    async def worker() -> None:
+        while True:
+            try:
+                kind, method, path, body = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            t0 = time.perf_counter()
+            try:
+                r = await client.request(method, path, json=body)
+                status = r.status_code
+            except httpx.HTTPError as exc:
+                status = type(exc).__name__
+            if status == 200:
+                timings[kind].append((time.perf_counter() - t0) * 1000)
+            else:
+                errors[f"{kind}:{status}"] += 1
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return timings, errors
+
+
+async def _response_cache_counts(client: httpx.AsyncClient) -> Counter:
+    counts: Counter = Counter()
+    r = await client.get("/api/metrics")
+    if r.status_code != 200:
+        return counts
+    for line in r.text.splitlines():
+        if line.startswith("racescope_response_cache_total{"):
+            labels, value = line.rsplit(" ", 1)
+            result = labels.split('result="', 1)[1].split('"', 1)[0]
+            counts[result] += int(float(value))
+    return counts
+
+
+@asynccontextmanager
+async def _client(base_url: Optional[str], timeout: float) -> AsyncIterator[httpx.AsyncClient]:
+    if base_url:
+        async with httpx.AsyncClient(base_url=base_url.rstrip("/"), timeout=timeout) as client:
+            yield client
+        return
+    # In-process: the app (and its compute pool) runs inside this interpreter.
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+            yield client
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float) -> Optional[Dict]:
+    """Poll /api/ready until warm-up finishes; None for servers without it."""
+    deadline = time.monotonic() + timeout
+    while True:
+        r = await client.get("/api/ready")
+        if r.status_code == 404:
+            return None
+        if r.status_code == 200:
+            return r.json()
+        if r.json().get("error") or time.monotonic() > deadline:
+            raise SystemExit(f"API not ready: {r.json()}")
+        await asyncio.sleep(0.1)
+
+
+async def load_test(args: argparse.Namespace) -> Dict:
+    async with _client(args.base_url, args.timeout) as client:
+        readiness = await wait_ready(client, args.timeout)
+        seasons = (await client.get("/api/metadata/seasons")).json()
+        if not seasons:
+            raise SystemExit("No seasons available; run preprocessing or use --synthetic.")
+        year = args.season or seasons[-1]
+        circuits = (await client.get("/api/metadata/circuits", params={"season": year})).json()
+        drivers = (await client.get("/api/metadata/drivers", params={"season": year})).json()
+        if args.circuits:
+            circuits = circuits[: args.circuits]
+        if args.drivers:
+            drivers = drivers[: args.drivers]
+
+        mix = RequestMix(year, circuits, drivers, parse_mix(args.mix), args.hit_ratio, args.hot_size, args.seed)
+        warm_timings, warm_errors = await run_requests(client, mix.warmup(), args.concurrency)
+        # In-process the server tree is this process (load generator included) and its workers.
+        server_pid = args.server_pid if args.base_url else os.getpid()
+
+        plan = mix.draw(args.requests)
+        cache_before = await _response_cache_counts(client)
+        usage_before = usage_snapshot(server_pid) if server_pid else None
+        t0 = time.perf_counter()
+        timings, errors = await run_requests(client, plan, args.concurrency)
+        elapsed = time.perf_counter() - t0
+        usage_after = usage_snapshot(server_pid) if server_pid else None
+        cache_after = await _response_cache_counts(client)
+
+    completed = sum(len(v) for v in timings.values())
+    observed = {k: cache_after[k] - cache_before[k] for k in ("hit", "coalesced", "computed")}
+    cache_total = sum(observed.values())
+    report = {
+        "config": {
+            "target": args.base_url or "in-process",
+            "year": year,
+            "circuits": circuits,
+            "drivers": len(drivers),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mix": mix.mix,
+            "hit_ratio": args.hit_ratio,
+            "hot_size": args.hot_size,
+            "seed": args.seed,
+        },
+        "startup_stages_s": readiness["stages"] if readiness else None,
+        "warmup": {"requests": sum(len(v) for v in warm_timings.values()), "errors": dict(warm_errors)},
+        "throughput_rps": completed / elapsed if elapsed > 0 else 0.0,
+        "elapsed_s": elapsed,
+        "errors": dict(errors),
+        "response_cache": {
+            **observed,
+            "hit_ratio": observed["hit"] / cache_total if cache_total else None,
+        },
+        "overall": summary("overall", [t for v in timings.values() for t in v]) if completed else None,
+        "by_kind": {kind: summary(kind, values) for kind, values in sorted(timings.items())},
+    }
+    if usage_before and usage_after:
+        report["resources"] = {
+            "rss_before_mb": usage_before["rss_mb"],
+            "rss_after_mb": usage_after["rss_mb"],
+            "rss_growth_mb": usage_after["rss_mb"] - usage_before["rss_mb"],
+            "cpu_s": usage_after["cpu_s"] - usage_before["cpu_s"],
+            "cpu_ms_per_request": (usage_after["cpu_s"] - usage_before["cpu_s"]) * 1000 / max(completed, 1),
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent load test of the strategy API")
+    parser.add_argument("--base-url", help="Target a running server (default: drive the app in-process)")
+    parser.add_argument("--server-pid", type=int, help="With --base-url: server PID for memory/CPU accounting")
+    parser.add_argument("--synthetic", action="store_true", help="In-process on the benchmark suite's synthetic season")
+    parser.add_argument("--season", type=int)
+    parser.add_argument("--circuits", type=int, help="Limit to the first N circuits")
+    parser.add_argument("--drivers", type=int, help="Limit to the first N drivers")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weights per kind: strategy, compare, metadata")
+    parser.add_argument("--hit-ratio", type=float, default=0.5, help="Share of cacheable requests drawn from the hot set")
+    parser.add_argument("--hot-size", type=int, default=8, help="Hot payloads per cacheable kind, warmed before measuring")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--out", type=Path, default=REPORT_PATH)
+    args = parser.parse_args()
+    if not 0.0 <= args.hit_ratio <= 1.0:
+        raise SystemExit("--hit-ratio must be between 0 and 1")
+    if args.synthetic and args.base_url:
+        raise SystemExit("--synthetic drives the app in-process; drop --base-url")
+
+    if args.synthetic:
+        with tempfile.TemporaryDirectory(prefix="racescope-load-") as scratch:
+            # Must be set before any app module is imported.
+            os.environ["RACESCOPE_STORAGE_DIR"] = scratch
+            from scripts.benchmark_suite import build_synthetic_store
+
+            build_synthetic_store()
+            report = asyncio.run(load_test(args))
+    else:
+        report = asyncio.run(load_test(args))
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{report['throughput_rps']:.1f} req/s over {report['elapsed_s']:.1f}s, errors: {report['errors'] or 'none'}")
+    print(f"response cache: {report['response_cache']}")
+    for kind, stats in report["by_kind"].items():
+        print(f"{kind:>10}  n={stats['count']:<5} p50 {stats['p50_ms']:8.2f}  p95 {stats['p95_ms']:8.2f}  p99 {stats['p99_ms']:8.2f} ms")
+    if "resources" in report:
+        res = report["resources"]
+        print(f"rss {res['rss_before_mb']:.0f} -> {res['rss_after_mb']:.0f} MB, cpu {res['cpu_ms_per_request']:.1f} ms/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import argparse
 
+from app.explore import build_explore_for_year
 from app.preprocess import build_features_for_year, build_features_range
 
 
@@ -10,9 +11,20 @@ def main() -> None:
     parser.add_argument("--year", type=int)
     parser.add_argument("--start", type=int)
     parser.add_argument("--end", type=int)
+    parser.add_argument("--explore-only", action="store_true", help="Rebuild explore cubes from existing features")
     args = parser.parse_args()
 
-    if args.year:
+    if args.explore_only:
+        if args.year:
+            years = [args.year]
+        elif args.start is not None and args.end is not None:
+            years = list(range(args.start, args.end + 1))
+        else:
+            raise SystemExit("Provide --year or --start/--end")
+        for year in years:
+            path = build_explore_for_year(year)
+            print(f"[explore] {year}: {path or 'no features'}")
+    elif args.year:
         build_features_for_year(args.year)
     else:
         if args.start is None or args.end is None:
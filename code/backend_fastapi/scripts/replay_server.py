@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import argparse
+
+import uvicorn
+
+from app.replay import ReplayFeed, ReplaySession, create_replay_app, find_session
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--year", type=int, required=True)
+    parser.add_argument("--session-key", type=int, help="Raw session to replay")
+    parser.add_argument("--circuit", help="Circuit short name (replays its Race session)")
+    parser.add_argument("--speed", type=float, default=10.0, help="Time compression, 1-100x")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+
+    if args.session_key is None:
+        if not args.circuit:
+            raise SystemExit("Provide --session-key or --circuit")
+        args.session_key = find_session(args.year, args.circuit)
+
+    session = ReplaySession(args.year, args.session_key)
+    feed = ReplayFeed(session, speed=args.speed)
+    print(f"[replay] session {args.session_key} at {args.speed:g}x on http://{args.host}:{args.port}/v1")
+    uvicorn.run(create_replay_app(feed), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,40 @@ from __future__ import annotations
 
 import argparse
 
-from app.train import train_per_driver
+from app.config import TRAIN_BATCH_SIZE, TRAIN_MAX_EPOCHS, TRAIN_VAL_FRACTION
+from app.train import export_model_variants, train_per_driver, train_shared
 
 
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--min-laps", type=int, default=200)
-    parser.add_argument("--epochs", type=int, default=8)
+    parser.add_argument("--epochs", type=int, default=TRAIN_MAX_EPOCHS, help="Maximum epochs (all of them with --val-fraction 0)")
+    parser.add_argument("--batch-size", type=int, default=TRAIN_BATCH_SIZE, help="Minibatch size; the learning rate scales with it")
+    parser.add_argument(
+        "--val-fraction",
+        type=float,
+        default=TRAIN_VAL_FRACTION,
+        help="Share of the latest sessions held out for early stopping, then fine-tuned on (0 disables)",
+    )
+    parser.add_argument("--shared", action="store_true", help="Train one multi-driver model instead of one per driver")
+    parser.add_argument("--no-export", action="store_true", help="Skip the TorchScript/int8 serving variants")
+    parser.add_argument("--export-only", action="store_true", help="Only re-export variants of the existing models")
     args = parser.parse_args()
 
-    train_per_driver(min_laps=args.min_laps, epochs=args.epochs)
+    if not args.export_only:
+        if args.shared:
+            train_shared(epochs=args.epochs, batch_size=args.batch_size, val_fraction=args.val_fraction)
+        else:
+            train_per_driver(
+                min_laps=args.min_laps, epochs=args.epochs, batch_size=args.batch_size, val_fraction=args.val_fraction
+            )
+    if not args.no_export:
+        for name, manifest in export_model_variants().items():
+            summary = ", ".join(
+                f"{variant} {info['ms']:.1f} ms d={info['mean_abs_delta_s']:.4f}s"
+                for variant, info in manifest["variants"].items()
+            )
+            print(f"{name}: {summary}")
 
 
 if __name__ == "__main__":
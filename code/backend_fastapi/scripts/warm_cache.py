@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import argparse
+import time
+from concurrent.futures import as_completed
+from typing import Dict, List
+
+from app.compute import ComputeExecutor, batch_task
+from app.config import COMPUTE_WORKERS
+from app.main import (
+    BatchDriverRequest,
+    BatchStrategyRequest,
+    _batch_row_keys,
+    _get_circuits,
+    _get_drivers,
+    _get_seasons,
+)
+from app.result_store import result_store
+
+
+def warm(years: List[int], workers: int) -> Dict[str, int]:
+    jobs = []
+    for year in years:
+        drivers = [BatchDriverRequest(driver_id=d["driver_id"]) for d in _get_drivers(year)]
+        if not drivers:
+            continue
+        for circuit_id in _get_circuits(year):
+            jobs.append(BatchStrategyRequest(year=year, circuit_id=circuit_id, drivers=drivers))
+
+    pool = ComputeExecutor(workers=workers, queue_limit=max(1, len(jobs)))
+    pool.start()
+    stored = 0
+    failed = 0
+    try:
+        futures = {pool.submit(batch_task, req.model_dump()): req for req in jobs}
+        for future in as_completed(futures):
+            req = futures[future]
+            try:
+                response = future.result()
+            except Exception as exc:
+                failed += 1
+                print(f"[warm] {req.year} {req.circuit_id}: failed ({exc})")
+                continue
+            for key, result in zip(_batch_row_keys(req), response["results"]):
+                result_store.put(key, result)
+                stored += 1
+            print(f"[warm] {req.year} {req.circuit_id}: {len(response['results'])} drivers")
+    finally:
+        pool.shutdown()
+    return {"races": len(jobs), "stored": stored, "failed": failed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--year", type=int, help="Single season to warm (default: every season)")
+    parser.add_argument("--workers", type=int, default=COMPUTE_WORKERS)
+    args = parser.parse_args()
+
+    years = [args.year] if args.year else _get_seasons()
+    if not years:
+        raise SystemExit("No features available. Run preprocess first.")
+
+    t0 = time.perf_counter()
+    summary = warm(years, args.workers)
+    print(f"[warm] {summary} in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+# Must be set before any app module is imported: every test runs against the
+# benchmark suite's synthetic season in a scratch storage tree.
+_SCRATCH = tempfile.TemporaryDirectory(prefix="racescope-tests-")
+os.environ["RACESCOPE_STORAGE_DIR"] = _SCRATCH.name
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture(scope="session")
+def synthetic_store() -> Path:
+    from scripts.benchmark_suite import build_synthetic_store
+
+    build_synthetic_store()
+    return Path(_SCRATCH.name)
+
+
+@pytest.fixture(scope="session")
+def client(synthetic_store):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        deadline = time.monotonic() + 120
+        while test_client.get("/api/ready").status_code != 200:
+            assert time.monotonic() < deadline, test_client.get("/api/ready").json()
+            time.sleep(0.2)
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def strategy_request(client):
+    from scripts.benchmark_suite import SYNTHETIC_YEAR
+
+    circuit_id = client.get("/api/metadata/circuits", params={"season": SYNTHETIC_YEAR}).json()[0]
+    driver_id = client.get("/api/metadata/drivers", params={"season": SYNTHETIC_YEAR}).json()[0]["driver_id"]
+    return {"year": SYNTHETIC_YEAR, "circuit_id": circuit_id, "driver_id": driver_id}
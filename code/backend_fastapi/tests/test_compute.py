@@ -0,0 +1,33 @@
+import os
+import signal
+import time
+
+import pytest
+
+from app.compute import ComputeExecutor, ComputeUnavailable, _ping, executor
+
+
+def test_submit_never_starts_the_pool():
+    idle = ComputeExecutor(workers=1)
+    with pytest.raises(ComputeUnavailable):
+        idle.submit(_ping)
+    assert idle._pool is None
+
+
+def test_dead_worker_is_replaced(client, strategy_request):
+    restarts = executor.restarts
+    os.kill(executor.submit(_ping).result(timeout=30), signal.SIGKILL)
+
+    statuses = []
+    deadline = time.monotonic() + 120
+    while not statuses or statuses[-1] != 200:
+        assert time.monotonic() < deadline, statuses
+        # A fresh risk_bias each time so no response comes from a cache.
+        payload = {**strategy_request, "risk_bias": 0.1 + 0.01 * len(statuses)}
+        statuses.append(client.post("/api/strategy", json=payload).status_code)
+    assert set(statuses) <= {200, 503}
+    assert executor.restarts == restarts + 1
+
+    ready = client.get("/api/ready")
+    assert ready.status_code == 200
+    assert ready.json()["worker_restarts"] == executor.restarts
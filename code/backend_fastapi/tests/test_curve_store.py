@@ -0,0 +1,35 @@
+import numpy as np
+
+from app.curve_store import CurveStore
+
+
+def test_round_trip_and_first_writer_wins(tmp_path):
+    store = CurveStore(tmp_path, width=8)
+    first = np.arange(10, dtype=np.float32).reshape(2, 5)
+    np.testing.assert_array_equal(store.put(("a",), first), first)
+    store.put(("a",), first + 1)
+    np.testing.assert_array_equal(CurveStore(tmp_path, width=8).get(("a",)), first)
+
+
+def test_curve_wider_than_rows_widens_the_store(tmp_path):
+    store = CurveStore(tmp_path, width=8)
+    short = np.arange(6, dtype=np.float32).reshape(1, 6)
+    store.put(("short",), short)
+    long = np.linspace(90.0, 95.0, 70, dtype=np.float32).reshape(1, 70)
+
+    np.testing.assert_array_equal(store.put(("long",), long), long)
+    # Both blocks are served from the widened file, by this process and others.
+    for reader in (store, CurveStore(tmp_path, width=8)):
+        np.testing.assert_array_equal(reader.get(("long",)), long)
+        np.testing.assert_array_equal(reader.get(("short",)), short)
+    assert sorted(p.name for p in tmp_path.glob("*.f32")) == ["curves-1.f32"]
+
+
+def test_prune_keeps_current_version(tmp_path):
+    store = CurveStore(tmp_path, width=8)
+    store.put(("old",), np.ones((1, 4)), version="v1")
+    store.put(("new",), np.full((1, 20), 2.0), version="v2")
+    assert store.prune("v2") == 1
+    reader = CurveStore(tmp_path, width=8)
+    assert reader.get(("old",)) is None
+    np.testing.assert_array_equal(reader.get(("new",)), np.full((1, 20), 2.0, dtype=np.float32))
@@ -0,0 +1,48 @@
+import base64
+import json
+
+import numpy as np
+import pytest
+
+from app import encoding
+
+PAYLOAD = {
+    "year": np.int64(2023),
+    "expected_time": np.float32(5321.25),
+    "lap_time_data": np.array([91.5, 91.75], dtype=np.float32),
+    "pits": [np.int32(18), 37],
+    "by_driver": {1: "VER", 44: "HAM"},
+    "label": "Sao Paulo - Interlagos",
+}
+EXPECTED = {
+    "year": 2023,
+    "expected_time": 5321.25,
+    "lap_time_data": [91.5, 91.75],
+    "pits": [18, 37],
+    "by_driver": {"1": "VER", "44": "HAM"},
+    "label": "Sao Paulo - Interlagos",
+}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(encoding, "orjson", None)
+    else:
+        assert encoding.orjson is not None, "orjson is pinned in requirements.txt"
+    return request.param
+
+
+def test_dumps_handles_numpy_and_int_keys(backend):
+    raw = encoding.dumps(PAYLOAD)
+    assert isinstance(raw, bytes)
+    assert json.loads(raw) == EXPECTED
+
+
+def test_compact_response_packs_curves(backend):
+    stint = {"lap_time_data": [91.5, 91.75], "degradation_data": [1, 2]}
+    response = encoding.encode_payload({"stint_curves": [stint]}, accept=encoding.COMPACT_MEDIA_TYPE)
+    body = json.loads(response.body)
+    packed = body["stint_curves"][0]
+    assert "degradation_data" not in packed
+    assert np.frombuffer(base64.b64decode(packed["lap_time_data"]), dtype="<f4").tolist() == [91.5, 91.75]
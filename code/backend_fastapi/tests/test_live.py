@@ -0,0 +1,33 @@
+import pytest
+
+from scripts.benchmark_suite import SYNTHETIC_CIRCUITS
+
+
+@pytest.fixture
+def live_request(strategy_request):
+    total_laps = SYNTHETIC_CIRCUITS[strategy_request["circuit_id"]][0]
+    return {**strategy_request, "compound": "medium", "tyre_age": 10, "current_lap": total_laps - 20}
+
+
+def test_live_plans_the_rest_of_the_race(client, live_request):
+    response = client.post("/api/live/strategy", json=live_request)
+    assert response.status_code == 200
+    strategies = response.json()["strategies"]
+    assert strategies
+    assert all(sum(plan["stints"]) == 20 for plan in strategies)
+
+
+@pytest.mark.parametrize("laps_after_finish", [0, 3])
+def test_live_rejects_a_finished_race(client, live_request, laps_after_finish):
+    total_laps = live_request["current_lap"] + 20
+    response = client.post("/api/live/strategy", json={**live_request, "current_lap": total_laps + laps_after_finish})
+    assert response.status_code == 422
+    assert "finish" in response.json()["detail"]
+
+
+@pytest.mark.parametrize(
+    "override",
+    [{"used_compounds": ["SOFT", "INTERMEDIATE"]}, {"compound": "wet"}, {"tyre_age": 500}, {"tyre_age": -1}],
+)
+def test_live_rejects_impossible_tyre_state(client, live_request, override):
+    assert client.post("/api/live/strategy", json={**live_request, **override}).status_code == 422
@@ -0,0 +1,35 @@
+import numpy as np
+
+from app.config import DEFAULT_CONTEXT_LAPS, TRAIN_MAX_EPOCHS, TRAIN_PATIENCE
+from app.data_store import load_features
+from app.models_lstm import LSTMPaceModel, session_split
+
+
+def _driver_laps():
+    df = load_features()
+    return df[df["driver_id"] == df["driver_id"].min()]
+
+
+def test_session_split_holds_out_latest_sessions():
+    sessions = np.array([3, 1, 2, 3, 1, 4, 4])
+    train_idx, val_idx = session_split(sessions, 0.5)
+    assert set(sessions[val_idx]) == {3, 4}
+    assert set(sessions[train_idx]) == {1, 2}
+    assert len(session_split(sessions, 0.0)[1]) == 0
+
+
+def test_training_stops_when_validation_plateaus(synthetic_store):
+    # A zero learning rate freezes the net, so the validation loss never
+    # improves after the first epoch.
+    model = LSTMPaceModel(context_len=DEFAULT_CONTEXT_LAPS)
+    bundle = model.train(_driver_laps(), val_fraction=0.2, lr=0.0)
+    assert bundle.stats["best_epoch"] == 1
+    assert bundle.stats["epochs"] == 1 + TRAIN_PATIENCE < TRAIN_MAX_EPOCHS
+    assert np.isfinite(bundle.stats["val_loss"])
+
+
+def test_training_without_holdout_runs_every_epoch(synthetic_store):
+    model = LSTMPaceModel(context_len=DEFAULT_CONTEXT_LAPS)
+    bundle = model.train(_driver_laps(), epochs=2, val_fraction=0.0)
+    assert bundle.stats["epochs"] == 2
+    assert "val_loss" not in bundle.stats
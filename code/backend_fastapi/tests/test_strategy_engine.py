@@ -0,0 +1,27 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+from app.data_store import load_features
+
+
+@pytest.fixture(scope="module")
+def engine(synthetic_store):
+    from app.strategy_engine import StrategyEngine
+
+    return StrategyEngine(load_features())
+
+
+def test_stint_fallback_matches_interpolated_curves(engine, strategy_request):
+    year, circuit_id, driver_id = strategy_request["year"], strategy_request["circuit_id"], strategy_request["driver_id"]
+    # Between grid points on both axes: snapping would pick 35 / 20.
+    context = dataclasses.replace(engine._race_setup(year, circuit_id).context, track_temp=37.4, air_temp=21.3)
+
+    fallback = engine._predict_stint(driver_id, "MEDIUM", 20, context, circuit_id)
+    curves = engine._precompute_pace_curves(year, circuit_id, driver_id, context)
+    np.testing.assert_allclose(fallback, curves["MEDIUM"][:20], rtol=1e-6)
+
+    longer = engine._predict_stint(driver_id, "MEDIUM", context.total_laps + 3, context, circuit_id)
+    np.testing.assert_allclose(longer[: context.total_laps], curves["MEDIUM"], rtol=1e-6)
+    assert np.all(longer[context.total_laps :] == longer[context.total_laps - 1])
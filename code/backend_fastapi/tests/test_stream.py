@@ -0,0 +1,28 @@
+import json
+
+from app import main
+from app.result_store import result_store
+
+
+def _events(client, payload):
+    response = client.post("/api/strategy/stream", json=payload)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_cold_stream_refines_then_finishes(client, strategy_request):
+    events = _events(client, {**strategy_request, "risk_bias": 0.37})
+    assert events[0]["event"] == "analytical"
+    assert events[-1]["event"] == "final"
+
+
+def test_stream_serves_durable_results_after_restart(client, strategy_request):
+    payload = {**strategy_request, "risk_bias": 0.41}
+    expected = client.post("/api/strategy", json=payload).json()
+    result_store.flush()
+    # A fresh API process: nothing in memory, the result only in the store.
+    main._cache.clear()
+
+    events = _events(client, payload)
+    assert [event["event"] for event in events] == ["final"]
+    assert events[0]["data"] == expected
@@ -128,15 +128,11 @@ export default function App() {
     if (!targetSeason) return;
     try {
       setMetadataStatus("loading");
-      const [circuitsResp, driversResp, teamsResp] = await Promise.all([
-        api.get("/api/metadata/circuits", { params: { season: targetSeason } }),
-        api.get("/api/metadata/drivers", { params: { season: targetSeason } }),
-        api.get("/api/metadata/teams", { params: { season: targetSeason } }),
-      ]);
+      const { data } = await api.get(`/api/metadata/${targetSeason}`);
 
-      const circuitsData = circuitsResp.data || [];
-      const driversData = driversResp.data || [];
-      const teamsData = teamsResp.data || [];
+      const circuitsData = data?.circuits || [];
+      const driversData = data?.drivers || [];
+      const teamsData = data?.teams || [];
 
       setCircuits(circuitsData);
       setCircuitId(circuitsData[0] || "");
@@ -180,21 +176,26 @@ export default function App() {
     setRunning(true);
     setRows((prev) => prev.map((row) => ({ ...row, status: row.driverId ? "loading" : "idle" })));
 
-    const work = rows.map(async (row) => {
-      if (!row.driverId) return { id: row.id, status: "idle", data: null };
-      try {
-        const res = await api.post("/api/strategy", {
-          year: Number(season),
-          circuit_id: circuitId,
-          driver_id: Number(row.driverId),
-        });
-        return { id: row.id, status: "ready", data: res.data, selectedStrategyId: null };
-      } catch {
-        return { id: row.id, status: "error", data: null };
-      }
-    });
+    const activeRows = rows.filter((row) => row.driverId);
+    let updates = rows.filter((row) => !row.driverId).map((row) => ({ id: row.id, status: "idle", data: null }));
+    try {
+      const res = await api.post("/api/strategy/batch", {
+        year: Number(season),
+        circuit_id: circuitId,
+        drivers: activeRows.map((row) => ({ driver_id: Number(row.driverId) })),
+      }, { params: { legacy: false } });
+      updates = updates.concat(
+        activeRows.map((row, idx) => ({
+          id: row.id,
+          status: "ready",
+          data: res.data.results[idx],
+          selectedStrategyId: null,
+        })),
+      );
+    } catch {
+      updates = updates.concat(activeRows.map((row) => ({ id: row.id, status: "error", data: null })));
+    }
 
-    const updates = await Promise.all(work);
     setRows((prev) =>
       prev.map((row) => {
         const match = updates.find((u) => u.id === row.id);